@@ -81,8 +81,14 @@ from . import eos
 
 from . import processchemistry
 from . import chemicalpotentials
+from . import gibbsminimization
+from . import phasediagram
 from .solutionmodel import SolutionModel
 from . import geotherm
+from . import planet
+from . import tomography
+from . import misfit
+from . import fitting
 
 # miscellaneous
 from . import tools
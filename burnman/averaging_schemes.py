@@ -18,6 +18,11 @@ class AveragingScheme(object):
     New averaging schemes should define the functions
     average_bulk_moduli and average_shear_moduli, as
     specified here.
+
+    All the averaging functions also accept 2D arrays with
+    shape (n_points, n_phases), in which case the average is taken
+    over the last axis and an array of n_points values is returned.
+    This allows whole profiles or grids to be averaged in a single call.
     """
 
     def average_bulk_moduli(self, volumes, bulk_moduli, shear_moduli):
@@ -86,8 +91,9 @@ class AveragingScheme(object):
         rho : float
            Density :math:`\\rho`. :math:`[kg/m^3]`
         """
-        total_mass = np.sum(np.array(densities) * np.array(volumes))
-        total_vol = np.sum(np.array(volumes))  # should sum to one
+        volumes = np.asarray(volumes)
+        total_mass = np.sum(np.asarray(densities) * volumes, axis=-1)
+        total_vol = np.sum(volumes, axis=-1)  # should sum to one
         density = total_mass / total_vol
         return density
 
@@ -95,8 +101,9 @@ class AveragingScheme(object):
         """
         thermal expansion coefficient of the mineral :math:`\\alpha`. :math:`[1/K]`
         """
-        total_vol = np.sum(np.array(volumes))
-        return np.sum(np.array(alphas) * np.array(volumes)) / total_vol
+        volumes = np.asarray(volumes)
+        total_vol = np.sum(volumes, axis=-1)
+        return np.sum(np.asarray(alphas) * volumes, axis=-1) / total_vol
 
     def average_heat_capacity_v(self, fractions, c_v):
         # TODO: double-check that the formula we use is appropriate here.
@@ -118,7 +125,7 @@ class AveragingScheme(object):
         c_v : float
           heat capacity at constant volume of the composite :math:`C_V`. :math:`[J/K/mol]`
         """
-        return np.sum(np.array(fractions) * np.array(c_v))
+        return np.sum(np.asarray(fractions) * np.asarray(c_v), axis=-1)
 
     def average_heat_capacity_p(self, fractions, c_p):
         # TODO: double-check that the formula we use is correct.
@@ -137,7 +144,7 @@ class AveragingScheme(object):
         c_p : float
           heat capacity at constant pressure :math:`C_P` of the composite. :math:`[J/K/mol]`
         """
-        return np.sum(np.array(fractions) * np.array(c_p))
+        return np.sum(np.asarray(fractions) * np.asarray(c_p), axis=-1)
 
 
 class VoigtReussHill(AveragingScheme):
@@ -365,16 +372,14 @@ class HashinShtrikmanUpper(AveragingScheme):
             The upper Hashin-Shtrikman average bulk modulus :math:`K`. :math:`[Pa]`
         """
 
-        K_n = max(bulk_moduli)
-        G_n = max(shear_moduli)
-
-        vol_frac = volumes / sum(volumes)
+        vol_frac, bulk_moduli, shear_moduli = _volume_fractions_and_moduli(
+            volumes, bulk_moduli, shear_moduli)
+        K_n = np.max(bulk_moduli, axis=-1)
+        G_n = np.max(shear_moduli, axis=-1)
 
         alpha_n = -3. / (3. * K_n + 4. * G_n)
-        A_n = 0
-        for i in range(len(vol_frac)):
-            if bulk_moduli[i] != K_n:
-                A_n += vol_frac[i] / (1. / (bulk_moduli[i] - K_n) - alpha_n)
+        A_n = _hashin_shtrikman_sum(
+            vol_frac, bulk_moduli - K_n[..., np.newaxis], alpha_n)
 
         K_upper = K_n + A_n / (1. + alpha_n * A_n)
         return K_upper
@@ -400,17 +405,14 @@ class HashinShtrikmanUpper(AveragingScheme):
             The upper Hashin-Shtrikman average shear modulus :math:`G`. :math:`[Pa]`
         """
 
-        K_n = max(bulk_moduli)
-        G_n = max(shear_moduli)
-
-        vol_frac = volumes / sum(volumes)
+        vol_frac, bulk_moduli, shear_moduli = _volume_fractions_and_moduli(
+            volumes, bulk_moduli, shear_moduli)
+        K_n = np.max(bulk_moduli, axis=-1)
+        G_n = np.max(shear_moduli, axis=-1)
 
         beta_n = -3. * (K_n + 2. * G_n) / (5. * G_n * (3. * K_n + 4. * G_n))
-        B_n = 0
-        for i in range(len(vol_frac)):
-            if shear_moduli[i] != G_n:
-                B_n += vol_frac[i] / (
-                    1. / (2. * (shear_moduli[i] - G_n)) - beta_n)
+        B_n = _hashin_shtrikman_sum(
+            vol_frac, 2. * (shear_moduli - G_n[..., np.newaxis]), beta_n)
 
         G_upper = G_n + (0.5) * B_n / (1. + beta_n * B_n)
         return G_upper
@@ -451,16 +453,14 @@ class HashinShtrikmanLower(AveragingScheme):
             The lower Hashin-Shtrikman average bulk modulus :math:`K`. :math:`[Pa]`
         """
 
-        K_1 = min(bulk_moduli)
-        G_1 = min(shear_moduli)
-
-        vol_frac = volumes / sum(volumes)
+        vol_frac, bulk_moduli, shear_moduli = _volume_fractions_and_moduli(
+            volumes, bulk_moduli, shear_moduli)
+        K_1 = np.min(bulk_moduli, axis=-1)
+        G_1 = np.min(shear_moduli, axis=-1)
 
         alpha_1 = -3. / (3. * K_1 + 4. * G_1)
-        A_1 = 0
-        for i in range(len(vol_frac)):
-            if bulk_moduli[i] != K_1:
-                A_1 += vol_frac[i] / (1. / (bulk_moduli[i] - K_1) - alpha_1)
+        A_1 = _hashin_shtrikman_sum(
+            vol_frac, bulk_moduli - K_1[..., np.newaxis], alpha_1)
 
         K_lower = K_1 + A_1 / (1. + alpha_1 * A_1)
         return K_lower
@@ -486,17 +486,14 @@ class HashinShtrikmanLower(AveragingScheme):
             The lower Hashin-Shtrikman average shear modulus :math:`G`. :math:`[Pa]`
         """
 
-        K_1 = min(bulk_moduli)
-        G_1 = min(shear_moduli)
-
-        vol_frac = volumes / sum(volumes)
+        vol_frac, bulk_moduli, shear_moduli = _volume_fractions_and_moduli(
+            volumes, bulk_moduli, shear_moduli)
+        K_1 = np.min(bulk_moduli, axis=-1)
+        G_1 = np.min(shear_moduli, axis=-1)
 
         beta_1 = -3. * (K_1 + 2. * G_1) / (5. * G_1 * (3. * K_1 + 4. * G_1))
-        B_1 = 0
-        for i in range(len(vol_frac)):
-            if shear_moduli[i] != G_1:
-                B_1 += vol_frac[i] / (
-                    1. / (2. * (shear_moduli[i] - G_1)) - beta_1)
+        B_1 = _hashin_shtrikman_sum(
+            vol_frac, 2. * (shear_moduli - G_1[..., np.newaxis]), beta_1)
 
         G_lower = G_1 + (0.5) * B_1 / (1. + beta_1 * B_1)
         return G_lower
@@ -564,15 +561,38 @@ class HashinShtrikmanAverage(AveragingScheme):
                 + self.lower.average_shear_moduli(volumes, bulk_moduli, shear_moduli)) / 2.0
 
 
+def _volume_fractions_and_moduli(volumes, bulk_moduli, shear_moduli):
+    """
+    Converts the inputs of the Hashin-Shtrikman bounds to arrays
+    and normalizes the volumes along the last (phase) axis.
+    """
+    volumes = np.asarray(volumes, dtype=float)
+    vol_frac = volumes / np.sum(volumes, axis=-1)[..., np.newaxis]
+    return vol_frac, np.asarray(bulk_moduli, dtype=float), np.asarray(shear_moduli, dtype=float)
+
+
+def _hashin_shtrikman_sum(vol_frac, delta, coefficient):
+    """
+    Computes the sum over phases of vol_frac / (1/delta - coefficient),
+    leaving out the phases for which delta is zero (i.e. the phase
+    which defines the bound).
+    """
+    with np.errstate(divide='ignore'):
+        terms = vol_frac / (1. / delta - coefficient[..., np.newaxis])
+    return np.sum(np.where(delta != 0., terms, 0.), axis=-1)
+
+
 def voigt_average_function(phase_volume, X):
     """
     Do Voigt (iso-strain) average.  Rather like
     resistors in series.  Called by voigt and
     voigt_reuss_hill classes, takes a list of
     volumes and moduli, returns a modulus.
+    Accepts arrays of shape (n_points, n_phases).
     """
-    vol_frac = phase_volume / np.sum(phase_volume)
-    X_voigt = sum(f * x for f, x in zip(vol_frac, X))
+    phase_volume = np.asarray(phase_volume, dtype=float)
+    vol_frac = phase_volume / np.sum(phase_volume, axis=-1)[..., np.newaxis]
+    X_voigt = np.sum(vol_frac * np.asarray(X), axis=-1)
     return X_voigt
 
 
@@ -582,14 +602,18 @@ def reuss_average_function(phase_volume, X):
     resistors in parallel.  Called by reuss and
     voigt_reuss_hill classes, takes a list of
     volumes and moduli, returns a modulus.
+    Accepts arrays of shape (n_points, n_phases).
     """
-    vol_frac = phase_volume / np.sum(phase_volume)
-    for f, x in zip(vol_frac, X):
-        if x <= 0 and np.abs(f) > np.finfo(float).eps:
-            warnings.warn("Oops, called reuss_average with Xi<=0!")
-            return 0.0
-    X_reuss = 1. / sum(f / x for f, x in zip(vol_frac, X))
-    return X_reuss
+    phase_volume = np.asarray(phase_volume, dtype=float)
+    X = np.asarray(X, dtype=float)
+    vol_frac = phase_volume / np.sum(phase_volume, axis=-1)[..., np.newaxis]
+    present = np.abs(vol_frac) > np.finfo(float).eps
+    nonrigid = np.any(np.logical_and(X <= 0, present), axis=-1)
+    if np.any(nonrigid):
+        warnings.warn("Oops, called reuss_average with Xi<=0!")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        X_reuss = 1. / np.sum(np.where(vol_frac != 0., vol_frac / X, 0.), axis=-1)
+    return np.where(nonrigid, 0., X_reuss)[()]
 
 
 def voigt_reuss_hill_function(phase_volume, X):
@@ -598,6 +622,7 @@ def voigt_reuss_hill_function(phase_volume, X):
     of Voigt and Reuss bounds).  Called by
     voigt_reuss_hill class, takes a list of
     volumes and moduli, returns a modulus.
+    Accepts arrays of shape (n_points, n_phases).
     """
     X_vrh = (voigt_average_function(phase_volume, X)
              + reuss_average_function(phase_volume, X)) / 2.0
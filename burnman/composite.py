@@ -6,8 +6,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 import numpy as np
 import warnings
+import weakref
 
-from .material import Material, material_property
+from .material import Material, material_property, property_aliases
 from .mineral import Mineral
 from . import averaging_schemes
 from . import chemicalpotentials
@@ -31,6 +32,117 @@ def check_pairs(phases, fractions):
                     'ERROR: object of type ''%s'' is not of type Mineral' % (type(p)))
 
 
+# Properties of the individual phases which are needed by the averaging
+# schemes. At each state, they are gathered into the columns of a single
+# (n_phases x n_properties) array (see Composite._phase_properties).
+_phase_property_names = ['molar_volume', 'density',
+                         'isothermal_bulk_modulus', 'adiabatic_bulk_modulus',
+                         'shear_modulus', 'thermal_expansivity',
+                         'heat_capacity_v', 'heat_capacity_p']
+_phase_property_index = dict((name, i)
+                             for i, name in enumerate(_phase_property_names))
+
+
+# Properties of the composite which are molar averages of the properties
+# of the phases
+_molar_average_properties = ['internal_energy', 'molar_gibbs',
+                             'molar_helmholtz', 'molar_entropy',
+                             'molar_enthalpy', 'molar_mass']
+
+# Properties of the phases required by each property of the composite,
+# in addition to the molar averages above
+_required_phase_properties = {
+    'molar_volume': ['molar_volume'],
+    'density': ['molar_volume', 'density'],
+    'isothermal_bulk_modulus': ['molar_volume', 'isothermal_bulk_modulus',
+                                'shear_modulus'],
+    'adiabatic_bulk_modulus': ['molar_volume', 'adiabatic_bulk_modulus',
+                               'shear_modulus'],
+    'isothermal_compressibility': ['molar_volume', 'isothermal_bulk_modulus',
+                                   'shear_modulus'],
+    'adiabatic_compressibility': ['molar_volume', 'adiabatic_bulk_modulus',
+                                  'shear_modulus'],
+    'shear_modulus': ['molar_volume', 'adiabatic_bulk_modulus',
+                      'shear_modulus'],
+    'p_wave_velocity': ['molar_volume', 'density', 'adiabatic_bulk_modulus',
+                        'shear_modulus'],
+    'bulk_sound_velocity': ['molar_volume', 'density',
+                            'adiabatic_bulk_modulus', 'shear_modulus'],
+    'shear_wave_velocity': ['molar_volume', 'density',
+                            'adiabatic_bulk_modulus', 'shear_modulus'],
+    'grueneisen_parameter': ['molar_volume', 'thermal_expansivity',
+                             'isothermal_bulk_modulus', 'shear_modulus',
+                             'heat_capacity_v'],
+    'thermal_expansivity': ['molar_volume', 'thermal_expansivity'],
+    'heat_capacity_v': ['heat_capacity_v'],
+    'heat_capacity_p': ['heat_capacity_p']}
+for name in _molar_average_properties:
+    _required_phase_properties[name] = [name]
+
+
+def _contains(material, obj):
+    """
+    Checks whether obj is material, or is nested in it (as an endmember of
+    a solid solution or as a phase of a composite).
+    """
+    if material is obj:
+        return True
+    if hasattr(material, 'endmembers'):
+        return any(_contains(endmember[0], obj)
+                   for endmember in material.endmembers)
+    if isinstance(material, Composite):
+        return any(_contains(phase, obj) for phase in material.phases)
+    return False
+
+
+class _param_perturbation(object):
+    """
+    Perturbation of the parameter mineral.params[key], used by
+    Composite.evaluate_jacobian.
+    """
+
+    def __init__(self, parameter, step):
+        _, self.mineral, self.key = parameter
+        self.value = self.mineral.params[self.key]
+        h = step * abs(self.value) if self.value != 0. else step
+        self.deltas = [h, -h]
+
+    def apply(self, delta):
+        self.mineral.params[self.key] = self.value + delta
+        self.mineral.reset()
+
+    def restore(self):
+        self.mineral.params[self.key] = self.value
+        self.mineral.reset()
+
+
+class _composition_perturbation(object):
+    """
+    Perturbation of the composition of a solid solution by exchanging
+    endmember k for endmember j, used by Composite.evaluate_jacobian.
+    """
+
+    def __init__(self, parameter, step):
+        _, self.solution, self.j, self.k = parameter
+        self.original = self.solution.molar_fractions
+        self.composition = np.array(self.original, dtype=float)
+        x_j = self.composition[self.j]
+        x_k = self.composition[self.k]
+        self.deltas = [min(step, 1. - x_j, x_k), -min(step, x_j, 1. - x_k)]
+        if self.deltas[0] == self.deltas[1]:
+            raise Exception(
+                "Cannot perturb the composition of " + self.solution.to_string())
+
+    def apply(self, delta):
+        composition = self.composition.copy()
+        composition[self.j] += delta
+        composition[self.k] -= delta
+        self.solution.set_composition(composition)
+
+    def restore(self):
+        self.solution.set_composition(self.original)
+
+
 # static composite of minerals/composites
 class Composite(Material):
 
@@ -63,6 +175,13 @@ class Composite(Material):
 
         Material.__init__(self)
 
+        # Revision of the phases and fractions of this composite, which is
+        # increased whenever they change (or those of a nested composite
+        # change, see _structure_changed). The structure returned by unroll()
+        # is cached together with the revision it was built at.
+        self._revision = 0
+        self._parents = weakref.WeakSet()
+
         assert(len(phases) > 0)
         self.phases = phases
 
@@ -84,7 +203,7 @@ class Composite(Material):
         fraction_type: 'molar' or 'mass'
             specify whether molar or mass fractions are specified.
         """
-        assert(len(self.phases) == len(fractions))
+        assert(len(self._phases) == len(fractions))
 
         try:
             total = sum(fractions)
@@ -105,7 +224,7 @@ class Composite(Material):
             molar_fractions = fractions
         elif fraction_type == 'mass':
             molar_fractions = self._mass_to_molar_fractions(
-                self.phases, fractions)
+                self._phases, fractions)
         else:
             raise Exception(
                 "Fraction type not recognised. Please use 'molar' or mass")
@@ -114,11 +233,78 @@ class Composite(Material):
         self.molar_fractions = [max(0.0, fraction)
                                 for fraction in molar_fractions]
 
+    @property
+    def phases(self):
+        """
+        List of the phases of this Composite. This is a copy: assign a new
+        list of phases to change them.
+        """
+        return list(self._phases)
+
+    @phases.setter
+    def phases(self, phases):
+        for phase in getattr(self, '_phases', ()):
+            if isinstance(phase, Composite):
+                phase._parents.discard(self)
+        self._phases = tuple(phases)
+        for phase in self._phases:
+            if isinstance(phase, Composite):
+                phase._parents.add(self)
+        self._structure_changed()
+
+    @property
+    def molar_fractions(self):
+        """
+        List of the molar fractions of the phases of this Composite. This
+        is a copy: use set_fractions (or assign a new list of fractions) to
+        change them.
+        """
+        if self._molar_fractions is None:
+            return None
+        return list(self._molar_fractions)
+
+    @molar_fractions.setter
+    def molar_fractions(self, molar_fractions):
+        if molar_fractions is not None:
+            molar_fractions = tuple(molar_fractions)
+            self._molar_fraction_array = np.array(molar_fractions, dtype=float)
+            self._molar_fraction_array.flags.writeable = False
+        # Only invalidate the unrolled structure if the fractions
+        # actually change (HelperSpinTransition sets its fractions
+        # on every call to set_state)
+        changed = molar_fractions != getattr(self, '_molar_fractions', None)
+        self._molar_fractions = molar_fractions
+        if changed:
+            self._structure_changed()
+
+    def _structure_changed(self):
+        """
+        Increases the revision of this composite and of all the composites
+        which contain it, invalidating their cached unrolled structures.
+        """
+        self._revision += 1
+        for parent in list(self._parents):
+            parent._structure_changed()
+
+    def __getstate__(self):
+        # Weak references cannot be pickled or copied; the links to the
+        # parents are rebuilt by the parents themselves (see __setstate__)
+        state = self.__dict__.copy()
+        del state['_parents']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._parents = weakref.WeakSet()
+        for phase in self._phases:
+            if isinstance(phase, Composite):
+                phase._parents.add(self)
+
     def set_method(self, method):
         """
         set the same equation of state method for all the phases in the composite
         """
-        for phase in self.phases:
+        for phase in self._phases:
             phase.set_method(method)
         # Clear the cache on resetting method
         self.reset()
@@ -140,35 +326,140 @@ class Composite(Material):
     def set_state(self, pressure, temperature):
         """
         Update the material to the given pressure [Pa] and temperature [K].
+
+        Phases which appear several times in a (nested) composite are only
+        updated once per state.
         """
         Material.set_state(self, pressure, temperature)
-        for phase in self.phases:
+
+        updates, composites = self._state_plan()
+        for phase in updates:
             phase.set_state(pressure, temperature)
+        for composite in composites:
+            Material.set_state(composite, pressure, temperature)
+
+    def _state_plan(self):
+        """
+        Returns the materials to update in set_state: a list of the unique
+        phases (by identity) which are not plain composites, and a list of
+        the plain composites nested in this one. The plan is only rebuilt
+        when the structure changes.
+        """
+        if getattr(self, '_state_plan_revision', None) != self._revision:
+            updates = []
+            composites = []
+            visited = set([id(self)])
+
+            def visit(composite):
+                for phase in composite._phases:
+                    if id(phase) in visited:
+                        continue
+                    visited.add(id(phase))
+                    if (isinstance(phase, Composite) and
+                            type(phase).set_state is Composite.set_state):
+                        composites.append(phase)
+                        visit(phase)
+                    else:
+                        updates.append(phase)
+
+            visit(self)
+            self._cached_state_plan = (updates, composites)
+            self._state_plan_revision = self._revision
+        return self._cached_state_plan
 
     def debug_print(self, indent=""):
         print("%sComposite:" % indent)
         indent += "  "
-        if self.molar_fractions is None:
-            for i, phase in enumerate(self.phases):
+        if self._molar_fractions is None:
+            for i, phase in enumerate(self._phases):
                 phase.debug_print(indent + "  ")
         else:
-            for i, phase in enumerate(self.phases):
-                print("%s%g of" % (indent, self.molar_fractions[i]))
+            for i, phase in enumerate(self._phases):
+                print("%s%g of" % (indent, self._molar_fractions[i]))
                 phase.debug_print(indent + "  ")
 
     def unroll(self):
-        if self.molar_fractions is None:
+        """
+        Unroll this composite into a flat list of :class:`burnman.Mineral`
+        and their molar fractions.
+
+        The flattened structure is computed once and cached until the
+        phases or fractions of this composite (or of any nested composite)
+        are changed, so repeated calls are cheap. The returned lists are
+        shared with the cache and should not be modified. Composites which
+        contain other kinds of :class:`burnman.Material` (whose unroll()
+        may depend on the current state) are unrolled on every call.
+
+        Returns
+        -------
+        minerals : list of :class:`burnman.Mineral`
+            List of minerals.
+        fractions : list of float
+            List of molar fractions, summing to 1.0.
+        """
+        if getattr(self, '_unroll_revision', None) != self._revision:
+            revision = self._revision
+            self._unrolled = self._build_unrolled()
+            if self._unroll_cacheable:
+                self._unroll_revision = revision
+            else:
+                self._unroll_revision = None
+        return self._unrolled
+
+    def _build_unrolled(self):
+        if self._molar_fractions is None:
             raise Exception(
                 "Unroll only works if the composite has defined fractions.")
         phases = []
         fractions = []
-        for i, phase in enumerate(self.phases):
+        cacheable = True
+        for i, phase in enumerate(self._phases):
             p_mineral, p_fraction = phase.unroll()
             check_pairs(p_mineral, p_fraction)
-            fractions.extend([f * self.molar_fractions[i] for f in p_fraction])
+            fractions.extend([f * self._molar_fractions[i] for f in p_fraction])
             phases.extend(p_mineral)
+            if isinstance(phase, Composite):
+                cacheable = cacheable and phase._unroll_cacheable
+            else:
+                cacheable = cacheable and type(phase).unroll is Mineral.unroll
+        self._unroll_cacheable = cacheable
         return phases, fractions
 
+    def _phase_properties(self, *names):
+        """
+        Returns the requested properties of all the phases at the current
+        state, as one array of shape (n_phases,) per property.
+
+        Each property of each phase is only queried once per state: the
+        values are stored in the columns of a (n_phases x n_properties)
+        array which is cleared together with the other cached properties.
+        Columns are filled on first use, so that only the properties which
+        are actually needed are evaluated.
+        """
+        n_phases = len(self._phases)
+        if ('_phase_table' not in self._cached or
+                self._cached['_phase_table'][0].shape[0] != n_phases):
+            self._cached['_phase_table'] = (
+                np.empty((n_phases, len(_phase_property_names))),
+                np.zeros(len(_phase_property_names), dtype=bool))
+        table, filled = self._cached['_phase_table']
+
+        columns = []
+        for name in names:
+            i = _phase_property_index[name]
+            if not filled[i]:
+                table[:, i] = [getattr(phase, name) for phase in self._phases]
+                filled[i] = True
+            columns.append(table[:, i])
+        return columns
+
+    def _volume_fractions(self, molar_volumes):
+        """
+        Returns the (unnormalized) volume fractions of the phases,
+        given their molar volumes.
+        """
+        return molar_volumes * self._molar_fraction_array
+
     def to_string(self):
         """
         return the name of the composite
@@ -182,7 +473,7 @@ class Composite(Material):
         Aliased with self.energy
         """
         U = sum(phase.internal_energy * molar_fraction for (
-                phase, molar_fraction) in zip(self.phases, self.molar_fractions))
+                phase, molar_fraction) in zip(self._phases, self._molar_fractions))
         return U
 
     @material_property
@@ -192,7 +483,7 @@ class Composite(Material):
         Aliased with self.gibbs
         """
         G = sum(phase.molar_gibbs * molar_fraction for (phase, molar_fraction)
-                in zip(self.phases, self.molar_fractions))
+                in zip(self._phases, self._molar_fractions))
         return G
 
     @material_property
@@ -202,7 +493,7 @@ class Composite(Material):
         Aliased with self.helmholtz
         """
         F = sum(phase.molar_helmholtz * molar_fraction for (
-                phase, molar_fraction) in zip(self.phases, self.molar_fractions))
+                phase, molar_fraction) in zip(self._phases, self._molar_fractions))
         return F
 
     @material_property
@@ -211,16 +502,15 @@ class Composite(Material):
         Returns molar volume of the composite [m^3/mol]
         Aliased with self.V
         """
-        volumes = np.array(
-            [phase.molar_volume * molar_fraction for (phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        return np.sum(volumes)
+        V_ph, = self._phase_properties('molar_volume')
+        return np.sum(self._volume_fractions(V_ph))
 
     @material_property
     def molar_mass(self):
         """
         Returns molar mass of the composite [kg/mol]
         """
-        return sum([phase.molar_mass * molar_fraction for (phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
+        return sum([phase.molar_mass * molar_fraction for (phase, molar_fraction) in zip(self._phases, self._molar_fractions)])
 
     @material_property
     def density(self):
@@ -228,10 +518,9 @@ class Composite(Material):
         Compute the density of the composite based on the molar volumes and masses
         Aliased with self.rho
         """
-        densities = np.array([phase.density for phase in self.phases])
-        volumes = np.array(
-            [phase.molar_volume * molar_fraction for (phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        return self.averaging_scheme.average_density(volumes, densities)
+        V_ph, rho_ph = self._phase_properties('molar_volume', 'density')
+        return self.averaging_scheme.average_density(
+            self._volume_fractions(V_ph), rho_ph)
 
     @material_property
     def molar_entropy(self):
@@ -240,7 +529,7 @@ class Composite(Material):
         Aliased with self.S
         """
         S = sum(phase.molar_entropy * molar_fraction for (
-                phase, molar_fraction) in zip(self.phases, self.molar_fractions))
+                phase, molar_fraction) in zip(self._phases, self._molar_fractions))
         return S
 
     @material_property
@@ -250,7 +539,7 @@ class Composite(Material):
         Aliased with self.H
         """
         H = sum(phase.molar_enthalpy * molar_fraction for (
-                phase, molar_fraction) in zip(self.phases, self.molar_fractions))
+                phase, molar_fraction) in zip(self._phases, self._molar_fractions))
         return H
 
     @material_property
@@ -259,13 +548,10 @@ class Composite(Material):
         Returns isothermal bulk modulus of the composite [Pa]
         Aliased with self.K_T
         """
-        V_frac = np.array([phase.molar_volume * molar_fraction for (
-                           phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        K_ph = np.array(
-            [phase.isothermal_bulk_modulus for phase in self.phases])
-        G_ph = np.array([phase.shear_modulus for phase in self.phases])
-
-        return self.averaging_scheme.average_bulk_moduli(V_frac, K_ph, G_ph)
+        V_ph, K_ph, G_ph = self._phase_properties(
+            'molar_volume', 'isothermal_bulk_modulus', 'shear_modulus')
+        return self.averaging_scheme.average_bulk_moduli(
+            self._volume_fractions(V_ph), K_ph, G_ph)
 
     @material_property
     def adiabatic_bulk_modulus(self):
@@ -273,13 +559,10 @@ class Composite(Material):
         Returns adiabatic bulk modulus of the mineral [Pa]
         Aliased with self.K_S
         """
-        V_frac = np.array([phase.molar_volume * molar_fraction for (
-                           phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        K_ph = np.array(
-            [phase.adiabatic_bulk_modulus for phase in self.phases])
-        G_ph = np.array([phase.shear_modulus for phase in self.phases])
-
-        return self.averaging_scheme.average_bulk_moduli(V_frac, K_ph, G_ph)
+        V_ph, K_ph, G_ph = self._phase_properties(
+            'molar_volume', 'adiabatic_bulk_modulus', 'shear_modulus')
+        return self.averaging_scheme.average_bulk_moduli(
+            self._volume_fractions(V_ph), K_ph, G_ph)
 
     @material_property
     def isothermal_compressibility(self):
@@ -303,13 +586,10 @@ class Composite(Material):
         Returns shear modulus of the mineral [Pa]
         Aliased with self.G
         """
-        V_frac = np.array([phase.molar_volume * molar_fraction for (
-                           phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        K_ph = np.array(
-            [phase.adiabatic_bulk_modulus for phase in self.phases])
-        G_ph = np.array([phase.shear_modulus for phase in self.phases])
-
-        return self.averaging_scheme.average_shear_moduli(V_frac, K_ph, G_ph)
+        V_ph, K_ph, G_ph = self._phase_properties(
+            'molar_volume', 'adiabatic_bulk_modulus', 'shear_modulus')
+        return self.averaging_scheme.average_shear_moduli(
+            self._volume_fractions(V_ph), K_ph, G_ph)
 
     @material_property
     def p_wave_velocity(self):
@@ -350,10 +630,10 @@ class Composite(Material):
         Returns thermal expansion coefficient of the composite [1/K]
         Aliased with self.alpha
         """
-        volumes = np.array(
-            [phase.molar_volume * molar_fraction for (phase, molar_fraction) in zip(self.phases, self.molar_fractions)])
-        alphas = np.array([phase.thermal_expansivity for phase in self.phases])
-        return self.averaging_scheme.average_thermal_expansivity(volumes, alphas)
+        V_ph, alpha_ph = self._phase_properties(
+            'molar_volume', 'thermal_expansivity')
+        return self.averaging_scheme.average_thermal_expansivity(
+            self._volume_fractions(V_ph), alpha_ph)
 
     @material_property
     def heat_capacity_v(self):
@@ -361,8 +641,9 @@ class Composite(Material):
         Returns heat capacity at constant volume of the composite [J/K/mol]
         Aliased with self.C_v
         """
-        c_v = np.array([phase.heat_capacity_v for phase in self.phases])
-        return self.averaging_scheme.average_heat_capacity_v(self.molar_fractions, c_v)
+        c_v, = self._phase_properties('heat_capacity_v')
+        return self.averaging_scheme.average_heat_capacity_v(
+            self._molar_fraction_array, c_v)
 
     @material_property
     def heat_capacity_p(self):
@@ -370,8 +651,442 @@ class Composite(Material):
         Returns heat capacity at constant pressure of the composite [J/K/mol]
         Aliased with self.C_p
         """
-        c_p = np.array([phase.heat_capacity_p for phase in self.phases])
-        return self.averaging_scheme.average_heat_capacity_p(self.molar_fractions, c_p)
+        c_p, = self._phase_properties('heat_capacity_p')
+        return self.averaging_scheme.average_heat_capacity_p(
+            self._molar_fraction_array, c_p)
+
+    def evaluate_fractions(self, vars_list, pressures, temperatures,
+                           fraction_matrix):
+        """
+        Returns the properties of this composite along a pressure-temperature
+        profile for many sets of molar fractions of its phases.
+
+        Each phase is evaluated only once along the profile, after which
+        the averaging scheme is applied to all sets of fractions at once.
+        Scanning the fractions of a composite therefore costs little more
+        than a single call to :func:`~burnman.material.Material.evaluate`.
+        The fractions of the composite itself are not changed.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables to be returned for given conditions
+        pressures : array of float
+            Array of pressures in [Pa].
+        temperatures : array of float
+            Array of temperatures in [K].
+        fraction_matrix : 2D array of floats
+            Molar fractions of the phases, with shape
+            (n_fraction_sets, n_phases). Each row should add up to one.
+
+        Returns
+        -------
+        output : 3D array of floats
+            output[i][j][k] is property vars_list[i] for the fractions
+            fraction_matrix[j] at pressures[k] and temperatures[k].
+        """
+        fractions = np.array(fraction_matrix, dtype=float, ndmin=2)
+        if fractions.shape[1] != len(self._phases):
+            raise Exception(
+                'ERROR: the fraction matrix must have one column per phase')
+        if np.any(fractions < -1e-12):
+            raise Exception('ERROR: negative molar fractions')
+        totals = np.sum(fractions, axis=1)
+        if np.any(np.abs(totals - 1.0) > 1e-12):
+            warnings.warn(
+                "Warning: some sets of fractions do not add up to one. Normalizing.")
+            fractions = fractions / totals[:, np.newaxis]
+        fractions = np.maximum(fractions, 0.)
+
+        names = self._averaged_property_names(vars_list)
+        phase_values = self._evaluate_phase_profiles(
+            names, pressures, temperatures)
+        return self._average_phase_profiles(names, phase_values, fractions)
+
+    def evaluate_jacobian(self, vars_list, pressures, temperatures,
+                          parameters, step=1.e-6):
+        """
+        Returns the derivatives of properties of this composite along a
+        pressure-temperature profile with respect to a list of parameters.
+
+        The phases are evaluated once along the profile. Derivatives with
+        respect to the fractions of the phases are computed analytically
+        for the Voigt, Reuss and Voigt-Reuss-Hill averages. For other
+        averaging schemes (e.g. the Hashin-Shtrikman bounds), they are
+        computed by finite differences, which only require the averaging
+        to be repeated. For the other parameters, only the phases which
+        depend on them are re-evaluated, and derivatives are computed by
+        central differences (one-sided where the parameter is at a bound).
+        A Jacobian therefore costs about one evaluation of the composite
+        plus two evaluations of the affected phase per parameter.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables to be differentiated, e.g. ['v_s', 'v_p', 'rho'].
+        pressures : array of float
+            Array of pressures in [Pa].
+        temperatures : array of float
+            Array of temperatures in [K].
+        parameters : list of tuples
+            The parameters, each one given as one of:
+
+            - ('fraction', i): the molar fraction of self.phases[i]. The
+              other fractions are kept fixed (no renormalization).
+            - ('composition', solution, j, k): exchange of endmember j
+              for endmember k in the :class:`burnman.SolidSolution`
+              solution (i.e. the molar fraction of j increases and the
+              fraction of k decreases).
+            - ('param', mineral, key): the parameter mineral.params[key].
+
+            The solid solutions and minerals can be phases of this
+            composite, or be nested in them (as endmembers or in
+            nested composites).
+        step : float
+            Step of the finite differences, relative to the parameter
+            value for 'param' and absolute for fractions and compositions.
+
+        Returns
+        -------
+        jacobian : 3D array of floats
+            jacobian[i][j][k] is the derivative of property vars_list[i]
+            at pressures[j] and temperatures[j] with respect to
+            parameters[k].
+        """
+        if self._molar_fractions is None:
+            raise Exception(
+                "evaluate_jacobian only works if the composite has defined fractions.")
+        names = self._averaged_property_names(vars_list)
+        phase_values = self._evaluate_phase_profiles(
+            names, pressures, temperatures)
+        fractions = np.array(self._molar_fractions, dtype=float)
+
+        jacobian = np.empty((len(names), len(pressures), len(parameters)))
+
+        # Fractions: analytic derivatives where the averaging scheme has a
+        # closed form, otherwise all perturbations are averaged at once
+        fraction_parameters = [k for k, parameter in enumerate(parameters)
+                               if parameter[0] == 'fraction']
+        derivatives = None
+        if len(fraction_parameters) > 0:
+            derivatives = self._fraction_derivatives(
+                names, phase_values, fractions,
+                [parameters[k][1] for k in fraction_parameters])
+        if derivatives is not None:
+            jacobian[:, :, fraction_parameters] = derivatives
+        elif len(fraction_parameters) > 0:
+            perturbed = []
+            widths = []
+            for k in fraction_parameters:
+                i = parameters[k][1]
+                upper = fractions.copy()
+                lower = fractions.copy()
+                upper[i] += step
+                lower[i] = max(0., lower[i] - step)
+                perturbed.extend([upper, lower])
+                widths.append(upper[i] - lower[i])
+            values = self._average_phase_profiles(
+                names, phase_values, np.array(perturbed))
+            for n, k in enumerate(fraction_parameters):
+                jacobian[:, :, k] = (values[:, 2 * n] -
+                                     values[:, 2 * n + 1]) / widths[n]
+
+        # Other parameters: re-evaluate the phases which depend on them
+        for k, parameter in enumerate(parameters):
+            if parameter[0] == 'fraction':
+                continue
+            elif parameter[0] == 'composition':
+                perturbation = _composition_perturbation(parameter, step)
+            elif parameter[0] == 'param':
+                perturbation = _param_perturbation(parameter, step)
+            else:
+                raise Exception(
+                    "Parameter type not recognised: " + str(parameter[0]))
+
+            indices = [i for i, phase in enumerate(self._phases)
+                       if _contains(phase, parameter[1])]
+            if len(indices) == 0:
+                raise Exception(
+                    "The parameter " + str(parameter) + " does not belong to this composite")
+
+            values = []
+            for delta in perturbation.deltas:
+                perturbation.apply(delta)
+                try:
+                    perturbed_values = self._evaluate_phase_profiles(
+                        names, pressures, temperatures, indices)
+                finally:
+                    perturbation.restore()
+                shifted = dict((name, value.copy())
+                               for name, value in phase_values.items())
+                for name in shifted:
+                    shifted[name][:, indices] = perturbed_values[name]
+                values.append(self._average_phase_profiles(
+                    names, shifted, fractions[np.newaxis, :])[:, 0])
+            jacobian[:, :, k] = (values[0] - values[1]) / (
+                perturbation.deltas[0] - perturbation.deltas[1])
+
+        return jacobian
+
+    def evaluate_phases(self, vars_list, pressures, temperatures):
+        """
+        Returns the properties of the phases of this composite along a
+        pressure-temperature profile which are needed to compute the
+        properties vars_list of the composite. They can then be averaged
+        for any molar fractions of the phases with
+        :func:`~burnman.composite.Composite.average_phases`, without
+        evaluating the phases again.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables of the composite which will be averaged.
+        pressures : array of float
+            Array of pressures in [Pa].
+        temperatures : array of float
+            Array of temperatures in [K].
+
+        Returns
+        -------
+        phase_values : dictionary of 2D arrays of floats
+            For each property of the phases (by full name, e.g.
+            'molar_volume'), an array of shape (n_points, n_phases).
+        """
+        names = self._averaged_property_names(vars_list)
+        return self._evaluate_phase_profiles(names, pressures, temperatures)
+
+    def average_phases(self, vars_list, phase_values, fractions):
+        """
+        Applies the averaging scheme of this composite to properties of
+        its phases, as returned by
+        :func:`~burnman.composite.Composite.evaluate_phases`.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables of the composite to be returned.
+        phase_values : dictionary of arrays of floats
+            Properties of the phases, with the phases on the last axis.
+        fractions : array of floats
+            Molar fractions of the phases, with the phases on the last
+            axis. They are used as given, without normalization. The other
+            axes are broadcast against those of the arrays in phase_values.
+
+        Returns
+        -------
+        output : array of floats
+            output[i] is property vars_list[i], with the broadcast shape
+            of fractions and phase_values without the axis of the phases.
+        """
+        names = self._averaged_property_names(vars_list)
+        return self._average_phase_values(names, phase_values,
+                                          np.asarray(fractions, dtype=float))
+
+    def _fraction_derivatives(self, names, phase_values, fractions, indices):
+        """
+        Returns the derivatives of the properties names of the composite
+        with respect to the molar fractions of the phases indices (the
+        other fractions being fixed), given the properties of the phases
+        (as returned by _evaluate_phase_profiles), as an array of shape
+        (n_names, n_points, n_indices). Returns None if the averaging
+        scheme is not one of the linear (Voigt) or harmonic (Reuss)
+        averages or their mean (Voigt-Reuss-Hill).
+        """
+        scheme = self.averaging_scheme
+        if type(scheme) not in [averaging_schemes.Voigt,
+                                averaging_schemes.Reuss,
+                                averaging_schemes.VoigtReussHill]:
+            return None
+
+        # Arrays of shape (n_points, n_indices), and of shape (n_points, 1)
+        # for the properties of the composite
+        def phase(name):
+            return phase_values[name][:, indices]
+
+        averages = {}
+
+        def average(name):
+            if name not in averages:
+                averages[name] = self._average_phase_values(
+                    [name], phase_values, fractions)[0][:, np.newaxis]
+            return averages[name]
+
+        if 'molar_volume' in phase_values:
+            V_frac = fractions * phase_values['molar_volume']
+            V_k = phase('molar_volume') / average('molar_volume')
+
+        def modulus_derivative(phase_name):
+            # Derivatives of the volume fractions are
+            # V_k / V * (delta_ik - volume fraction of phase i)
+            X = phase_values[phase_name]
+            X_k = phase(phase_name)
+            derivatives = []
+            if type(scheme) is not averaging_schemes.Reuss:
+                X_V = averaging_schemes.voigt_average_function(V_frac, X)
+                derivatives.append(V_k * (X_k - X_V[:, np.newaxis]))
+            if type(scheme) is not averaging_schemes.Voigt:
+                X_R = averaging_schemes.reuss_average_function(
+                    V_frac, X)[:, np.newaxis]
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    d_R = np.where(X_R != 0., V_k * X_R * (1. - X_R / X_k), 0.)
+                derivatives.append(d_R)
+            return sum(derivatives) / len(derivatives)
+
+        results = {}
+
+        def derivative(name):
+            if name in results:
+                return results[name]
+            if name in _molar_average_properties:
+                value = phase(name)
+            elif name == 'molar_volume':
+                value = phase('molar_volume')
+            elif name in ['density', 'thermal_expansivity']:
+                value = V_k * (phase(name) - average(name))
+            elif name in ['heat_capacity_v', 'heat_capacity_p']:
+                value = phase(name)
+            elif name in ['isothermal_bulk_modulus', 'adiabatic_bulk_modulus',
+                          'shear_modulus']:
+                value = modulus_derivative(name)
+            elif name == 'isothermal_compressibility':
+                value = (-derivative('isothermal_bulk_modulus') /
+                         average('isothermal_bulk_modulus')**2)
+            elif name == 'adiabatic_compressibility':
+                value = (-derivative('adiabatic_bulk_modulus') /
+                         average('adiabatic_bulk_modulus')**2)
+            elif name in ['p_wave_velocity', 'bulk_sound_velocity',
+                          'shear_wave_velocity']:
+                # v = sqrt(M / rho)
+                if name == 'p_wave_velocity':
+                    d_M = (derivative('adiabatic_bulk_modulus') + 4. / 3. *
+                           derivative('shear_modulus'))
+                elif name == 'bulk_sound_velocity':
+                    d_M = derivative('adiabatic_bulk_modulus')
+                else:
+                    d_M = derivative('shear_modulus')
+                v = average(name)
+                value = ((d_M - v * v * derivative('density')) /
+                         (2. * average('density') * v))
+            elif name == 'grueneisen_parameter':
+                value = average(name) * (
+                    derivative('thermal_expansivity') / average('thermal_expansivity') +
+                    derivative('isothermal_bulk_modulus') / average('isothermal_bulk_modulus') +
+                    derivative('molar_volume') / average('molar_volume') -
+                    derivative('heat_capacity_v') / average('heat_capacity_v'))
+            results[name] = value
+            return value
+
+        return np.array([derivative(name) for name in names])
+
+    def _averaged_property_names(self, vars_list):
+        """
+        Returns the full names of the properties in vars_list, checking
+        that they can be computed from the properties of the phases.
+        """
+        names = [property_aliases.get(v, v) for v in vars_list]
+        for name in names:
+            if name not in _required_phase_properties:
+                raise Exception(
+                    "cannot compute the property " + name + " from the properties of the phases")
+        return names
+
+    def _evaluate_phase_profiles(self, names, pressures, temperatures,
+                                 phase_indices=None):
+        """
+        Evaluates the properties of the phases needed for the properties
+        names of the composite along a profile. Returns a dictionary with
+        an array of shape (n_points, n_phases) for each property of the
+        phases. If phase_indices is given, only those phases are evaluated.
+        """
+        phase_names = sorted(set(sum([_required_phase_properties[name]
+                                      for name in names], [])))
+        if phase_indices is None:
+            phase_indices = range(len(self._phases))
+        values = np.array([self._phases[i].evaluate(phase_names, pressures, temperatures)
+                           for i in phase_indices])
+        return dict((name, values[:, i, :].T)
+                    for i, name in enumerate(phase_names))
+
+    def _average_phase_profiles(self, names, phase_values, fractions):
+        """
+        Applies the averaging scheme to the properties of the phases
+        (as returned by _evaluate_phase_profiles) for each row of the
+        (n_fraction_sets, n_phases) array of molar fractions. The fractions
+        are used as given, without normalization. Returns an array of
+        shape (n_names, n_fraction_sets, n_points).
+        """
+        # Arrays of shape (n_fraction_sets, n_points, n_phases)
+        return self._average_phase_values(names, phase_values,
+                                          fractions[:, np.newaxis, :])
+
+    def _average_phase_values(self, names, phase_values, f):
+        """
+        Applies the averaging scheme to the properties of the phases
+        with molar fractions f. The last axis of f and of the arrays in
+        phase_values runs over the phases, and the other axes are
+        broadcast against each other. Returns an array of shape
+        (n_names,) + the broadcast shape without the last axis.
+        """
+        if 'molar_volume' in phase_values:
+            V_frac = f * phase_values['molar_volume']
+        zeros = np.zeros(np.broadcast(f, *phase_values.values()).shape)
+        scheme = self.averaging_scheme
+
+        def broadcast(name):
+            return phase_values[name] + zeros
+
+        results = {}
+
+        def compute(name):
+            if name in results:
+                return results[name]
+            if name in _molar_average_properties:
+                value = np.sum(f * phase_values[name], axis=-1)
+            elif name == 'molar_volume':
+                value = np.sum(V_frac, axis=-1)
+            elif name == 'density':
+                value = scheme.average_density(V_frac, broadcast('density'))
+            elif name == 'isothermal_bulk_modulus':
+                value = scheme.average_bulk_moduli(
+                    V_frac, broadcast('isothermal_bulk_modulus'),
+                    broadcast('shear_modulus'))
+            elif name == 'adiabatic_bulk_modulus':
+                value = scheme.average_bulk_moduli(
+                    V_frac, broadcast('adiabatic_bulk_modulus'),
+                    broadcast('shear_modulus'))
+            elif name == 'shear_modulus':
+                value = scheme.average_shear_moduli(
+                    V_frac, broadcast('adiabatic_bulk_modulus'),
+                    broadcast('shear_modulus'))
+            elif name == 'isothermal_compressibility':
+                value = 1. / compute('isothermal_bulk_modulus')
+            elif name == 'adiabatic_compressibility':
+                value = 1. / compute('adiabatic_bulk_modulus')
+            elif name == 'p_wave_velocity':
+                value = np.sqrt((compute('adiabatic_bulk_modulus') + 4. / 3. *
+                                 compute('shear_modulus')) / compute('density'))
+            elif name == 'bulk_sound_velocity':
+                value = np.sqrt(
+                    compute('adiabatic_bulk_modulus') / compute('density'))
+            elif name == 'shear_wave_velocity':
+                value = np.sqrt(compute('shear_modulus') / compute('density'))
+            elif name == 'grueneisen_parameter':
+                value = (compute('thermal_expansivity') *
+                         compute('isothermal_bulk_modulus') *
+                         compute('molar_volume') / compute('heat_capacity_v'))
+            elif name == 'thermal_expansivity':
+                value = scheme.average_thermal_expansivity(
+                    V_frac, broadcast('thermal_expansivity'))
+            elif name == 'heat_capacity_v':
+                value = scheme.average_heat_capacity_v(
+                    f + zeros, broadcast('heat_capacity_v'))
+            elif name == 'heat_capacity_p':
+                value = scheme.average_heat_capacity_p(
+                    f + zeros, broadcast('heat_capacity_p'))
+            results[name] = value
+            return value
+
+        return np.array([compute(name) for name in names])
 
     def _mass_to_molar_fractions(self, phases, mass_fractions):
         """
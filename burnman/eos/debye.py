@@ -120,6 +120,42 @@ def debye_fn_cheb(x):
         return ((val_infinity / x) / x) / x
 
 
+_debye_fn_cheb_array = np.vectorize(debye_fn_cheb, otypes=[float])
+
+
+def debye_fn_array(x):
+    """
+    Evaluate the Debye function (see debye_fn_cheb) for an array of x.
+    For complex x with a tiny imaginary part, the imaginary part of the
+    result is that of x times the derivative of the function, so that
+    results can be differentiated by the complex step method.
+    """
+    x = np.asarray(x)
+    value = _debye_fn_cheb_array(x.real)
+    if np.iscomplexobj(x):
+        derivative = 3. / np.expm1(x.real) - 3. * value / x.real
+        return value + 1j * x.imag * derivative
+    return value
+
+
+def thermal_energy_array(T, debye_T, n):
+    """
+    Thermal energy in J/mol (see thermal_energy) for arrays of
+    (strictly positive) temperatures and Debye temperatures.
+    """
+    return 3. * n * constants.gas_constant * T * debye_fn_array(debye_T / T)
+
+
+def heat_capacity_v_array(T, debye_T, n):
+    """
+    Heat capacity at constant volume in J/K/mol (see heat_capacity_v) for
+    arrays of (strictly positive) temperatures and Debye temperatures.
+    """
+    x = debye_T / T
+    return 3. * n * constants.gas_constant * \
+        (4. * debye_fn_array(x) - 3. * x / np.expm1(x))
+
+
 @jit
 def thermal_energy(T, debye_T, n):
     """
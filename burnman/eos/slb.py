@@ -253,6 +253,69 @@ class SLBBase(eos.EquationOfState):
         alpha = gr * C_v / K / volume
         return alpha
 
+    def volume_temperature_properties(self, volumes, temperatures, params):
+        """
+        Returns the pressure and the elastic and thermal properties at
+        arrays of volumes and temperatures, which are broadcast against
+        each other. Unlike the other methods, this evaluates all the points
+        at once. The volumes and parameters may also be complex, so that
+        the properties can be differentiated by the complex step method.
+
+        Returns
+        -------
+        properties : dictionary of arrays of floats
+            The 'pressure' :math:`[Pa]`, 'grueneisen_parameter',
+            'isothermal_bulk_modulus', 'adiabatic_bulk_modulus',
+            'shear_modulus' :math:`[Pa]`, 'thermal_expansivity'
+            :math:`[1/K]`, 'heat_capacity_v' and 'heat_capacity_p'
+            :math:`[J/K/mol]`.
+        """
+        T_0 = params['T_0']
+        n = params['n']
+        V = volumes
+        T = temperatures
+        ones = np.ones(np.broadcast(V, T).shape)
+        x = params['V_0'] / V
+        f = 1. / 2. * (pow(x, 2. / 3.) - 1.)
+        a1_ii = 6. * params['grueneisen_0']  # EQ 47
+        a2_iikk = -12. * params['grueneisen_0'] + 36. * pow(
+            params['grueneisen_0'], 2.) - 18. * params['q_0'] * params['grueneisen_0']  # EQ 47
+        nu_o_nu0_sq = 1. + a1_ii * f + (1. / 2.) * a2_iikk * f * f  # EQ 41
+        gr = 1. / 6. / nu_o_nu0_sq * (2. * f + 1.) * (a1_ii + a2_iikk * f)
+        debye_T = self._debye_temperature(x, params)
+        q = self.volume_dependent_q(x, params)
+        eta_s = self._isotropic_eta_s(x, params)
+
+        E_th = debye.thermal_energy_array(T, debye_T, n)
+        E_th_ref = debye.thermal_energy_array(T_0, debye_T, n)
+        C_v = debye.heat_capacity_v_array(T, debye_T, n)
+        C_v_ref = debye.heat_capacity_v_array(T_0, debye_T, n)
+
+        b_iikk = 9. * params['K_0']  # EQ 28
+        b_iikkmm = 27. * params['K_0'] * (params['Kprime_0'] - 4.)  # EQ 29
+        P = (1. / 3.) * (pow(1. + 2. * f, 5. / 2.)) * ((b_iikk * f)
+                                                       + (0.5 * b_iikkmm * pow(f, 2.))) + gr * (E_th - E_th_ref) / V  # EQ 21
+        K_T = bm.bulk_modulus(V, params) \
+            + (gr + 1. - q) * (gr / V) * (E_th - E_th_ref) \
+            - (pow(gr, 2.) / V) * (C_v * T - C_v_ref * T_0)
+        alpha = gr * C_v / K_T / V
+        if self.order == 2:
+            G = bm.shear_modulus_second_order(V, params)
+        elif self.order == 3:
+            G = bm.shear_modulus_third_order(V, params)
+        else:
+            raise NotImplementedError("")
+        G = G - eta_s * (E_th - E_th_ref) / V
+
+        return {'pressure': P * ones,
+                'grueneisen_parameter': gr * ones,
+                'isothermal_bulk_modulus': K_T * ones,
+                'adiabatic_bulk_modulus': K_T * (1. + gr * alpha * T) * ones,
+                'shear_modulus': G * ones,
+                'thermal_expansivity': alpha * ones,
+                'heat_capacity_v': C_v * ones,
+                'heat_capacity_p': C_v * (1. + gr * alpha * T) * ones}
+
     def gibbs_free_energy(self, pressure, temperature, volume, params):
         """
         Returns the Gibbs free energy at the pressure and temperature of the mineral [J/mol]
@@ -0,0 +1,306 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import numpy as np
+import warnings
+
+from .material import property_aliases
+from .eos import slb
+
+# This module fits the parameters of a mineral to any combination of
+# volume, elastic and sound velocity data at given pressures and
+# temperatures, by a weighted Levenberg-Marquardt least squares method.
+#
+# For minerals using the SLB equations of state (without property
+# modifiers), all properties are explicit functions of volume and
+# temperature. The volumes of all data points are then found together
+# by Newton's method, starting from the volumes of the previous
+# iteration, and the derivatives of the properties with respect to the
+# parameters are obtained exactly (to machine precision) by the complex
+# step method, applied to the explicit functions: for an analytic
+# function y, dy/dp = Im(y(p + ih)) / h for a tiny h. As the data are
+# given at fixed pressure, the change of volume with the parameters
+# follows from the implicit function theorem,
+#
+#   dV/dp = -(dP/dp)_V / (dP/dV)_p,
+#
+# and dy/dp = (dy/dp)_V + (dy/dV)_p dV/dp. A whole Jacobian therefore
+# costs one vectorized evaluation of the properties per parameter, and
+# no volume has to be recomputed. Other minerals are evaluated with
+# Material.evaluate, with a Jacobian from forward differences.
+
+# Properties which can be computed by _slb_properties
+_slb_property_names = ['molar_volume', 'density', 'isothermal_bulk_modulus',
+                       'adiabatic_bulk_modulus', 'shear_modulus',
+                       'p_wave_velocity', 'bulk_sound_velocity',
+                       'shear_wave_velocity', 'grueneisen_parameter',
+                       'thermal_expansivity', 'heat_capacity_v',
+                       'heat_capacity_p']
+
+def _slb_properties(method, params, volumes, temperatures):
+    """
+    Returns a dictionary with the pressure and the properties of
+    _slb_property_names for arrays of volumes and temperatures, from
+    :func:`burnman.eos.slb.SLBBase.volume_temperature_properties`. The
+    parameters and the volumes may be complex.
+    """
+    properties = method.volume_temperature_properties(volumes, temperatures,
+                                                      params)
+    V = volumes * np.ones_like(temperatures)
+    properties['molar_volume'] = V
+    if 'molar_mass' in params:
+        K_S = properties['adiabatic_bulk_modulus']
+        G = properties['shear_modulus']
+        rho = params['molar_mass'] / V
+        properties['density'] = rho
+        properties['p_wave_velocity'] = np.sqrt((K_S + 4. / 3. * G) / rho)
+        properties['bulk_sound_velocity'] = np.sqrt(K_S / rho)
+        properties['shear_wave_velocity'] = np.sqrt(G / rho)
+    return properties
+
+
+def _slb_volumes(method, params, pressures, temperatures, volumes,
+                 tolerance=1.e-12, max_iterations=50):
+    """
+    Solves P(V, T) = pressures for the volumes by Newton's method, starting
+    from the given volumes. Falls back to the (scalar) volume of the
+    equation of state if the iteration fails.
+    """
+    V = np.array(volumes, dtype=float)
+    for i in range(max_iterations):
+        properties = _slb_properties(method, params, V, temperatures)
+        step = (properties['pressure'] - pressures) * V / \
+            properties['isothermal_bulk_modulus']
+        V = V + step
+        if not np.all(np.isfinite(V)) or np.any(V <= 0.):
+            break
+        if np.max(np.abs(step / V)) < tolerance:
+            return V
+    return np.array([method.volume(P, T, params)
+                     for P, T in zip(pressures, temperatures)])
+
+
+def fit_data(mineral, fit_params, pressures, temperatures, observations,
+             uncertainties=None, absolute_sigma=False, max_iterations=100,
+             tolerance=1.e-10):
+    """
+    Fits parameters of a mineral to any combination of volume, elastic
+    and sound velocity data, measured at given pressures and
+    temperatures. The misfit is the sum of the squared differences
+    between the observed and calculated values, divided by their
+    uncertainties, over all data points and properties. It is minimized
+    with the Levenberg-Marquardt method.
+
+    For minerals using the SLB equations of state
+    (:class:`burnman.eos.slb.SLB3` and :class:`burnman.eos.slb.SLB2`), the
+    properties are evaluated for all data points at once, and the
+    derivatives with respect to the parameters are computed exactly,
+    without refitting the volumes for each parameter. Other minerals are
+    evaluated point by point, with derivatives from finite differences.
+
+    Parameters
+    ----------
+    mineral : :class:`burnman.Mineral`
+        Mineral for which the parameters should be optimized. Initial
+        guesses are taken from its parameters, which are replaced by
+        the optimized values.
+    fit_params : list of strings
+        Keys of mineral.params to be optimized.
+    pressures : array of floats
+        Pressures of the data points [Pa].
+    temperatures : array of floats
+        Temperatures of the data points [K].
+    observations : dictionary
+        Observed values for each data point, for each kind of data, e.g.
+        {'V': volumes, 'K_S': bulk_moduli, 'v_s': velocities}. The keys
+        are names of properties of the mineral (or their abbreviations,
+        as in :func:`~burnman.material.Material.evaluate`). Use nan
+        for the points where a property was not measured.
+    uncertainties : dictionary (optional)
+        Uncertainties of the observed values (arrays or single values),
+        with the keys of observations. By default, 1% of the mean of
+        the observed values of each property.
+    absolute_sigma : boolean
+        If True, the uncertainties are taken as absolute and the
+        covariance matrix is computed from them. If False (default), as
+        in scipy.optimize.curve_fit, only their relative sizes matter and
+        the covariance matrix is scaled by the reduced chi-squared of the
+        fit.
+    max_iterations : int
+        Maximum number of iterations. If the fit has not converged by
+        then, a warning is issued and the current parameters are returned.
+    tolerance : float
+        The iteration stops when the misfit decreases by less than this
+        fraction.
+
+    Returns
+    -------
+    popt : numpy array of floats
+        The optimized parameters.
+    pcov : 2D numpy array of floats
+        The covariance matrix of the optimized parameters.
+    """
+    pressures = np.asarray(pressures, dtype=float)
+    temperatures = np.asarray(temperatures, dtype=float)
+    if uncertainties is None:
+        uncertainties = {}
+
+    names = []
+    observed = []
+    sigmas = []
+    masks = []
+    for key, values in observations.items():
+        values = np.asarray(values, dtype=float) * np.ones_like(pressures)
+        mask = np.isfinite(values)
+        if key in uncertainties:
+            sigma = np.asarray(uncertainties[key], dtype=float) * \
+                np.ones_like(pressures)
+        else:
+            sigma = 0.01 * np.abs(np.mean(values[mask])) * \
+                np.ones_like(pressures)
+        names.append(property_aliases.get(key, key))
+        observed.append(values[mask])
+        sigmas.append(sigma[mask])
+        masks.append(mask)
+    observed = np.concatenate(observed)
+    sigmas = np.concatenate(sigmas)
+
+    use_slb = (isinstance(mineral.method, slb.SLBBase) and
+               len(mineral.property_modifiers) == 0)
+    if use_slb:
+        for name in names:
+            if name not in _slb_property_names:
+                raise Exception('cannot fit ' + name + ' data')
+        state = {'volumes': mineral.evaluate(['molar_volume'], pressures,
+                                             temperatures)[0]}
+
+    def set_params(x):
+        for name, value in zip(fit_params, x):
+            mineral.params[name] = value
+
+    def evaluate(x):
+        # Returns the calculated values and their derivatives with
+        # respect to the parameters, for all observations
+        set_params(x)
+        if use_slb:
+            values, jacobian = _slb_evaluate(mineral, fit_params, names,
+                                             pressures, temperatures, state)
+        else:
+            values, jacobian = _mineral_evaluate(mineral, fit_params, x, names,
+                                                 pressures, temperatures)
+        return (np.concatenate([v[mask] for v, mask in zip(values, masks)]),
+                np.concatenate([j[mask] for j, mask in zip(jacobian, masks)]))
+
+    x = np.array([mineral.params[name] for name in fit_params], dtype=float)
+    values, jacobian = evaluate(x)
+    residuals = (observed - values) / sigmas
+    J = jacobian / sigmas[:, np.newaxis]
+    chi_squared = np.dot(residuals, residuals)
+
+    damping = 1.e-3
+    for n_iterations in range(max_iterations):
+        # The columns of the Jacobian are scaled to unit length, so that
+        # parameters of very different magnitudes are treated alike
+        scale = np.sqrt(np.sum(J * J, axis=0))
+        scale[scale == 0.] = 1.
+        A = J / scale
+        H = np.dot(A.T, A)
+        g = np.dot(A.T, residuals)
+
+        while True:
+            step = np.linalg.solve(H + damping * np.diag(np.diag(H)), g) / scale
+            x_new = x + step
+            try:
+                new_values, new_jacobian = evaluate(x_new)
+                new_residuals = (observed - new_values) / sigmas
+                new_chi_squared = np.dot(new_residuals, new_residuals)
+            except Exception:
+                new_chi_squared = np.inf
+            if new_chi_squared <= chi_squared:
+                break
+            damping *= 10.
+            if damping > 1.e10:
+                break
+
+        if new_chi_squared > chi_squared:
+            # No step improves the fit any more
+            set_params(x)
+            break
+        converged = chi_squared - new_chi_squared <= tolerance * chi_squared
+        x = x_new
+        residuals = new_residuals
+        J = new_jacobian / sigmas[:, np.newaxis]
+        chi_squared = new_chi_squared
+        damping = max(damping / 10., 1.e-12)
+        if converged:
+            break
+    else:
+        warnings.warn('The fit did not converge in ' + str(max_iterations) +
+                      ' iterations; returning the current parameters')
+
+    if mineral.pressure is not None and mineral.temperature is not None:
+        mineral.set_state(mineral.pressure, mineral.temperature)
+
+    n_data = len(observed)
+    try:
+        pcov = np.linalg.inv(np.dot(J.T, J))
+    except np.linalg.LinAlgError:
+        pcov = np.inf * np.ones((len(x), len(x)))
+    if not absolute_sigma:
+        if n_data > len(x):
+            pcov = pcov * chi_squared / (n_data - len(x))
+        else:
+            pcov = np.inf * np.ones((len(x), len(x)))
+    return x, pcov
+
+
+def _slb_evaluate(mineral, fit_params, names, pressures, temperatures, state):
+    """
+    Returns the properties names of an SLB mineral and their derivatives
+    with respect to the parameters fit_params, with shapes
+    (n_names, n_points) and (n_names, n_points, n_params). The volumes
+    in state are used as a starting point and updated.
+    """
+    method = mineral.method
+    params = mineral.params
+    V = _slb_volumes(method, params, pressures, temperatures,
+                     state['volumes'])
+    state['volumes'] = V
+    properties = _slb_properties(method, params, V, temperatures)
+    values = np.array([properties[name].real for name in names])
+
+    # Derivatives at constant volume by the complex step method
+    h = 1.e-30
+    dV = _slb_properties(method, params, V + 1j * h * V, temperatures)
+    dP_dV = dV['pressure'].imag / (h * V)
+    jacobian = np.empty((len(names), len(pressures), len(fit_params)))
+    for j, param in enumerate(fit_params):
+        step = h * max(abs(params[param]), 1.)
+        perturbed = dict(params)
+        perturbed[param] = params[param] + 1j * step
+        dp = _slb_properties(method, perturbed, V, temperatures)
+        dV_dp = -dp['pressure'].imag / step / dP_dV
+        for i, name in enumerate(names):
+            jacobian[i, :, j] = dp[name].imag / step + \
+                dV[name].imag / (h * V) * dV_dp
+    return values, jacobian
+
+
+def _mineral_evaluate(mineral, fit_params, x, names, pressures, temperatures):
+    """
+    Returns the properties names of any mineral and their derivatives
+    with respect to the parameters fit_params (whose current values are
+    x), from forward differences.
+    """
+    values = mineral.evaluate(names, pressures, temperatures)
+    jacobian = np.empty((len(names), len(pressures), len(fit_params)))
+    for j, param in enumerate(fit_params):
+        step = 1.e-6 * max(abs(x[j]), 1.e-6)
+        mineral.params[param] = x[j] + step
+        jacobian[:, :, j] = (mineral.evaluate(names, pressures, temperatures)
+                             - values) / step
+        mineral.params[param] = x[j]
+    return values, jacobian
@@ -3,13 +3,15 @@
 # GPL v2 or later.
 
 from __future__ import absolute_import
+import sys
 import numpy as np
 import scipy.integrate as integrate
 from . import tools
 from . import seismic
+from .composite import Composite
 
 
-def brown_shankland(pressure):
+def brown_shankland(pressure, seismic_model=None):
     """
     Geotherm from :cite:`Brown1981`. NOTE: Valid only above 270 km
 
@@ -18,23 +20,26 @@ def brown_shankland(pressure):
     pressure : list of floats
         The list of pressures at which to evaluate the geotherm. :math:`[Pa]`
 
+    seismic_model : :class:`burnman.seismic.Seismic1DModel`
+        Model used to convert the pressures to the depths of the
+        tabulated geotherm (default PREM).
+
     Returns
     -------
     temperature : list of floats
         The list of temperatures for each of the pressures. :math:`[K]`
     """
-    temperature = np.empty_like(pressure)
-    for i in range(len(pressure)):
-        depth = seismic.prem_model.depth(pressure[i])
-        if depth < min(table_brown_depth):
-            raise ValueError(
-                "depth smaller than range Brown & Shankland, 1981")
-        temperature[i] = tools.lookup_and_interpolate(
-            table_brown_depth, table_brown_temperature, depth)
-    return temperature
-
-
-def anderson(pressure):
+    table = _geotherm_table('table_brown')
+    if seismic_model is None:
+        seismic_model = seismic.prem_model
+    depth = seismic_model.depth(pressure)
+    if np.any(depth < table[0, 0]):
+        raise ValueError(
+            "depth smaller than range Brown & Shankland, 1981")
+    return np.interp(depth, table[:, 0], table[:, 1])
+
+
+def anderson(pressure, seismic_model=None):
     """
     Geotherm from :cite:`anderson1982earth`.
 
@@ -43,20 +48,23 @@ def anderson(pressure):
     pressure : list of floats
         The list of pressures at which to evaluate the geotherm. :math:`[Pa]`
 
+    seismic_model : :class:`burnman.seismic.Seismic1DModel`
+        Model used to convert the pressures to the depths of the
+        tabulated geotherm (default PREM).
+
     Returns
     -------
     temperature : list of floats
         The list of temperatures for each of the pressures. :math:`[K]`
     """
-    temperature = np.empty_like(pressure)
-    for i in range(len(pressure)):
-        depth = seismic.prem_model.depth(pressure[i])
-        temperature[i] = tools.lookup_and_interpolate(
-            table_anderson_depth, table_anderson_temperature, depth)
-    return temperature
+    table = _geotherm_table('table_anderson')
+    if seismic_model is None:
+        seismic_model = seismic.prem_model
+    depth = seismic_model.depth(pressure)
+    return np.interp(depth, table[:, 0], table[:, 1])
 
 
-def adiabatic(pressures, T0, rock):
+def adiabatic(pressures, T0, rock, method='ode'):
     """
     This calculates a geotherm based on an anchor temperature and a rock,
     assuming that the rock's temperature follows an adiabatic gradient with
@@ -83,17 +91,262 @@ def adiabatic(pressures, T0, rock):
         must compute average Grueneisen parameters and adiabatic bulk moduli
         for each pressure/temperature.
 
+    method : string
+        'ode' (default) integrates the equation above with
+        scipy.integrate.odeint. 'isentrope' uses :func:`burnman.geotherm.isentrope`
+        instead, which also handles phase transitions.
+
     Returns
     -------
 
     temperature: list of floats
         The list of temperatures for each pressure. :math:`[K]`
     """
+    if method == 'isentrope':
+        return isentrope(pressures, T0, rock)
+    elif method != 'ode':
+        raise Exception("method must be 'ode' or 'isentrope'")
     temperatures = integrate.odeint(
         lambda t, p: dTdP(t, p, rock), T0, pressures)
     return temperatures.ravel()
 
 
+def adiabats(pressures, T0s, rock, fraction_matrix=None,
+             temperature_step=None):
+    """
+    This calculates a family of adiabats on a shared list of pressures,
+    for a list of anchor temperatures and optionally for sets of molar
+    fractions of the phases of a composite rock. The adiabats are
+    integrated together as one system of equations with
+    scipy.integrate.odeint, so that the rock is evaluated for all adiabats
+    at once at each step. The temperature gradient of each adiabat is the
+    one of :func:`burnman.geotherm.dTdP`, written as
+
+    .. math::
+        dT/dP = T*\\frac{\\Sigma_i(X[i]*\\alpha[i]*V[i])}{\\Sigma_i(X[i]*C_{p}[i])},
+
+    where :math:`\\alpha` is the thermal expansivity and :math:`V` the
+    molar volume, so that the properties of the phases are evaluated once
+    for all sets of fractions. The phases are evaluated once for each
+    distinct temperature, or, if temperature_step is given, on a grid of
+    temperatures which is then linearly interpolated. With a grid, the
+    cost of a step no longer grows with the number of adiabats.
+
+    Parameters
+    ----------
+
+    pressures : list of floats
+        The list of pressures in :math:`[Pa]` at which to evaluate the geotherms.
+
+    T0s : list of floats
+        Anchor temperatures, corresponding to the temperatures of the first
+        pressure in the list. :math:`[K]`
+
+    rock : :class:`burnman.Material`
+        Material for which we compute the adiabats.
+
+    fraction_matrix : 2D array of floats (optional)
+        Molar fractions of the phases of the rock (a
+        :class:`burnman.Composite`), with shape (n_fraction_sets, n_phases).
+        The rows are paired with the anchor temperatures, and either may
+        have a single entry, which is then used for all adiabats. If not
+        given, the fractions of the rock are used.
+
+    temperature_step : float (optional)
+        If given, the spacing of the grid of temperatures on which the
+        phases are evaluated at each step. :math:`[K]`
+
+    Returns
+    -------
+
+    temperatures : 2D array of floats
+        temperatures[i][j] is the temperature of adiabat i at pressures[j]. :math:`[K]`
+    """
+    T0s = np.array(T0s, dtype=float, ndmin=1)
+    names = ['thermal_expansivity', 'heat_capacity_p']
+    if fraction_matrix is None:
+        fractions = np.ones((1, 1))
+    else:
+        if not isinstance(rock, Composite):
+            raise Exception('Fractions can only be given for a Composite')
+        fractions = np.array(fraction_matrix, dtype=float, ndmin=2)
+        if fractions.shape[1] != len(rock.phases):
+            raise Exception(
+                'The fraction matrix must have one column per phase')
+        fractions = fractions / np.sum(fractions, axis=1)[:, np.newaxis]
+    T0s, fractions = np.broadcast_arrays(T0s[:, np.newaxis], fractions)
+    T0s = T0s[:, 0]
+
+    def evaluate(pressure, T):
+        # alpha*V and C_p of the phases, with shape (len(T), n_phases)
+        P = pressure * np.ones_like(T)
+        if fraction_matrix is None:
+            values = rock.evaluate(['thermal_expansivity', 'molar_volume',
+                                    'heat_capacity_p'], P, T)
+            return ((values[0] * values[1])[:, np.newaxis],
+                    values[2][:, np.newaxis])
+        values = rock.evaluate_phases(names, P, T)
+        return (values['thermal_expansivity'] * values['molar_volume'],
+                values['heat_capacity_p'])
+
+    def gradient(T, pressure):
+        if temperature_step is None:
+            T_unique, indices = np.unique(T, return_inverse=True)
+            alpha_V, C_p = [a[indices] for a in evaluate(pressure, T_unique)]
+        else:
+            n_grid = max(2, int(np.ceil((np.max(T) - np.min(T)) /
+                                        temperature_step)) + 1)
+            grid = np.linspace(np.min(T), np.max(T), n_grid)
+            position = np.interp(T, grid, np.arange(n_grid, dtype=float))
+            indices = np.minimum(position.astype(int), n_grid - 2)
+            w = (position - indices)[:, np.newaxis]
+            alpha_V, C_p = [a[indices] + w * (a[indices + 1] - a[indices])
+                            for a in evaluate(pressure, grid)]
+        return T * np.sum(fractions * alpha_V, axis=1) / \
+            np.sum(fractions * C_p, axis=1)
+
+    # The adiabats are independent, so the Jacobian is diagonal
+    temperatures = integrate.odeint(gradient, T0s, pressures, ml=0, mu=0)
+    return temperatures.T
+
+
+def isentrope(pressures, T0, rock, tolerance=1.e-10):
+    """
+    This calculates a geotherm along which the molar entropy of a rock is
+    constant. Instead of integrating the adiabatic gradient, the temperature
+    at each pressure is found by solving
+
+    .. math::
+        S(P, T) = S(P_0, T_0)
+
+    with Newton's method in :math:`\\ln T` (since
+    :math:`\\partial S/\\partial \\ln T = C_p`), starting from an
+    extrapolation of the temperatures at the previous pressures. The
+    iterations are safeguarded by bisection, so that a jump in entropy
+    (the latent heat of a phase transition) is resolved exactly: the
+    temperature jumps across a transition at a given pressure, and
+    follows the phase boundary if the jump in entropy spans
+    :math:`S(P_0, T_0)`. Each iteration needs a single evaluation of the
+    entropy and heat capacity of the rock.
+
+    Parameters
+    ----------
+
+    pressures : list of floats
+        The list of pressures in :math:`[Pa]` at which to evaluate the geotherm.
+
+    T0 : float
+        An anchor temperature, corresponding to the temperature of the first
+        pressure in the list. :math:`[K]`
+
+    rock : :class:`burnman.Material`
+        Material for which we compute the isentrope.
+
+    tolerance : float
+        Relative tolerance on the temperatures.
+
+    Returns
+    -------
+
+    temperature: list of floats
+        The list of temperatures for each pressure. :math:`[K]`
+    """
+    return _isentrope(pressures, T0, rock, [], tolerance)[0]
+
+
+def adiabatic_profile(pressures, T0, rock, vars_list, tolerance=1.e-10):
+    """
+    Computes an isentrope (see :func:`burnman.geotherm.isentrope`) and the
+    properties of the rock along it in a single pass. The last state
+    evaluated by the solver at each pressure is the returned temperature,
+    so the properties are read from the state (and the properties cached
+    by the rock) of the final iteration, rather than by setting the state
+    again as a subsequent call to
+    :func:`~burnman.material.Material.evaluate` would.
+
+    Parameters
+    ----------
+
+    pressures : list of floats
+        The list of pressures in :math:`[Pa]` at which to evaluate the geotherm.
+
+    T0 : float
+        An anchor temperature, corresponding to the temperature of the first
+        pressure in the list. :math:`[K]`
+
+    rock : :class:`burnman.Material`
+        Material for which we compute the isentrope.
+
+    vars_list : list of strings
+        Variables to be returned along the isentrope, e.g. ['v_s', 'density'].
+
+    tolerance : float
+        Relative tolerance on the temperatures.
+
+    Returns
+    -------
+
+    temperature : list of floats
+        The list of temperatures for each pressure. :math:`[K]`
+
+    output : 2D array of floats
+        output[i][j] is property vars_list[i] at pressures[j] and
+        temperature[j], as returned by
+        :func:`~burnman.material.Material.evaluate`.
+    """
+    return _isentrope(pressures, T0, rock, vars_list, tolerance)
+
+
+def _isentrope(pressures, T0, rock, vars_list, tolerance):
+    # The pressures are solved one after the other rather than all at once:
+    # Material.evaluate sets the state at every point in turn anyway, so a
+    # simultaneous Newton iteration would not save any work, while starting
+    # each point from an extrapolation of the previous solutions saves
+    # iterations (about two evaluations per pressure, against three or four
+    # when starting all the pressures from T0)
+    output = np.empty((len(vars_list), len(pressures)))
+    rock.set_state(pressures[0], T0)
+    entropy = rock.molar_entropy
+
+    log_temperatures = np.empty(len(pressures))
+    log_temperatures[0] = np.log(T0)
+    for i in range(len(pressures)):
+        if i > 0:
+            guess = log_temperatures[i - 1]
+            if i > 1 and pressures[i - 1] != pressures[i - 2]:
+                guess += (log_temperatures[i - 1] - log_temperatures[i - 2]) * \
+                    (pressures[i] - pressures[i - 1]) / \
+                    (pressures[i - 1] - pressures[i - 2])
+            log_temperatures[i] = _solve_entropy(
+                rock, pressures[i], entropy, guess, tolerance)
+        for j, var in enumerate(vars_list):
+            output[j, i] = getattr(rock, var)
+    return np.exp(log_temperatures), output
+
+
+def _solve_entropy(rock, pressure, entropy, log_temperature, tolerance):
+    # Newton's method for S(P, exp(x)) = entropy, keeping a bracket of x
+    # and bisecting when a step leaves it. The solution is the last x at
+    # which the rock was evaluated, so that the rock is left in that state
+    lower = -np.inf
+    upper = np.inf
+    for i in range(100):
+        rock.set_state(pressure, np.exp(log_temperature))
+        excess = rock.molar_entropy - entropy
+        if excess > 0.:
+            upper = log_temperature
+        else:
+            lower = log_temperature
+        step = -excess / rock.heat_capacity_p
+        if abs(step) < tolerance or upper - lower < tolerance:
+            return log_temperature
+        log_temperature += step
+        if not lower < log_temperature < upper:
+            log_temperature = 0.5 * (lower + upper)
+    raise Exception('The temperature along the isentrope did not converge at ' +
+                    str(pressure) + ' Pa')
+
+
 def dTdP(temperature, pressure, rock):
     """
     ODE to integrate temperature with depth for a composite material
@@ -135,6 +388,10 @@ def dTdP(temperature, pressure, rock):
     rock.set_state(pressure, temperature)
     (minerals, fractions) = rock.unroll()
     for (mineral, fraction) in zip(minerals, fractions):
+        # Absent minerals (e.g. the inactive spin state of a
+        # HelperSpinTransition) do not contribute, and are not evaluated
+        if fraction == 0.:
+            continue
         gr = mineral.grueneisen_parameter
         K_s = mineral.adiabatic_bulk_modulus
         C_p = mineral.heat_capacity_p
@@ -145,10 +402,30 @@ def dTdP(temperature, pressure, rock):
     return temperature * top / bottom
 
 
-table_brown = tools.read_table("input_geotherm/brown_81.txt")
-table_brown_depth = np.array(table_brown)[:, 0]
-table_brown_temperature = np.array(table_brown)[:, 1]
+# The tables of the geotherms are read on first use. They remain available
+# as module attributes (table_brown, table_brown_depth, ...), which are
+# also only loaded when first accessed.
+_geotherm_tables = {'table_brown': "input_geotherm/brown_81.txt",
+                    'table_anderson': "input_geotherm/anderson_82.txt"}
+
+
+def _geotherm_table(name):
+    return tools._load_table(_geotherm_tables[name])
+
+
+def __getattr__(name):
+    for table_name in _geotherm_tables:
+        if name == table_name:
+            return np.array(_geotherm_table(table_name))
+        if name == table_name + '_depth':
+            return np.array(_geotherm_table(table_name)[:, 0])
+        if name == table_name + '_temperature':
+            return np.array(_geotherm_table(table_name)[:, 1])
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
-table_anderson = tools.read_table("input_geotherm/anderson_82.txt")
-table_anderson_depth = np.array(table_anderson)[:, 0]
-table_anderson_temperature = np.array(table_anderson)[:, 1]
+if sys.version_info < (3, 7):
+    for _name in _geotherm_tables:
+        globals()[_name] = __getattr__(_name)
+        globals()[_name + '_depth'] = __getattr__(_name + '_depth')
+        globals()[_name + '_temperature'] = __getattr__(_name + '_temperature')
@@ -0,0 +1,350 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import numpy as np
+import warnings
+from scipy.optimize import minimize, nnls
+
+from .processchemistry import compositional_array
+from .solidsolution import SolidSolution
+from . import constants
+
+# This module finds the stable phase amounts and compositions of an
+# assemblage by minimizing its Gibbs free energy subject to the
+# constraint of a fixed bulk composition.
+#
+# The independent variables are the molar amounts of every endmember
+# of every candidate phase (a pure mineral has a single "endmember",
+# itself). With n the vector of endmember amounts and mu the vector of
+# endmember chemical potentials, the Gibbs free energy of the assemblage
+# is G = n . mu, and its gradient with respect to n is simply mu.
+# The chemical potentials of endmembers in solid solutions are
+# provided analytically by the solution models, so the minimizer never
+# has to resort to finite differences.
+
+
+class GibbsMinimizer(object):
+
+    """
+    Class which computes the equilibrium state of an assemblage of
+    candidate phases with a fixed bulk composition.
+
+    Given a bulk composition, a list of candidate phases
+    (:class:`burnman.Mineral` or :class:`burnman.SolidSolution`)
+    and a pressure and temperature, :func:`equilibrate` returns the amount
+    of each phase and the composition of each solid solution which
+    minimize the Gibbs free energy of the assemblage.
+
+    The minimization is local (sequential least squares programming with
+    analytic gradients). Each call to :func:`equilibrate` starts from the
+    solution of the previous call unless told otherwise, so that a
+    sequence of neighbouring pressures and temperatures (for example
+    along a geotherm) only needs a few iterations per point.
+
+    Parameters
+    ----------
+    composition : dictionary
+        Bulk composition given as a dictionary of elements and
+        their molar amounts, e.g. as returned by
+        :func:`burnman.processchemistry.dictionarize_formula`.
+    phases : list of :class:`burnman.Mineral`
+        Candidate phases. Solid solutions must provide a solution model
+        and all endmembers must have a 'formula' in their params.
+
+    Attributes
+    ----------
+    phase_amounts : numpy array of floats
+        Molar amounts of each phase after the last call to :func:`equilibrate`.
+    compositions : list
+        Molar fractions of the endmembers for each solid solution,
+        None for pure phases.
+    endmember_amounts : numpy array of floats
+        Molar amounts of all the endmembers of all the phases.
+    n_iterations : int
+        Number of iterations taken by the last minimization.
+    """
+
+    def __init__(self, composition, phases, tolerance=1.e-12):
+        self.phases = phases
+        self.tolerance = tolerance
+
+        # Split the phases into endmember variables
+        self._slices = []
+        formulae = []
+        n = 0
+        for phase in phases:
+            if isinstance(phase, SolidSolution):
+                formulae.extend([e[0].params['formula']
+                                 for e in phase.endmembers])
+                self._slices.append(slice(n, n + phase.n_endmembers))
+                n += phase.n_endmembers
+            else:
+                if 'formula' not in phase.params:
+                    raise Exception(
+                        'Phase ' + phase.to_string() + ' has no formula in its params')
+                formulae.append(phase.params['formula'])
+                self._slices.append(slice(n, n + 1))
+                n += 1
+        self.n_endmembers = n
+
+        self.endmember_compositions, self.elements = compositional_array(
+            formulae)
+        self.endmember_amounts = None
+        self.phase_amounts = None
+        self.compositions = [None for phase in phases]
+        self.n_iterations = 0
+        self.set_composition(composition)
+
+    def set_composition(self, composition):
+        """
+        Change the bulk composition. This discards any previous solution,
+        so the next call to :func:`equilibrate` starts afresh.
+
+        Parameters
+        ----------
+        composition : dictionary
+            Bulk composition as a dictionary of elements and molar amounts.
+        """
+        for element in composition:
+            if element not in self.elements and composition[element] > 0.:
+                raise Exception(
+                    'Element ' + element + ' is not present in any of the candidate phases')
+
+        bulk = np.array([float(composition.get(element, 0.))
+                         for element in self.elements])
+
+        # Reduce the element balance to a set of linearly independent
+        # constraints (e.g. oxygen is usually redundant)
+        A = self.endmember_compositions.T
+        U, s, V = np.linalg.svd(A, full_matrices=False)
+        rank = np.sum(s > s[0] * 1.e-10)
+        residual = bulk - U[:, :rank].dot(U[:, :rank].T.dot(bulk))
+        if np.linalg.norm(residual) > 1.e-10 * np.linalg.norm(bulk):
+            raise Exception(
+                'The bulk composition cannot be made from the candidate phases')
+        self._constraint_matrix = U[:, :rank].T.dot(A)
+        self._constraint_vector = U[:, :rank].T.dot(bulk)
+
+        # A feasible starting guess, nudged into the interior so that
+        # every solid solution starts with a well defined composition
+        guess = nnls(A, bulk)[0]
+        self._initial_guess = guess + 1.e-3 * np.sum(guess) / self.n_endmembers
+        self._scale = np.sum(guess)
+
+        self.endmember_amounts = None
+        self.phase_amounts = None
+
+    def _endmember_gibbs(self, pressure, temperature):
+        gibbs = np.empty(self.n_endmembers)
+        for phase, s in zip(self.phases, self._slices):
+            if isinstance(phase, SolidSolution):
+                for i, e in enumerate(phase.endmembers):
+                    e[0].set_state(pressure, temperature)
+                    gibbs[s.start + i] = e[0].gibbs
+            else:
+                phase.set_state(pressure, temperature)
+                gibbs[s.start] = phase.gibbs
+        return gibbs
+
+    def _chemical_potentials(self, amounts, pressure, temperature, gibbs):
+        mu = np.copy(gibbs)
+        for i, (phase, s) in enumerate(zip(self.phases, self._slices)):
+            if isinstance(phase, SolidSolution):
+                n = amounts[s]
+                total = np.sum(n)
+                # the composition of a vanishing phase is ill-defined
+                if total > 1.e-10 * self._scale:
+                    x = n / total
+                elif self.compositions[i] is not None:
+                    x = self.compositions[i]
+                else:
+                    x = np.ones(phase.n_endmembers) / phase.n_endmembers
+                mu[s] += phase.solution_model.excess_partial_gibbs_free_energies(
+                    pressure, temperature, x)
+        return mu
+
+    def equilibrate(self, pressure, temperature, initial_guess=None, warm_start=True):
+        """
+        Find the equilibrium phase amounts and compositions at the given
+        pressure and temperature. On return, the state of every phase
+        is set to the given pressure and temperature and the compositions
+        of the solid solutions are set to their equilibrium values.
+
+        Parameters
+        ----------
+        pressure : float
+            Pressure [Pa]
+        temperature : float
+            Temperature [K]
+        initial_guess : numpy array of floats (optional)
+            Starting molar amounts of all the endmembers.
+        warm_start : boolean
+            If True (default) and no initial_guess is given, start from the
+            solution of the previous call.
+
+        Returns
+        -------
+        phase_amounts : numpy array of floats
+            Molar amounts of each phase.
+        compositions : list
+            Molar fractions of the endmembers for each solid solution,
+            None for pure phases.
+        """
+        if initial_guess is not None:
+            x0 = np.array(initial_guess, dtype=float)
+        elif warm_start and self.endmember_amounts is not None:
+            x0 = self.endmember_amounts
+        else:
+            x0 = self._initial_guess
+
+        gibbs = self._endmember_gibbs(pressure, temperature)
+        RT = constants.gas_constant * temperature
+        scale = self._scale
+        threshold = 1.e-8 * scale
+
+        # Work with amounts relative to the total of the starting guess
+        # and energies relative to RT to keep the problem well scaled
+        def objective(y):
+            mu = self._chemical_potentials(
+                y * scale, pressure, temperature, gibbs)
+            return np.dot(y, mu) / RT, mu / RT
+
+        constraints = [{'type': 'eq',
+                        'fun': lambda y: self._constraint_matrix.dot(y * scale) - self._constraint_vector,
+                        'jac': lambda y: self._constraint_matrix * scale}]
+
+        self.n_iterations = 0
+        for attempt in range(len(self.phases) + 1):
+            sol = minimize(objective, x0 / scale, jac=True, method='SLSQP',
+                           bounds=[(0., None)] * self.n_endmembers,
+                           constraints=constraints,
+                           options={'ftol': self.tolerance, 'maxiter': 500})
+            if not sol.success:
+                raise Exception('Gibbs minimization failed: ' + sol.message)
+            self.n_iterations += sol.nit
+            amounts = np.maximum(sol.x, 0.) * scale
+
+            # A local minimizer cannot bring back a phase which has
+            # dropped out, so check the driving force of each absent phase
+            # against the tangent plane of the current assemblage, and if
+            # any phase would lower the Gibbs free energy, seed it and
+            # minimize again
+            mu = self._chemical_potentials(
+                amounts, pressure, temperature, gibbs)
+            active = amounts > threshold
+            element_potentials = np.linalg.lstsq(
+                self.endmember_compositions[active], mu[active], rcond=None)[0]
+            x0 = np.copy(amounts)
+            seeded = False
+            for i, s in enumerate(self._slices):
+                if np.sum(amounts[s]) < threshold:
+                    driving_force, x = self._driving_force(
+                        i, element_potentials, pressure, temperature, gibbs)
+                    if driving_force < -1.e-6 * RT:
+                        x0[s] = 1.e-3 * scale * x
+                        seeded = True
+            if not seeded:
+                break
+        else:
+            warnings.warn('Gibbs minimization: some phases are still unstable '
+                          'with respect to the assemblage after {0} attempts, '
+                          'the result is not an equilibrium.'.format(attempt + 1),
+                          stacklevel=2)
+
+        self._store_solution(amounts, pressure, temperature)
+        return self.phase_amounts, self.compositions
+
+    def _driving_force(self, i, element_potentials, pressure, temperature, gibbs):
+        """
+        Returns the minimum over composition of the distance between
+        the Gibbs free energy of phase i and the tangent plane defined
+        by the element potentials, and the composition at that minimum.
+        """
+        phase = self.phases[i]
+        s = self._slices[i]
+        reduced_gibbs = gibbs[s] - \
+            self.endmember_compositions[s].dot(element_potentials)
+        if not isinstance(phase, SolidSolution):
+            return reduced_gibbs[0], np.ones(1)
+
+        RT = constants.gas_constant * temperature
+
+        def distance(x):
+            mu = reduced_gibbs + phase.solution_model.excess_partial_gibbs_free_energies(
+                pressure, temperature, x)
+            return np.dot(x, mu) / RT, mu / RT
+
+        n = phase.n_endmembers
+        best = (np.inf, None)
+        for start in [np.ones(n) / n] + [0.9 * np.eye(n)[j] + 0.1 / n for j in range(n)]:
+            sol = minimize(distance, start, jac=True, method='SLSQP',
+                           bounds=[(0., 1.)] * n,
+                           constraints=[{'type': 'eq',
+                                         'fun': lambda x: np.sum(x) - 1.,
+                                         'jac': lambda x: np.ones(n)}])
+            if sol.fun < best[0]:
+                best = (sol.fun, np.maximum(sol.x, 1.e-10))
+        return best[0] * RT, best[1] / np.sum(best[1])
+
+    def equilibrate_along(self, pressures, temperatures):
+        """
+        Find the equilibrium assemblage at a sequence of pressures and
+        temperatures, warm starting each point from the previous one.
+
+        Parameters
+        ----------
+        pressures : list of floats
+            Pressures [Pa]
+        temperatures : list of floats
+            Temperatures [K]
+
+        Returns
+        -------
+        phase_amounts : 2D numpy array of floats
+            Molar amounts of each phase (second index) at each
+            pressure and temperature (first index).
+        compositions : list of lists
+            The compositions (as returned by :func:`equilibrate`) at each
+            pressure and temperature.
+        """
+        assert(len(pressures) == len(temperatures))
+        phase_amounts = np.empty((len(pressures), len(self.phases)))
+        compositions = []
+        for i, (P, T) in enumerate(zip(pressures, temperatures)):
+            amounts, c = self.equilibrate(P, T)
+            phase_amounts[i] = amounts
+            compositions.append([None if x is None else np.copy(x) for x in c])
+        return phase_amounts, compositions
+
+    @property
+    def stable_phases(self):
+        """
+        Indices of the phases present in the last computed equilibrium
+        (an empty list if no equilibrium has been computed yet).
+        """
+        if self.phase_amounts is None:
+            return []
+        return [i for i, amount in enumerate(self.phase_amounts) if amount > 0.]
+
+    def _store_solution(self, amounts, pressure, temperature):
+        # Phases which have dropped out are removed entirely, but keep
+        # their last composition as a starting point for later calls
+        threshold = 1.e-8 * self._scale
+        for s in self._slices:
+            if np.sum(amounts[s]) < threshold:
+                amounts[s] = 0.
+        self.endmember_amounts = amounts
+        self.phase_amounts = np.array([np.sum(amounts[s])
+                                       for s in self._slices])
+        for i, (phase, s) in enumerate(zip(self.phases, self._slices)):
+            if isinstance(phase, SolidSolution):
+                if self.phase_amounts[i] > 0.:
+                    self.compositions[i] = amounts[s] / self.phase_amounts[i]
+                elif self.compositions[i] is None:
+                    self.compositions[i] = np.ones(
+                        phase.n_endmembers) / phase.n_endmembers
+                phase.set_composition(self.compositions[i])
+            phase.set_state(pressure, temperature)
@@ -9,6 +9,7 @@ import scipy.integrate as integrate
 from . import geotherm
 from . import seismic
 from . import averaging_schemes
+from . import misfit
 
 
 def velocities_from_rock(rock, pressures, temperatures, averaging_scheme=averaging_schemes.VoigtReussHill()):
@@ -151,12 +152,7 @@ def chi_factor(calc, obs):
     :returns: :math:`\\chi` factor
     :rtype: array of floats
 
+    See :func:`burnman.misfit.chi_factor` for ensembles of profiles.
     """
 
-    err = np.empty_like(calc)
-    for i in range(len(calc)):
-        err[i] = pow((calc[i] - obs[i]) / (0.01 * np.mean(obs)), 2.)
-
-    err_tot = np.sum(err) / len(err)
-
-    return err_tot
+    return misfit.chi_factor(calc, obs)
@@ -35,6 +35,29 @@ def material_property(func):
     return property(mat_obj(func).get, doc=func.__doc__)
 
 
+# Full names of the aliased properties of Material (see below), e.g. for
+# resolving the names of the variables given to the evaluate functions
+property_aliases = {'energy': 'internal_energy',
+                    'helmholtz': 'molar_helmholtz',
+                    'gibbs': 'molar_gibbs',
+                    'V': 'molar_volume',
+                    'rho': 'density',
+                    'S': 'molar_entropy',
+                    'H': 'molar_enthalpy',
+                    'K_T': 'isothermal_bulk_modulus',
+                    'K_S': 'adiabatic_bulk_modulus',
+                    'beta_T': 'isothermal_compressibility',
+                    'beta_S': 'adiabatic_compressibility',
+                    'G': 'shear_modulus',
+                    'v_p': 'p_wave_velocity',
+                    'v_phi': 'bulk_sound_velocity',
+                    'v_s': 'shear_wave_velocity',
+                    'gr': 'grueneisen_parameter',
+                    'alpha': 'thermal_expansivity',
+                    'C_v': 'heat_capacity_v',
+                    'C_p': 'heat_capacity_p'}
+
+
 class Material(object):
 
     """
@@ -205,6 +228,55 @@ class Material(object):
 
         return output
 
+    def evaluate_iter(self, vars_list, pressures, temperatures,
+                      block_size=10000, output=None):
+        """
+        Generator version of :func:`~burnman.material.Material.evaluate`,
+        which evaluates the material in blocks of points and yields the
+        results of each block as soon as it is computed. Only one block is
+        held in memory, unless the results are collected by the caller.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables to be returned for given conditions
+        pressures : array of float
+            Array of pressures in [Pa]. This may be a np.memmap, in which
+            case it is read one block at a time.
+        temperatures : array of float
+            Array of temperatures in [K].
+        block_size : int
+            Number of points in each block.
+        output : string or array of float (optional)
+            If given, the results are also written to this array of shape
+            (len(vars_list), len(pressures)), e.g. a np.memmap, or to a new
+            .npy file with this name. The file is flushed before each
+            block is yielded, so it can be read while the evaluation is
+            running.
+
+        Returns
+        -------
+        block : slice
+            Indices of the points of the block.
+        values : array of array of float
+            values[j][i] is property vars_list[j] at pressures[block][i]
+            and temperatures[block][i].
+        """
+        n_points = len(pressures)
+        if isinstance(output, str):
+            output = np.lib.format.open_memmap(
+                output, mode='w+', shape=(len(vars_list), n_points))
+
+        for start in range(0, n_points, block_size):
+            block = slice(start, min(start + block_size, n_points))
+            values = self.evaluate(vars_list, np.asarray(pressures[block]),
+                                   np.asarray(temperatures[block]))
+            if output is not None:
+                output[:, block] = values
+                if hasattr(output, 'flush'):
+                    output.flush()
+            yield block, values
+
     @property
     def pressure(self):
         """
@@ -115,13 +115,17 @@ class Mineral(Material):
     @copy_documentation(Material.set_state)
     def set_state(self, pressure, temperature):
         Material.set_state(self, pressure, temperature)
-        self._property_modifiers = eos.property_modifiers.calculate_property_modifications(
-            self)
 
         if self.method is None:
             raise AttributeError(
                 "no method set for mineral, or equation_of_state given in mineral.params")
 
+    @material_property
+    def _property_modifiers(self):
+        # Computed on first use, like all the other properties, so that
+        # setting the state of a mineral which is not queried is cheap
+        return eos.property_modifiers.calculate_property_modifications(self)
+
     """
     Properties from equations of state
     We choose the P, T properties (e.g. Gibbs(P, T) rather than Helmholtz(V, T)),
@@ -18,11 +18,27 @@ from .mineral import Mineral
 from .composite import Composite
 
 
+def _active_material_property(name):
+    """
+    Returns a property which forwards to the currently active
+    material of a HelperSpinTransition.
+    """
+    def get(self):
+        return getattr(self._active_material(), name)
+    return property(get, doc=getattr(Composite, name).__doc__)
+
+
 class HelperSpinTransition(Composite):
 
     """
     Helper class that makes a mineral that switches between two materials
     (for low and high spin) based on some transition pressure [Pa]
+
+    Only the material which is stable at the current pressure is
+    evaluated. Both materials are part of the unrolled list of minerals
+    (the other one with a zero fraction) and are set to the current
+    state, but the properties of the other one are only computed if
+    they are queried.
     """
 
     def __init__(self, transition_pressure, ls_mat, hs_mat):
@@ -36,6 +52,7 @@ class HelperSpinTransition(Composite):
         self.transition_pressure = transition_pressure
         self.ls_mat = ls_mat
         self.hs_mat = hs_mat
+        self._active = None
         Composite.__init__(self, [ls_mat, hs_mat])
 
     def debug_print(self, indent=""):
@@ -44,9 +61,73 @@ class HelperSpinTransition(Composite):
         self.hs_mat.debug_print(indent + "  ")
 
     def set_state(self, pressure, temperature):
+        # The fractions are known to be valid, so they are assigned
+        # directly rather than through set_fractions
         if (pressure >= self.transition_pressure):
-            Composite.set_fractions(self, [1.0, 0.0])
+            self.molar_fractions = [1.0, 0.0]
+            self._active = self.ls_mat
+        else:
+            self.molar_fractions = [0.0, 1.0]
+            self._active = self.hs_mat
+
+        Material.set_state(self, pressure, temperature)
+        # Both materials are set to the current state, so that the
+        # unrolled minerals are consistent, but the properties of a
+        # mineral are only computed when they are first queried
+        self.ls_mat.set_state(pressure, temperature)
+        self.hs_mat.set_state(pressure, temperature)
+
+    def _active_material(self):
+        if self._active is None:
+            raise Exception(
+                "HelperSpinTransition: set_state() needs to be called first.")
+        return self._active
+
+    def evaluate(self, vars_list, pressures, temperatures):
+        """
+        Returns an array of material properties at given pressure and
+        temperature conditions (see
+        :func:`burnman.material.Material.evaluate`).
+
+        The pressures are split at the transition pressure, and each
+        of the two materials is only evaluated at its own pressures.
+        """
+        pressures = np.asarray(pressures)
+        temperatures = np.asarray(temperatures)
+        old_pressure = self.pressure
+        old_temperature = self.temperature
+
+        output = np.empty((len(vars_list), len(pressures)))
+        ls = pressures >= self.transition_pressure
+        hs = np.logical_not(ls)
+        output[:, ls] = self.ls_mat.evaluate(
+            vars_list, pressures[ls], temperatures[ls])
+        output[:, hs] = self.hs_mat.evaluate(
+            vars_list, pressures[hs], temperatures[hs])
+
+        if old_pressure is None or old_temperature is None:
+            self.reset()
         else:
-            Composite.set_fractions(self, [0.0, 1.0])
+            self.set_state(old_pressure, old_temperature)
+        return output
 
-        Composite.set_state(self, pressure, temperature)
+    internal_energy = _active_material_property('internal_energy')
+    molar_gibbs = _active_material_property('molar_gibbs')
+    molar_helmholtz = _active_material_property('molar_helmholtz')
+    molar_volume = _active_material_property('molar_volume')
+    molar_mass = _active_material_property('molar_mass')
+    density = _active_material_property('density')
+    molar_entropy = _active_material_property('molar_entropy')
+    molar_enthalpy = _active_material_property('molar_enthalpy')
+    isothermal_bulk_modulus = _active_material_property('isothermal_bulk_modulus')
+    adiabatic_bulk_modulus = _active_material_property('adiabatic_bulk_modulus')
+    isothermal_compressibility = _active_material_property('isothermal_compressibility')
+    adiabatic_compressibility = _active_material_property('adiabatic_compressibility')
+    shear_modulus = _active_material_property('shear_modulus')
+    p_wave_velocity = _active_material_property('p_wave_velocity')
+    bulk_sound_velocity = _active_material_property('bulk_sound_velocity')
+    shear_wave_velocity = _active_material_property('shear_wave_velocity')
+    grueneisen_parameter = _active_material_property('grueneisen_parameter')
+    thermal_expansivity = _active_material_property('thermal_expansivity')
+    heat_capacity_v = _active_material_property('heat_capacity_v')
+    heat_capacity_p = _active_material_property('heat_capacity_p')
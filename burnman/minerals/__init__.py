@@ -19,22 +19,31 @@ Mineral database
 """
 from __future__ import absolute_import
 
-# Stixrude and Lithgow-Bertelloni
-from . import SLB_2011
-from . import SLB_2011_ZSB_2013
-from . import SLB_2005
+from importlib import import_module as _import_module
+from sys import version_info as _version_info
 
-# Murakami and coworkers
-from . import Murakami_etal_2012
-from . import Murakami_2013
+# The databases are only imported when they are first accessed
+# (e.g. burnman.minerals.SLB_2011), so that "import burnman" does not
+# need to load all of them. Python versions before 3.7 do not support
+# module level __getattr__, and import all databases up front.
+__all__ = ['SLB_2011', 'SLB_2011_ZSB_2013', 'SLB_2005',
+           'Murakami_etal_2012', 'Murakami_2013',
+           'Matas_etal_2007',
+           'HP_2011_ds62', 'HP_2011_fluids', 'HHPH_2013',
+           'other']
 
-# Matas and coworkers
-from . import Matas_etal_2007
 
-# Holland, Powell and coworkers
-from . import HP_2011_ds62
-from . import HP_2011_fluids
-from . import HHPH_2013
+def __getattr__(name):
+    if name in __all__:
+        return _import_module('.' + name, __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
 
-# Other
-from . import other
+
+def __dir__():
+    return sorted(set([name for name in globals() if not name.startswith('_')
+                       or name.startswith('__')] + __all__))
+
+
+if _version_info < (3, 7):
+    for _database in __all__:
+        _import_module('.' + _database, __name__)
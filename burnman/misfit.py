@@ -0,0 +1,110 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import numpy as np
+import scipy.integrate as integrate
+
+# Misfits between calculated and reference (e.g. seismic) profiles.
+# Every function accepts a whole ensemble of calculated profiles as an
+# array of shape (n_models, n_points), or a single profile, and returns
+# one misfit per model. The reference profile, the uncertainties and the
+# weights are broadcast against the calculated profiles, so they can
+# either be shared by all models (shape (n_points,)) or be given per
+# model.
+
+
+def _weighted_mean(values, weights):
+    # Mean over the points (last axis)
+    if weights is None:
+        return np.mean(values, axis=-1)
+    weights = np.broadcast_to(np.asarray(weights, dtype=float), values.shape)
+    return np.sum(weights * values, axis=-1) / np.sum(weights, axis=-1)
+
+
+def l2(depths, calc, obs, weights=None):
+    """
+    Computes the L2 norm of the difference between calculated and
+    reference profiles, integrated over depth (assumed to be linear
+    between points).
+
+    Parameters
+    ----------
+    depths : array of floats
+        Depths of the points :math:`[m]`.
+    calc : array of floats
+        Calculated values, with shape (n_models, n_points) or (n_points,).
+    obs : array of floats
+        Reference values to compare to.
+    weights : array of floats (optional)
+        Weights of the points, e.g. to emphasize some depth ranges.
+
+    Returns
+    -------
+    misfits : array of floats
+        The L2 norm for each model.
+    """
+    diff = np.asarray(calc, dtype=float) - np.asarray(obs, dtype=float)
+    diff = diff * diff
+    if weights is not None:
+        diff = diff * weights
+    return integrate.trapz(diff, depths, axis=-1)
+
+
+def chi_factor(calc, obs, uncertainties=None, weights=None):
+    """
+    Computes the :math:`\\chi` factor, the weighted mean of the squared
+    differences between calculated and reference profiles normalized by
+    their uncertainties.
+
+    Parameters
+    ----------
+    calc : array of floats
+        Calculated values, with shape (n_models, n_points) or (n_points,).
+    obs : array of floats
+        Reference values to compare to.
+    uncertainties : array of floats (optional)
+        Uncertainties of the reference values. By default 1% of the mean
+        of the reference profile.
+    weights : array of floats (optional)
+        Weights of the points, e.g. to emphasize some depth ranges.
+
+    Returns
+    -------
+    misfits : array of floats
+        The :math:`\\chi` factor for each model.
+    """
+    obs = np.asarray(obs, dtype=float)
+    if uncertainties is None:
+        uncertainties = 0.01 * np.mean(obs, axis=-1)[..., np.newaxis]
+    err = np.power((np.asarray(calc, dtype=float) - obs) /
+                   uncertainties, 2.)
+    return _weighted_mean(err, weights)
+
+
+def nrmse(calc, obs, weights=None):
+    """
+    Computes the root mean square difference between calculated and
+    reference profiles, normalized by the range of each calculated
+    profile.
+
+    Parameters
+    ----------
+    calc : array of floats
+        Calculated values, with shape (n_models, n_points) or (n_points,).
+    obs : array of floats
+        Reference values to compare to.
+    weights : array of floats (optional)
+        Weights of the points, e.g. to emphasize some depth ranges.
+
+    Returns
+    -------
+    misfits : array of floats
+        The normalized RMS error for each model.
+    """
+    calc = np.asarray(calc, dtype=float)
+    diff = calc - np.asarray(obs, dtype=float)
+    rmse = np.sqrt(_weighted_mean(diff * diff, weights))
+    return rmse / (np.max(calc, axis=-1) - np.min(calc, axis=-1))
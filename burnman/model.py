@@ -6,9 +6,28 @@
 from __future__ import absolute_import
 import numpy as np
 from .material import Material
+from .mineral import Mineral
+from .composite import Composite
 from .averaging_schemes import AveragingScheme
 
 
+# Properties of the unrolled minerals stored by Model.calc_moduli_
+_moduli_names = ['fraction', 'V', 'K', 'G', 'rho', 'alpha', 'c_v', 'c_p']
+_moduli_index = dict((name, i) for i, name in enumerate(_moduli_names))
+
+
+def _fixed_fractions(material):
+    """
+    Checks whether the unrolled fractions of a material are independent
+    of its state, i.e. whether it only consists of plain composites and
+    minerals.
+    """
+    if isinstance(material, Composite):
+        return (type(material).set_state is Composite.set_state and
+                all(_fixed_fractions(phase) for phase in material.phases))
+    return isinstance(material, Mineral) and type(material).unroll is Mineral.unroll
+
+
 class Model(object):
 
     """
@@ -75,13 +94,8 @@ class Model(object):
     def thermal_expansivity(self):
         if self.alpha is None:
             self.calc_moduli_()
-            n_pressures = len(self.p)
-            self.alpha = np.zeros(n_pressures)
-            for idx in range(n_pressures):
-                V = np.array([m['V'] for m in self.moduli[idx]])
-                alpha = np.array([m['alpha'] for m in self.moduli[idx]])
-                self.alpha[
-                    idx] = self.avgscheme.average_thermal_expansivity(V, alpha)
+            self.alpha = self.avgscheme.average_thermal_expansivity(
+                self.moduli_('V'), self.moduli_('alpha'))
 
         return self.alpha
 
@@ -93,27 +107,63 @@ class Model(object):
         self.calc_heat_capacities_()
         return self.c_v
 
+    def moduli_(self, name):
+        """
+        Internal function returning one of the properties of the unrolled
+        minerals ('fraction', 'V', 'K', 'G', 'rho', 'alpha', 'c_v' or 'c_p')
+        as an array of shape (n_points, n_minerals).
+        """
+        return self.moduli[_moduli_index[name]]
+
     def calc_moduli_(self):
         """
         Internal function to compute the moduli if necessary.
+
+        The properties of the minerals are stored in a single array
+        of shape (n_properties, n_points, n_minerals). Each unrolled mineral
+        is evaluated over the whole profile at once, at the points where
+        it is present. At the other points it takes the properties of a
+        present mineral with a zero fraction, which does not change any of
+        the averages.
         """
         if self.moduli is None:
-                self.moduli = [[] for p in self.p]
-
-                for idx in range(len(self.p)):
+            n_points = len(self.p)
+            self.rock.set_state(self.p[0], self.T[0])
+            (minerals, fractions) = self.rock.unroll()
+            fractions = np.tile(np.array(fractions, dtype=float), (n_points, 1))
+            if not _fixed_fractions(self.rock):
+                for idx in range(1, n_points):
                     self.rock.set_state(self.p[idx], self.T[idx])
-                    (minerals, fractions) = self.rock.unroll()
-                    for (mineral, fraction) in zip(minerals, fractions):
-                        e = {}
-                        e['fraction'] = fraction
-                        e['V'] = fraction * mineral.molar_volume
-                        e['K'] = mineral.adiabatic_bulk_modulus
-                        e['G'] = mineral.shear_modulus
-                        e['rho'] = mineral.molar_mass / mineral.molar_volume
-                        e['alpha'] = mineral.thermal_expansivity
-                        e['c_v'] = mineral.heat_capacity_v
-                        e['c_p'] = mineral.heat_capacity_p
-                        self.moduli[idx].append(e)
+                    row = self.rock.unroll()[1]
+                    if len(row) != len(minerals):
+                        raise Exception(
+                            "The number of unrolled minerals of the rock must not change along the profile")
+                    fractions[idx] = row
+
+            self.moduli = np.empty((len(_moduli_names), n_points, len(minerals)))
+            present = fractions > 0.
+            p = np.asarray(self.p)
+            T = np.asarray(self.T)
+            for (i, mineral) in enumerate(minerals):
+                if not np.any(present[:, i]):
+                    continue
+                V, molar_mass, K, G, alpha, c_v, c_p = mineral.evaluate(
+                    ['molar_volume', 'molar_mass', 'adiabatic_bulk_modulus',
+                     'shear_modulus', 'thermal_expansivity', 'heat_capacity_v',
+                     'heat_capacity_p'], p[present[:, i]], T[present[:, i]])
+                for (name, values) in [('V', V), ('K', K), ('G', G),
+                                       ('rho', molar_mass / V),
+                                       ('alpha', alpha), ('c_v', c_v),
+                                       ('c_p', c_p)]:
+                    self.moduli[_moduli_index[name], present[:, i], i] = values
+
+            absent_points, absent_minerals = np.nonzero(np.logical_not(present))
+            first = np.argmax(present, axis=1)[absent_points]
+            self.moduli[:, absent_points, absent_minerals] = \
+                self.moduli[:, absent_points, first]
+            self.moduli[_moduli_index['fraction']] = fractions
+            # Volumes of the minerals weighted by their fractions
+            self.moduli[_moduli_index['V']] *= fractions
 
     def avg_moduli_(self):
         """
@@ -121,28 +171,15 @@ class Model(object):
         """
         if self.mat_V is None:
             self.calc_moduli_()
-            n_pressures = len(self.p)
-            self.mat_V = np.zeros(len(self.p))
-            self.mat_K = np.zeros(len(self.p))
-            self.mat_G = np.zeros(len(self.p))
-            self.mat_rho = np.zeros(len(self.p))
-
-            for idx in range(n_pressures):
-                mods = self.moduli[idx]
-
-                fractions = np.array([e['fraction'] for e in mods])
-                V_frac = np.array([m['V'] for m in mods])
-                K_ph = np.array([m['K'] for m in mods])
-                G_ph = np.array([m['G'] for m in mods])
-                rho_ph = np.array([m['rho'] for m in mods])
-
-                self.mat_V[idx] = sum(V_frac)
-                self.mat_K[idx] = self.avgscheme.average_bulk_moduli(
-                    V_frac, K_ph, G_ph)
-                self.mat_G[idx] = self.avgscheme.average_shear_moduli(
-                    V_frac, K_ph, G_ph)
-                self.mat_rho[idx] = self.avgscheme.average_density(
-                    V_frac, rho_ph)
+            V_frac = self.moduli_('V')
+            K_ph = self.moduli_('K')
+            G_ph = self.moduli_('G')
+
+            self.mat_V = np.sum(V_frac, axis=1)
+            self.mat_K = self.avgscheme.average_bulk_moduli(V_frac, K_ph, G_ph)
+            self.mat_G = self.avgscheme.average_shear_moduli(V_frac, K_ph, G_ph)
+            self.mat_rho = self.avgscheme.average_density(
+                V_frac, self.moduli_('rho'))
 
     def calc_heat_capacities_(self):
         """
@@ -150,17 +187,11 @@ class Model(object):
         """
         if self.c_p is None:
             self.calc_moduli_()
-            self.c_v = np.zeros(len(self.p))
-            self.c_p = np.zeros(len(self.p))
-            for idx in range(len(self.p)):
-                fractions = np.array([m['fraction'] for m in self.moduli[idx]])
-                alphas = np.array([m['alpha'] for m in self.moduli[idx]])
-                c_v = np.array([m['c_v'] for m in self.moduli[idx]])
-                c_p = np.array([m['c_p'] for m in self.moduli[idx]])
-                self.c_v[idx] = self.avgscheme.average_heat_capacity_v(
-                    fractions, c_v)
-                self.c_p[idx] = self.avgscheme.average_heat_capacity_p(
-                    fractions, c_p)
+            fractions = self.moduli_('fraction')
+            self.c_v = self.avgscheme.average_heat_capacity_v(
+                fractions, self.moduli_('c_v'))
+            self.c_p = self.avgscheme.average_heat_capacity_p(
+                fractions, self.moduli_('c_p'))
 
     def compute_velocities_(self):
         """
@@ -168,12 +199,7 @@ class Model(object):
         """
         if self.mat_vp is None:
             self.avg_moduli_()
-            self.mat_vs = np.ndarray(len(self.p))
-            self.mat_vp = np.ndarray(len(self.p))
-            self.mat_vphi = np.ndarray(len(self.p))
-
-            for i in range(len(self.p)):
-                self.mat_vs[i] = np.sqrt(self.mat_G[i] / self.mat_rho[i])
-                self.mat_vp[i] = np.sqrt(
-                    (self.mat_K[i] + 4. / 3. * self.mat_G[i]) / self.mat_rho[i])
-                self.mat_vphi[i] = np.sqrt(self.mat_K[i] / self.mat_rho[i])
+            self.mat_vs = np.sqrt(self.mat_G / self.mat_rho)
+            self.mat_vp = np.sqrt(
+                (self.mat_K + 4. / 3. * self.mat_G) / self.mat_rho)
+            self.mat_vphi = np.sqrt(self.mat_K / self.mat_rho)
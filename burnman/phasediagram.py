@@ -0,0 +1,212 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import multiprocessing
+import numpy as np
+
+from .gibbsminimization import GibbsMinimizer
+
+# This module computes pseudosections (maps of the stable assemblage of a
+# fixed bulk composition in P-T space) with the help of
+# :class:`burnman.gibbsminimization.GibbsMinimizer`.
+#
+# The P-T window is first covered by a coarse grid. Only the coarse
+# cells whose corners do not all share the same assemblage are refined,
+# by repeatedly splitting them into four (a quadtree) until the
+# requested resolution is reached. The interiors of the fields are
+# therefore never sampled finely. Each coarse cell that needs refining
+# is an independent task, and these tasks can be distributed over a
+# pool of processes.
+#
+# Points are addressed by integer coordinates on the finest grid, so
+# that points shared between neighbouring cells are only evaluated once
+# within a task.
+
+
+def _assemblage(minimizer, pressure, temperature):
+    minimizer.equilibrate(pressure, temperature)
+    return tuple(minimizer.stable_phases)
+
+
+def _evaluate_points(minimizer, grid, points):
+    P_min, dP, T_min, dT = grid
+    return [_assemblage(minimizer, P_min + i * dP, T_min + j * dT)
+            for (i, j) in points]
+
+
+def _refine_cell(minimizer, grid, cell, labels, boundaries):
+    """
+    Recursively split a cell until all its corners share an assemblage
+    or it has reached the finest level. Fills the dictionary
+    labels {(i, j): assemblage} and the list of boundary edges.
+    """
+    i0, j0, size = cell
+    corners = [(i0, j0), (i0 + size, j0),
+               (i0 + size, j0 + size), (i0, j0 + size)]
+    corner_labels = [labels[c] for c in corners]
+    if all(l == corner_labels[0] for l in corner_labels):
+        return
+
+    if size == 1:
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            if labels[a] != labels[b]:
+                boundaries.append(tuple(sorted((a, b))))
+        return
+
+    half = size // 2
+    new_points = [(i0 + di, j0 + dj) for di in (0, half, size)
+                  for dj in (0, half, size) if (i0 + di, j0 + dj) not in labels]
+    for point, label in zip(new_points, _evaluate_points(minimizer, grid, new_points)):
+        labels[point] = label
+
+    for di in (0, half):
+        for dj in (0, half):
+            _refine_cell(minimizer, grid, (i0 + di, j0 + dj, half),
+                         labels, boundaries)
+
+
+def _refine_tile(minimizer, grid, tile, corner_labels):
+    i0, j0, size = tile
+    labels = dict(zip([(i0, j0), (i0 + size, j0), (i0 + size, j0 + size),
+                       (i0, j0 + size)], corner_labels))
+    boundaries = []
+    _refine_cell(minimizer, grid, tile, labels, boundaries)
+    return labels, boundaries
+
+
+# State of the worker processes. Each worker builds its own minimizer
+# once, and reuses it (including its warm start) for all of its tasks.
+_worker_minimizer = None
+
+
+def _initialize_worker(composition, phases):
+    global _worker_minimizer
+    _worker_minimizer = GibbsMinimizer(composition, phases)
+
+
+def _evaluate_points_worker(args):
+    return _evaluate_points(_worker_minimizer, *args)
+
+
+def _refine_tile_worker(args):
+    return _refine_tile(_worker_minimizer, *args)
+
+
+def pseudosection(composition, phases, pressure_range, temperature_range,
+                  n_coarse=(11, 11), resolution=(1.e8, 5.), processes=1):
+    """
+    Computes the stable assemblage of a bulk composition over a
+    pressure-temperature window, refining the sampling adaptively
+    around the boundaries between fields.
+
+    Parameters
+    ----------
+    composition : dictionary
+        Bulk composition as a dictionary of elements and molar amounts.
+    phases : list of :class:`burnman.Mineral`
+        Candidate phases (minerals and/or solid solutions).
+    pressure_range : list of two floats
+        Minimum and maximum pressure [Pa]
+    temperature_range : list of two floats
+        Minimum and maximum temperature [K]
+    n_coarse : list of two integers
+        Number of points of the initial grid in pressure and temperature.
+    resolution : list of two floats
+        Required resolution of the field boundaries in pressure [Pa]
+        and temperature [K].
+    processes : integer or None
+        Number of worker processes. If 1 (default), everything is computed
+        in the calling process. If None, the number of CPUs is used.
+
+    Returns
+    -------
+    points : 2D numpy array of floats
+        The pressures and temperatures of all the points at which the
+        assemblage was computed, with shape (n_points, 2).
+    labels : list of tuples
+        The stable assemblage at each point, given as a tuple of
+        indices into phases.
+    boundaries : dictionary
+        For each pair of neighbouring assemblages (a tuple of two labels),
+        a 2D numpy array with the pressures and temperatures of points
+        on the boundary between them, resolved to within the requested
+        resolution.
+    """
+    n_P, n_T = n_coarse
+    assert(n_P > 1 and n_T > 1)
+    dP_coarse = (pressure_range[1] - pressure_range[0]) / (n_P - 1.)
+    dT_coarse = (temperature_range[1] - temperature_range[0]) / (n_T - 1.)
+
+    # Number of times the coarse cells may be halved
+    n_levels = int(max(0., np.ceil(np.log2(dP_coarse / resolution[0])),
+                       np.ceil(np.log2(dT_coarse / resolution[1]))))
+    size = 2 ** n_levels
+    grid = (pressure_range[0], dP_coarse / size,
+            temperature_range[0], dT_coarse / size)
+
+    # Coarse grid, one row of constant temperature per task so that each
+    # row benefits from warm starts
+    rows = [[(i * size, j * size) for i in range(n_P)] for j in range(n_T)]
+
+    pool = None
+    if processes == 1:
+        minimizer = GibbsMinimizer(composition, phases)
+    else:
+        pool = multiprocessing.Pool(processes, _initialize_worker,
+                                    (composition, phases))
+    try:
+        if pool is None:
+            row_labels = [_evaluate_points(minimizer, grid, row)
+                          for row in rows]
+        else:
+            row_labels = pool.map(_evaluate_points_worker,
+                                  [(grid, row) for row in rows])
+
+        labels = {}
+        for row, row_label in zip(rows, row_labels):
+            labels.update(zip(row, row_label))
+
+        # Refine only those coarse cells which contain a boundary
+        tiles = []
+        for i in range(n_P - 1):
+            for j in range(n_T - 1):
+                i0, j0 = i * size, j * size
+                corners = [labels[(i0, j0)], labels[(i0 + size, j0)],
+                           labels[(i0 + size, j0 + size)], labels[(i0, j0 + size)]]
+                if not all(l == corners[0] for l in corners):
+                    tiles.append(((i0, j0, size), corners))
+
+        if pool is None:
+            results = [_refine_tile(minimizer, grid, tile, corners)
+                       for tile, corners in tiles]
+        else:
+            results = pool.map(_refine_tile_worker,
+                               [(grid, tile, corners) for tile, corners in tiles])
+    finally:
+        # Also stops the workers if anything above failed
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    boundary_edges = []
+    for tile_labels, tile_boundaries in results:
+        labels.update(tile_labels)
+        boundary_edges.extend(tile_boundaries)
+
+    P_min, dP, T_min, dT = grid
+    keys = sorted(labels.keys())
+    points = np.array([[P_min + i * dP, T_min + j * dT] for (i, j) in keys])
+
+    boundaries = {}
+    for a, b in set(boundary_edges):
+        pair = tuple(sorted([labels[a], labels[b]]))
+        midpoint = [P_min + 0.5 * (a[0] + b[0]) * dP,
+                    T_min + 0.5 * (a[1] + b[1]) * dT]
+        boundaries.setdefault(pair, []).append(midpoint)
+    for pair in boundaries:
+        boundaries[pair] = np.array(sorted(boundaries[pair]))
+
+    return points, [labels[k] for k in keys], boundaries
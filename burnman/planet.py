@@ -0,0 +1,320 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import numpy as np
+import scipy.integrate
+
+from . import constants
+
+# This module computes the radial structure of a spherically symmetric
+# planet made of layers of known materials and radii. The density
+# depends on pressure (and temperature), the pressure depends on gravity
+# and density through hydrostatic equilibrium, and gravity depends on
+# the density through Poisson's equation, so the pressure profile is the
+# fixed point of
+#
+#   pressures -> densities -> gravity -> new pressures.
+#
+# The map is applied to the whole radial grid at once, with a single
+# call to Material.evaluate per layer. The iteration is accelerated with
+# Anderson mixing: the next pressure profile is extrapolated from the
+# last few iterates, which saves evaluations of the materials compared
+# to plain (Picard) iteration.
+#
+# Each layer is sampled from its inner to its outer radius, so the
+# radius of every boundary between layers appears twice, once with the
+# properties of each layer, much like the discontinuities in
+# burnman.seismic.
+
+
+class Layer(object):
+
+    """
+    A spherical shell of a planet (or the central sphere) made of a
+    single material, for use in :class:`burnman.planet.Planet`.
+
+    Parameters
+    ----------
+    name : string
+        Name of the layer.
+    material : :class:`burnman.Material`
+        Material of the layer.
+    outer_radius : float
+        Outer radius of the layer [m]. The inner radius is the outer
+        radius of the layer below, or zero.
+    temperature : float or function
+        Either a constant temperature [K], or a function which returns
+        the temperatures [K] for an array of pressures [Pa]. The pressures
+        are given from the top of the layer downwards, so that e.g.
+        lambda p: burnman.geotherm.adiabatic(p, 1600., material) gives an
+        adiabat anchored at the top of the layer.
+    n_slices : int
+        Number of radial points in the layer, including both boundaries.
+    """
+
+    def __init__(self, name, material, outer_radius, temperature, n_slices=100):
+        self.name = name
+        self.material = material
+        self.outer_radius = outer_radius
+        self.temperature = temperature
+        self.n_slices = n_slices
+
+    def temperatures(self, pressures):
+        """
+        Returns the temperatures [K] of the layer at the given pressures [Pa],
+        which are ordered from the inner to the outer radius.
+        """
+        if callable(self.temperature):
+            return np.asarray(self.temperature(pressures[::-1]), dtype=float)[::-1]
+        return self.temperature * np.ones_like(pressures)
+
+
+class Planet(object):
+
+    """
+    Class which computes the self-consistent pressure, temperature,
+    density and gravity profiles of a planet made of layers
+    (:class:`burnman.planet.Layer`), together with its mass and moment of
+    inertia.
+
+    Call :func:`generate_profiles` after creating the planet or changing
+    its layers. Each call starts from the pressure profile of the previous
+    call unless told otherwise, so that a sequence of similar models only
+    needs a few iterations each.
+
+    Parameters
+    ----------
+    layers : list of :class:`burnman.planet.Layer`
+        The layers, from the center outwards.
+    tolerance : float
+        The iteration stops when the pressures change by less than
+        tolerance times the central pressure.
+    max_iterations : int
+        Maximum number of iterations.
+    n_history : int
+        Number of previous iterates used by the Anderson acceleration.
+        0 gives plain fixed point iteration, and 1 a vector version of
+        Aitken's delta-squared extrapolation.
+
+    Attributes
+    ----------
+    radii : numpy array of floats
+        Radii [m] of the points of the profiles, from the center outwards.
+        The radii of the boundaries between layers appear twice.
+    pressures, temperatures, densities, gravity : numpy arrays of floats
+        Pressure [Pa], temperature [K], density [kg/m^3] and gravity
+        [m/s^2] at the radii.
+    mass : float
+        Mass of the planet [kg].
+    moment_of_inertia : float
+        Moment of inertia of the planet [kg m^2].
+    moment_of_inertia_factor : float
+        Moment of inertia divided by mass and outer radius squared.
+    n_iterations : int
+        Number of iterations taken by the last call to :func:`generate_profiles`.
+    """
+
+    def __init__(self, layers, tolerance=1.e-8, max_iterations=100, n_history=4):
+        self.layers = layers
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.n_history = n_history
+        self.pressures = None
+        self.n_iterations = 0
+
+    @property
+    def outer_radius(self):
+        """
+        Outer radius of the planet [m].
+        """
+        return self.layers[-1].outer_radius
+
+    def generate_profiles(self, initial_pressures=None, warm_start=True):
+        """
+        Iterate to find the self-consistent profiles of the planet, and
+        compute its mass and moment of inertia.
+
+        Parameters
+        ----------
+        initial_pressures : numpy array of floats (optional)
+            Starting pressures [Pa] at the radii of the profiles.
+        warm_start : boolean
+            If True (default) and no initial_pressures are given, start from
+            the pressures of the previous call (if the number of points has
+            not changed).
+        """
+        outer_radii = [layer.outer_radius for layer in self.layers]
+        if initial_pressures is None and warm_start:
+            initial_pressures = self.pressures
+        solution = self._solve(outer_radii, initial_pressures)
+        for name in ['radii', 'pressures', 'temperatures', 'densities',
+                     'gravity', 'mass', 'moment_of_inertia',
+                     'n_iterations']:
+            setattr(self, name, solution[name])
+        self.moment_of_inertia_factor = self.moment_of_inertia / \
+            self.mass / self.outer_radius / self.outer_radius
+
+    def evaluate(self, vars_list):
+        """
+        Returns material properties of the layers along the profiles of
+        the planet. Call :func:`generate_profiles` first.
+
+        Parameters
+        ----------
+        vars_list : list of strings
+            Variables to be returned, e.g. ['v_s', 'v_phi'].
+
+        Returns
+        -------
+        output : 2D numpy array of floats
+            output[i][j] is property vars_list[i] at radii[j].
+        """
+        output = np.empty((len(vars_list), len(self.radii)))
+        for layer, s in zip(self.layers, self._layer_slices()):
+            output[:, s] = layer.material.evaluate(
+                vars_list, self.pressures[s], self.temperatures[s])
+        return output
+
+    def mass_radius_curve(self, outer_radii):
+        """
+        Computes the masses and moments of inertia of planets which have
+        the structure of this one, scaled to a list of outer radii (the
+        radii of all the layers are multiplied by the same factor). Each
+        model is warm started from the previous one, so the outer radii
+        should be sorted. The profiles stored in this planet are left
+        unchanged.
+
+        Parameters
+        ----------
+        outer_radii : list of floats
+            Outer radii of the planets [m].
+
+        Returns
+        -------
+        masses : numpy array of floats
+            Masses of the planets [kg].
+        moment_of_inertia_factors : numpy array of floats
+            Moments of inertia divided by mass and outer radius squared.
+        """
+        layer_radii = np.array([layer.outer_radius for layer in self.layers])
+        masses = np.empty(len(outer_radii))
+        factors = np.empty(len(outer_radii))
+
+        pressures = self.pressures
+        radius = self.outer_radius
+        for i, new_radius in enumerate(outer_radii):
+            # For a given density profile, pressure scales as radius squared
+            if pressures is not None:
+                pressures = pressures * (new_radius / radius) ** 2.
+            radius = new_radius
+            solution = self._solve(
+                layer_radii * radius / self.outer_radius, pressures)
+            pressures = solution['pressures']
+            masses[i] = solution['mass']
+            factors[i] = solution['moment_of_inertia'] / \
+                solution['mass'] / radius / radius
+        return masses, factors
+
+    def _layer_slices(self):
+        slices = []
+        n = 0
+        for layer in self.layers:
+            slices.append(slice(n, n + layer.n_slices))
+            n += layer.n_slices
+        return slices
+
+    def _solve(self, outer_radii, initial_pressures=None):
+        """
+        Finds the self-consistent profiles for the given outer radii of
+        the layers, and returns them in a dictionary.
+        """
+        slices = self._layer_slices()
+        inner_radii = [0.] + list(outer_radii[:-1])
+        radii = np.concatenate([np.linspace(inner, outer, layer.n_slices)
+                                for layer, inner, outer
+                                in zip(self.layers, inner_radii, outer_radii)])
+
+        def update(pressures):
+            temperatures = np.empty_like(pressures)
+            densities = np.empty_like(pressures)
+            for layer, s in zip(self.layers, slices):
+                temperatures[s] = layer.temperatures(pressures[s])
+                densities[s] = layer.material.evaluate(
+                    ['density'], pressures[s], temperatures[s])[0]
+            gravity = self._gravity(radii, densities)
+            return (self._pressures(radii, densities, gravity),
+                    temperatures, densities, gravity)
+
+        if initial_pressures is None or len(initial_pressures) != len(radii):
+            pressures = np.zeros(len(radii))
+        else:
+            pressures = np.array(initial_pressures, dtype=float)
+
+        # Anderson acceleration of the fixed point iteration. The
+        # iterates and residuals are scaled by the central pressure of
+        # the first update to keep the least squares problem well posed
+        xs = []
+        fs = []
+        for n_iterations in range(1, self.max_iterations + 1):
+            new_pressures, temperatures, densities, gravity = update(pressures)
+            if n_iterations == 1:
+                scale = new_pressures[0]
+            x = pressures / scale
+            f = (new_pressures - pressures) / scale
+            if np.max(np.abs(f)) < self.tolerance:
+                break
+
+            xs.append(x)
+            fs.append(f)
+            xs = xs[-(self.n_history + 1):]
+            fs = fs[-(self.n_history + 1):]
+            x_new = x + f
+            if len(fs) > 1:
+                dF = np.array(fs[1:]) - np.array(fs[:-1])
+                dX = np.array(xs[1:]) - np.array(xs[:-1])
+                gamma = np.linalg.lstsq(dF.T, f, rcond=None)[0]
+                x_new = x_new - (dX + dF).T.dot(gamma)
+            pressures = np.maximum(x_new, 0.) * scale
+        else:
+            raise Exception('The structure of the planet did not converge in ' +
+                            str(self.max_iterations) + ' iterations')
+
+        return {'radii': radii,
+                'pressures': new_pressures,
+                'temperatures': temperatures,
+                'densities': densities,
+                'gravity': gravity,
+                'mass': 4. * np.pi * self._radial_integral(radii, densities, 2)[-1],
+                'moment_of_inertia': 8. / 3. * np.pi * self._radial_integral(
+                    radii, densities, 4)[-1],
+                'n_iterations': n_iterations}
+
+    def _radial_integral(self, radii, densities, n):
+        # Cumulative integral of density * r^n from the center, exact for
+        # densities varying linearly between the radii. The trapezoidal
+        # rule would be much less accurate close to the center.
+        a = radii[:-1]
+        b = radii[1:]
+        width = b - a
+        slope = np.zeros_like(width)
+        slope[width > 0.] = np.diff(densities)[width > 0.] / width[width > 0.]
+        low = (np.power(b, n + 1) - np.power(a, n + 1)) / (n + 1.)
+        high = (np.power(b, n + 2) - np.power(a, n + 2)) / (n + 2.)
+        segments = densities[:-1] * low + slope * (high - a * low)
+        return np.concatenate(([0.], np.cumsum(segments)))
+
+    def _gravity(self, radii, densities):
+        # Integrate Poisson's equation for a spherically symmetric planet
+        masses = 4. * np.pi * self._radial_integral(radii, densities, 2)
+        gravity = np.zeros_like(radii)
+        gravity[1:] = constants.G * masses[1:] / radii[1:] / radii[1:]
+        return gravity
+
+    def _pressures(self, radii, densities, gravity):
+        # Integrate hydrostatic equilibrium, dP/dr = -rho g, downwards
+        # from zero pressure at the surface
+        return -scipy.integrate.cumtrapz((densities * gravity)[::-1],
+                                         x=radii[::-1], initial=0.)[::-1]
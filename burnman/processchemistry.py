@@ -15,11 +15,24 @@ from fractions import Fraction
 import pkgutil
 
 
+# Atomic masses, read from the data file on the first call to read_masses
+_atomic_masses = None
+
+
 def read_masses():
     """
     A simple function to read a file with a two column list of
-    elements and their masses into a dictionary
+    elements and their masses into a dictionary.
+    The file is only read once; each call returns a new copy of the
+    dictionary.
     """
+    global _atomic_masses
+    if _atomic_masses is None:
+        _atomic_masses = _read_masses_file()
+    return dict(_atomic_masses)
+
+
+def _read_masses_file():
     datastream = pkgutil.get_data(
         'burnman', 'data/input_masses/atomic_masses.dat')
     datalines = [line.strip()
@@ -7,8 +7,8 @@ from __future__ import absolute_import
 
 import numpy as np
 import warnings
+import sys
 import scipy.integrate
-import matplotlib.pyplot as plt
 
 from . import tools
 from . import constants
@@ -223,6 +223,13 @@ class Seismic1DModel(object):
             "abstract method to be implemented in derived class")
 
 
+# Tables of the seismic models, by class (see SeismicTable._load_tables)
+_shared_tables = {}
+
+# Names of the tables of SeismicTable which do not follow 'table_' + variable
+_table_names = {'v_p': 'table_vp', 'v_s': 'table_vs'}
+
+
 class SeismicTable(Seismic1DModel):
     """
     This is a base class that gets a 1D seismic model from a table indexed and
@@ -232,6 +239,11 @@ class SeismicTable(Seismic1DModel):
     Note: all tables need to be sorted by increasing depth. self.table_depth needs to be defined
     Alternatively, you can also overwrite the _lookup function if you
     want to access with something else.
+
+    Derived classes which read bundled tables can instead implement
+    _read_tables() and call _load_tables() in their constructor. The tables
+    are then only read once, and shared (read-only) between all instances
+    of the class.
     """
 
     def __init__(self):
@@ -249,26 +261,93 @@ class SeismicTable(Seismic1DModel):
 
         self.earth_radius = 6371.0e3
 
+    def _read_tables(self):
+        """
+        Returns a dictionary of the tables of this model, e.g.
+        {'table_depth': ..., 'table_vs': ...}. To be implemented by derived
+        classes which use _load_tables().
+        """
+        raise NotImplementedError(
+            "abstract method to be implemented in derived class")
+
+    def _load_tables(self):
+        """
+        Sets the tables returned by _read_tables(), which is only called
+        for the first instance of each class.
+        """
+        cls = type(self)
+        if cls not in _shared_tables:
+            tables = self._read_tables()
+            for table in tables.values():
+                table.flags.writeable = False
+            _shared_tables[cls] = tables
+        self.__dict__.update(_shared_tables[cls])
+
     def internal_depth_list(self, mindepth=0., maxdepth=1.e10):
-        depths = np.array([self.table_depth[x] for x in range(len(self.table_depth)) if self.table_depth[x] >= mindepth and self.table_depth[x] <= maxdepth])
-        discontinuities = np.where(depths[1:]-depths[:-1] == 0)[0]
+        depths, discontinuities = self._segment_index()
         # Shift values at discontinities by 1 m to simplify evaluating values
         # around these.
-        depths[discontinuities] = depths[discontinuities]-1.
-        depths[discontinuities+1] = depths[discontinuities+1]+1.
-        return depths
+        shift = np.zeros_like(depths)
+        shift[discontinuities] -= 1.
+        shift[discontinuities + 1] += 1.
+        inside = np.logical_and(depths >= mindepth, depths <= maxdepth)
+        return (depths + shift)[inside]
+
+    def evaluate(self, vars_list, depth_list, side='lower'):
+        """
+        Returns the lists of data for a SeismicTable for the depths provided.
+        The position of the depths in the table is only searched once, and
+        reused for all the variables.
+
+        Parameters
+        ----------
+        vars_list : array of str
+            Available variables depend on the seismic model, and can be chosen from 'pressure','density','gravity','v_s','v_p','v_phi','G','K','QG','QK'
+        depth_list : array of floats
+            Array of depths [m] to evaluate seismic model at.
+        side : 'lower' or 'upper'
+            Side of the discontinuities at which values are taken for depths
+            which lie exactly on a discontinuity. 'lower' (default) gives the
+            values just below it (deeper), 'upper' those just above it.
+
+        Returns
+        -------
+        Array of values shapes as (len(vars_list),len(depth_list)).
+
+        """
+        if type(self)._lookup is not SeismicTable._lookup:
+            return Seismic1DModel.evaluate(self, vars_list, depth_list)
+
+        weights = self._interpolation_weights(depth_list, side)
+        values = {}
+
+        def value(name):
+            if name not in values:
+                if getattr(type(self), name) is not getattr(SeismicTable, name):
+                    values[name] = getattr(self, name)(depth_list)
+                elif name == 'v_phi':
+                    v_s = value('v_s')
+                    v_p = value('v_p')
+                    values[name] = np.sqrt(v_p * v_p - 4. / 3. * v_s * v_s)
+                elif name == 'G':
+                    values[name] = np.power(value('v_s'), 2.) * value('density')
+                elif name == 'K':
+                    values[name] = np.power(value('v_phi'), 2.) * value('density')
+                else:
+                    values[name] = self._interpolate(
+                        weights, self._value_table(name))
+            return values[name]
+
+        result = np.empty((len(vars_list), len(depth_list)))
+        for a in range(len(vars_list)):
+            result[a, :] = value(vars_list[a])
+        return result
 
     def pressure(self, depth):
-        if len(self.table_pressure) == 0:
-                warnings.warn("Pressure is not given in " + self.__class__.__name__ + " and is now being computed. This will only work when density is defined for the entire planet. Use at your own risk. ")
-                self._compute_pressure()
-        return self._lookup(depth, self.table_pressure)
+        return self._lookup(depth, self._value_table('pressure'))
 
     def gravity(self, depth):
-        if len(self.table_gravity) == 0:
-                warnings.warn("Gravity is not given in " + self.__class__.__name__ + " and is now being computed. This will only work when density is defined for the entire planet.  Use at your own risk. ")
-                self._compute_gravity()
-        return self._lookup(depth, self.table_gravity)
+        return self._lookup(depth, self._value_table('gravity'))
 
     def v_p(self, depth):
 
@@ -287,27 +366,110 @@ class SeismicTable(Seismic1DModel):
         return self._lookup(depth, self.table_QG)
 
     def density(self, depth):
-        if len(self.table_density) == 0:
-            raise ValueError(
-                "Density has not been defined for this seismic model")
-        return self._lookup(depth, self.table_density)
+        return self._lookup(depth, self._value_table('density'))
+
+    def _value_table(self, name):
+        """
+        Returns the table of the variable name ('pressure', 'gravity',
+        'density', 'v_p', 'v_s', 'QK' or 'QG'). Pressure and gravity are
+        computed if they are not given.
+        """
+        if name == 'pressure':
+            self._check_pressure_table()
+        elif name == 'gravity':
+            if len(self.table_gravity) == 0:
+                warnings.warn("Gravity is not given in " + self.__class__.__name__ + " and is now being computed. This will only work when density is defined for the entire planet.  Use at your own risk. ")
+                self._compute_gravity()
+        elif name == 'density':
+            if len(self.table_density) == 0:
+                raise ValueError(
+                    "Density has not been defined for this seismic model")
+        return getattr(self, _table_names.get(name, 'table_' + name))
 
     def depth(self, pressure):
-        if pressure > max(self.table_pressure) or pressure < min(self.table_pressure):
+        pressures, depths = self._pressure_inversion()
+        if np.any(np.less(pressure, pressures[0])) or np.any(np.greater(pressure, pressures[-1])):
             raise ValueError("Pressure outside range of SeismicTable")
 
-        depth = np.interp(pressure, self.table_pressure, self.table_depth)
-        return depth
+        return np.interp(pressure, pressures, depths)
 
     def radius(self, pressure):
 
-        radius = np.interp(pressure, self.table_pressure[
-                           ::-1], self.earth_radius - self.table_depth[::-1])
-        return radius
+        return self.earth_radius - self.depth(pressure)
 
-    def _lookup(self, depth, value_table):
-        return np.interp(depth, self.table_depth, value_table)
+    def _check_pressure_table(self):
+        if len(self.table_pressure) == 0:
+                warnings.warn("Pressure is not given in " + self.__class__.__name__ + " and is now being computed. This will only work when density is defined for the entire planet. Use at your own risk. ")
+                self._compute_pressure()
 
+    def _pressure_inversion(self):
+        """
+        Returns strictly increasing pressures and the corresponding depths,
+        used to convert pressures into depths. The repeated points at
+        discontinuities are dropped. The result is stored, and only
+        recomputed when self.table_pressure is replaced.
+        """
+        self._check_pressure_table()
+        inversion = self.__dict__.get('_inversion')
+        if inversion is None or inversion[0] is not self.table_pressure:
+            pressures = np.asarray(self.table_pressure, dtype=float)
+            depths = np.asarray(self.table_depth, dtype=float)
+            steps = np.diff(pressures)
+            if np.any(steps < 0.):
+                raise ValueError("Pressure does not increase monotonically with depth in " + self.__class__.__name__)
+            increasing = np.concatenate(([True], steps > 0.))
+            inversion = (self.table_pressure,
+                         pressures[increasing], depths[increasing])
+            self._inversion = inversion
+        return inversion[1:]
+
+    def _lookup(self, depth, value_table, side='lower'):
+        return self._interpolate(self._interpolation_weights(depth, side),
+                                 value_table)
+
+    def _segment_index(self):
+        """
+        Returns the depths of the table as an array, and the indices i of the
+        discontinuities, where table_depth[i] == table_depth[i+1]: row i
+        holds the values just above the discontinuity, and row i+1 those just
+        below it. The result is stored, and only recomputed when
+        self.table_depth is replaced.
+        """
+        index = self.__dict__.get('_index')
+        if index is None or index[0] is not self.table_depth:
+            depths = np.asarray(self.table_depth, dtype=float)
+            discontinuities = np.where(depths[1:] == depths[:-1])[0]
+            index = (self.table_depth, depths, discontinuities)
+            self._index = index
+        return index[1:]
+
+    def _interpolation_weights(self, depth, side='lower'):
+        """
+        Locates depth(s) in the table. Returns the indices i of the rows
+        above each depth and the weights w, so that values are interpolated
+        as table[i] + w * (table[i+1] - table[i]). Depths outside the table
+        take the values at its ends. At a discontinuity, side='lower' takes
+        the values below it, and side='upper' those above it.
+        """
+        if side not in ['lower', 'upper']:
+            raise ValueError("side must be 'lower' or 'upper'")
+        depths, discontinuities = self._segment_index()
+        # Fractional position of the depths in the table. At a
+        # discontinuity, np.interp returns the position of the row below it.
+        position = np.interp(depth, depths,
+                             np.arange(len(depths), dtype=float))
+        if side == 'upper' and len(discontinuities) > 0:
+            position = position - np.isin(position, discontinuities + 1)
+        indices = np.clip(position.astype(int), 0, len(depths) - 2)
+        return indices, position - indices
+
+    def _interpolate(self, weights, value_table):
+        indices, weights = weights
+        values = np.asarray(value_table)
+        if len(values) != len(self.table_depth):
+            raise ValueError("Table of " + self.__class__.__name__ + " does not have the same length as table_depth")
+        steps = np.append(np.diff(values), 0.)
+        return values[indices] + weights * steps[indices]
 
     def _compute_gravity(self):
         # Calculate the gravity of the planet, based on a density profile.
@@ -347,17 +509,19 @@ class PREM(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
-        table = tools.read_table("input_seismic/prem.txt")
+        self._load_tables()
+
+    def _read_tables(self):
+        table = tools._load_table("input_seismic/prem.txt")
                                  # radius, pressure, density, v_p, v_s
-        table = np.array(table)
-        self.table_depth = table[:, 0]
-        self.table_radius = table[:, 1]
-        self.table_pressure = table[:, 2]
-        self.table_density = table[:, 3]
-        self.table_vp = table[:, 4]
-        self.table_vs = table[:, 5]
-        self.table_QK = table[:, 6]
-        self.table_QG = table[:, 7]
+        return {'table_depth': table[:, 0],
+                'table_radius': table[:, 1],
+                'table_pressure': table[:, 2],
+                'table_density': table[:, 3],
+                'table_vp': table[:, 4],
+                'table_vs': table[:, 5],
+                'table_QK': table[:, 6],
+                'table_QG': table[:, 7]}
 
 
 class Slow(SeismicTable):
@@ -370,28 +534,28 @@ class Slow(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
+        self._load_tables()
 
-        table = tools.read_table("input_seismic/prem.txt")
+    def _read_tables(self):
+        table = tools._load_table("input_seismic/prem.txt")
                                  # data is: depth radius pressure density V_p V_s Q_K Q_G
-        table = np.array(table)
-        table2 = tools.read_table("input_seismic/swave_slow.txt")
-        table2 = np.array(table2)
-        table3 = tools.read_table("input_seismic/pwave_slow.txt")
-        table3 = np.array(table3)
+        table2 = tools._load_table("input_seismic/swave_slow.txt")
+        table3 = tools._load_table("input_seismic/pwave_slow.txt")
 
         min_radius = self.earth_radius - max(table2[:, 0])
         max_radius = self.earth_radius - min(table2[:, 0])
 
-        table = np.array(list(filter(lambda x: (x[1] >= min_radius and x[1] <= max_radius), table)))
+        table = table[np.logical_and(table[:, 1] >= min_radius,
+                                     table[:, 1] <= max_radius)]
 
-        self.table_depth = table[:, 0]
-        self.table_radius = table[:, 1]
-        self.table_pressure = table[:, 2]
-        self.table_density = table[:, 3]
-        self.table_vp = np.interp(
-            self.table_depth, table3[:, 0][::-1], table3[:, 1][::-1])
-        self.table_vs = np.interp(
-            self.table_depth, table2[:, 0][::-1], table2[:, 1][::-1])
+        return {'table_depth': table[:, 0],
+                'table_radius': table[:, 1],
+                'table_pressure': table[:, 2],
+                'table_density': table[:, 3],
+                'table_vp': np.interp(
+                    table[:, 0], table3[:, 0][::-1], table3[:, 1][::-1]),
+                'table_vs': np.interp(
+                    table[:, 0], table2[:, 0][::-1], table2[:, 1][::-1])}
 
 
 class Fast(SeismicTable):
@@ -404,28 +568,28 @@ class Fast(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
+        self._load_tables()
 
-        table = tools.read_table("input_seismic/prem.txt")
+    def _read_tables(self):
+        table = tools._load_table("input_seismic/prem.txt")
                                  # data is: radius pressure density V_p V_s Q_K Q_G
-        table = np.array(table)
-        table2 = tools.read_table("input_seismic/swave_fast.txt")
-        table2 = np.array(table2)
-        table3 = tools.read_table("input_seismic/pwave_fast.txt")
-        table3 = np.array(table3)
+        table2 = tools._load_table("input_seismic/swave_fast.txt")
+        table3 = tools._load_table("input_seismic/pwave_fast.txt")
 
         min_radius = self.earth_radius - max(table2[:, 0])
         max_radius = self.earth_radius - min(table2[:, 0])
 
-        table = np.array(list(filter(lambda x: (x[1] >= min_radius and x[1] <= max_radius), table)))
+        table = table[np.logical_and(table[:, 1] >= min_radius,
+                                     table[:, 1] <= max_radius)]
 
-        self.table_depth = table[:, 0]
-        self.table_radius = table[:, 1]
-        self.table_pressure = table[:, 2]
-        self.table_density = table[:, 3]
-        self.table_vp = np.interp(
-            self.table_depth, table3[:, 0][::-1], table3[:, 1][::-1])
-        self.table_vs = np.interp(
-            self.table_depth, table2[:, 0][::-1], table2[:, 1][::-1])
+        return {'table_depth': table[:, 0],
+                'table_radius': table[:, 1],
+                'table_pressure': table[:, 2],
+                'table_density': table[:, 3],
+                'table_vp': np.interp(
+                    table[:, 0], table3[:, 0][::-1], table3[:, 1][::-1]),
+                'table_vs': np.interp(
+                    table[:, 0], table2[:, 0][::-1], table2[:, 1][::-1])}
 
 
 class STW105(SeismicTable):
@@ -437,23 +601,28 @@ class STW105(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
-        table = tools.read_table("input_seismic/STW105.txt")
+        self._load_tables()
+
+    def _read_tables(self):
+        table = tools._load_table("input_seismic/STW105.txt")
                                  # radius, pressure, density, v_p, v_s
-        table = np.array(table)
-        self.table_radius = table[:, 0][::-1]
-        self.table_density = table[:, 1][::-1]
-        self.table_vpv = table[:, 2][::-1]
-        self.table_vsv = table[:, 3][::-1]
-        self.table_QK = table[:, 4][::-1]
-        self.table_QG = table[:, 5][::-1]
-        self.table_vph = table[:, 6][::-1]
-        self.table_vsh = table[:, 7][::-1]
-
-        self.table_depth = self.earth_radius-self.table_radius
+        tables = {'table_radius': table[:, 0][::-1],
+                  'table_density': table[:, 1][::-1],
+                  'table_vpv': table[:, 2][::-1],
+                  'table_vsv': table[:, 3][::-1],
+                  'table_QK': table[:, 4][::-1],
+                  'table_QG': table[:, 5][::-1],
+                  'table_vph': table[:, 6][::-1],
+                  'table_vsh': table[:, 7][::-1]}
+
+        tables['table_depth'] = self.earth_radius - tables['table_radius']
 
         # Voigt averages for Vs and Vp
-        self.table_vs = np.sqrt((2.*self.table_vsv*self.table_vsv+self.table_vsh*self.table_vsh)/3.)
-        self.table_vp = np.sqrt((self.table_vpv*self.table_vpv+4.*self.table_vph*self.table_vph)/5.)
+        vsv, vsh = tables['table_vsv'], tables['table_vsh']
+        vpv, vph = tables['table_vpv'], tables['table_vph']
+        tables['table_vs'] = np.sqrt((2.*vsv*vsv+vsh*vsh)/3.)
+        tables['table_vp'] = np.sqrt((vpv*vpv+4.*vph*vph)/5.)
+        return tables
 
 
 class IASP91(SeismicTable):
@@ -465,13 +634,15 @@ class IASP91(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
-        table = tools.read_table(
+        self._load_tables()
+
+    def _read_tables(self):
+        table = tools._load_table(
             "input_seismic/iasp91.txt") # depth, radius, v_p, v_s
-        table = np.array(table)
-        self.table_depth = table[:, 0]
-        self.table_radius = table[:, 1]
-        self.table_vp = table[:, 2]
-        self.table_vs = table[:, 3]
+        return {'table_depth': table[:, 0],
+                'table_radius': table[:, 1],
+                'table_vp': table[:, 2],
+                'table_vs': table[:, 3]}
 
 
 class AK135(SeismicTable):
@@ -483,16 +654,18 @@ class AK135(SeismicTable):
 
     def __init__(self):
         SeismicTable.__init__(self)
-        table = tools.read_table(
+        self._load_tables()
+
+    def _read_tables(self):
+        table = tools._load_table(
             "input_seismic/ak135.txt") # radius, pressure, density, v_p, v_s
-        table = np.array(table)
-        self.table_depth = table[:, 0]
-        self.table_radius = table[:, 1]
-        self.table_density = table[:, 2]
-        self.table_vp = table[:, 3]
-        self.table_vs = table[:, 4]
-        self.table_QG = table[:, 5]
-        self.table_QK = table[:, 6]
+        return {'table_depth': table[:, 0],
+                'table_radius': table[:, 1],
+                'table_density': table[:, 2],
+                'table_vp': table[:, 3],
+                'table_vs': table[:, 4],
+                'table_QG': table[:, 5],
+                'table_QK': table[:, 6]}
 
 
 def attenuation_correction(v_p, v_s, v_phi, Qs, Qphi):
@@ -536,8 +709,120 @@ def attenuation_correction(v_p, v_s, v_phi, Qs, Qphi):
     v_phi *= 1. - 1. / 2. * cot * 1. / Qphi
     return v_p, v_s, v_phi
 
+
+def anelastic_velocities(v_p, v_s, QG, QK=None, frequencies=1.,
+                         reference_frequency=1., beta=0.3):
+    """
+    Applies the frequency dependent attenuation correction of
+    :cite:`Matas2007` to arrays of anharmonic velocities (for example
+    evaluated profiles or grids), for one or several frequencies at once.
+
+    The quality factors are given at the reference frequency, and scale
+    with frequency as :math:`Q(f) = Q(f_{ref}) (f/f_{ref})^\\beta`. The
+    velocities are reduced by :math:`1 - \\cot(\\beta\\pi/2)/(2Q)`, with
+    :math:`1/Q_P = (1-L)/Q_K + L/Q_G` and :math:`L = 4/3 (v_S/v_P)^2`
+    for P waves. Quality factors which are zero or infinite (e.g. QG in a
+    fluid) are treated as no attenuation.
+
+    Parameters
+    ----------
+    v_p : array of floats
+        Anharmonic P wave velocities in [m/s].
+    v_s : array of floats
+        Anharmonic S wave velocities in [m/s].
+    QG : array of floats
+        Shear quality factors at the reference frequency, e.g. the QG of a
+        :class:`burnman.seismic.SeismicTable` or the result of
+        :func:`burnman.seismic.temperature_dependent_Q`.
+    QK : array of floats (optional)
+        Bulk quality factors at the reference frequency. If not given,
+        there is no bulk attenuation.
+    frequencies : float or list of floats
+        Frequencies [Hz] at which to compute the velocities.
+    reference_frequency : float
+        Frequency [Hz] at which QG and QK are given.
+    beta : float
+        Exponent of the frequency dependence of Q.
+
+    Returns
+    -------
+    v_p, v_s, v_phi : arrays of floats
+        Corrected P, S and bulk sound velocities in [m/s]. If frequencies
+        is a list, the first axis runs over the frequencies.
+    """
+    v_p = np.asarray(v_p, dtype=float)
+    v_s = np.asarray(v_s, dtype=float)
+    v_phi = np.sqrt(v_p * v_p - 4. / 3. * v_s * v_s)
+
+    def inverse_Q(Q):
+        Q = np.asarray(Q, dtype=float)
+        with np.errstate(divide='ignore'):
+            return np.where(np.logical_and(Q > 0., np.isfinite(Q)), 1. / Q, 0.)
+
+    # The frequencies are on an extra first axis
+    frequencies = np.asarray(frequencies, dtype=float)
+    n_dims = max(np.ndim(v_p), np.ndim(v_s), np.ndim(QG),
+                 0 if QK is None else np.ndim(QK))
+    scaling = np.power(frequencies / reference_frequency, -beta).reshape(
+        frequencies.shape + (1,) * n_dims)
+    qG = scaling * inverse_Q(QG)
+    qK = scaling * (0. if QK is None else inverse_Q(QK))
+    L = 4. / 3. * np.power(v_s / v_p, 2.)
+    qP = (1. - L) * qK + L * qG
+
+    factor = 1. / 2. / np.tan(beta * np.pi / 2.)
+    return (v_p * (1. - factor * qP), v_s * (1. - factor * qG),
+            v_phi * (1. - factor * qK))
+
+
+def temperature_dependent_Q(temperatures, pressures, A, activation_energy,
+                            activation_volume=0., beta=0.3):
+    """
+    Returns quality factors which depend on temperature and pressure
+    through an activation enthalpy,
+    :math:`Q = A \\exp(\\beta (E + P V) / (R T))`, for use in
+    :func:`burnman.seismic.anelastic_velocities`.
+
+    Parameters
+    ----------
+    temperatures : array of floats
+        Temperatures [K].
+    pressures : array of floats
+        Pressures [Pa].
+    A : float
+        Quality factor at the reference frequency in the limit of
+        infinite temperature.
+    activation_energy : float
+        Activation energy [J/mol].
+    activation_volume : float
+        Activation volume [m^3/mol].
+    beta : float
+        Exponent of the frequency dependence of Q.
+
+    Returns
+    -------
+    Q : array of floats
+        Quality factors [dimensionless].
+    """
+    temperatures = np.asarray(temperatures, dtype=float)
+    enthalpy = activation_energy + \
+        np.asarray(pressures, dtype=float) * activation_volume
+    return A * np.exp(beta * enthalpy / (constants.gas_constant * temperatures))
+
 """
 shared variable of prem, so that other routines do not need to create
-prem over and over. See geotherm for example.
+prem over and over. See geotherm for example. It is created on first
+access (at import time on Python versions before 3.7).
 """
-prem_model = PREM()
+
+
+def __getattr__(name):
+    if name == 'prem_model':
+        global prem_model
+        prem_model = PREM()
+        return prem_model
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    prem_model = PREM()
@@ -14,6 +14,16 @@ from .averaging_schemes import reuss_average_function
 from . import constants
 
 
+class SolidSolutionMethod(object):
+
+    """Dummy class because SolidSolution needs a method to call
+    Mineral.set_state(), but should never have a method that
+    is used for minerals. Note that SolidSolution.set_method() does
+    not change self.method. Defined at module level so that solid
+    solutions can be pickled (e.g. to send them to other processes)."""
+    pass
+
+
 class SolidSolution(Mineral):
 
     """
@@ -45,14 +55,6 @@ class SolidSolution(Mineral):
             SolutionModel to use.
         """
         Mineral.__init__(self)
-
-        class SolidSolutionMethod(object):
-
-            """Dummy class because SolidSolution needs a method to call
-            Mineral.set_state(), but should never have a method that
-            is used for minerals. Note that set_method() below will
-            not change self.method"""
-            pass
         self.method = SolidSolutionMethod()
 
         if hasattr(self, 'endmembers') == False:
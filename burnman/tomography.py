@@ -0,0 +1,149 @@
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+from __future__ import absolute_import
+
+import numpy as np
+
+from .composite import Composite
+from . import seismic
+
+# This module converts 3D fields of temperature (and optionally of the
+# fractions of the phases of a composite), as given by geodynamic
+# models, into fields of seismic properties.
+#
+# The fields are processed one radial shell (one depth) at a time. The
+# pressure is taken from a 1D seismic model, so it is the same for all
+# the points of a shell, and the properties of the phases within a shell
+# only depend on temperature. They are therefore evaluated once for each
+# distinct temperature of a shell (or on a grid of temperatures, which
+# are then interpolated), and the averaging over the phases with the
+# local fractions is done on whole arrays. Only one shell is held in
+# memory, and the phases are evaluated for at most chunk_size points at
+# once, so the output can be a np.memmap for fields which do not fit in
+# memory.
+
+
+def velocities_from_field(rock, depths, temperatures, fractions=None,
+                          vars_list=('v_p', 'v_s', 'density'),
+                          seismic_model=None, output=None,
+                          chunk_size=100000, temperature_step=None):
+    """
+    Computes properties of a rock (by default seismic velocities and
+    density) over a 3D field of temperatures, and optionally of the
+    molar fractions of the phases of the rock.
+
+    Parameters
+    ----------
+    rock : :class:`burnman.Material`
+        The material to evaluate. If fractions are given, this must be a
+        :class:`burnman.Composite`, and its own molar fractions are ignored.
+    depths : array of floats
+        Depths [m] of the shells of the field.
+    temperatures : 3D array of floats
+        Temperatures [K], with shape (n_latitudes, n_longitudes, n_depths).
+    fractions : 4D array of floats (optional)
+        Molar fractions of the phases of the rock, with shape
+        (n_latitudes, n_longitudes, n_depths, n_phases).
+    vars_list : list of strings
+        Properties to compute (default v_p, v_s and density).
+    seismic_model : :class:`burnman.seismic.Seismic1DModel`
+        Model used to convert depths to pressures (default PREM).
+    output : 4D array of floats (optional)
+        Array to write the results to (for example a np.memmap), with
+        shape (len(vars_list), n_latitudes, n_longitudes, n_depths).
+    chunk_size : int
+        Maximum number of points of a shell which are processed at once.
+    temperature_step : float (optional)
+        If given, the rock is evaluated on a grid of temperatures with
+        this spacing in each shell, and the results are linearly
+        interpolated. Otherwise (default), the rock is evaluated at every
+        distinct temperature of the field.
+
+    Returns
+    -------
+    output : 4D array of floats
+        output[i][j][k][l] is property vars_list[i] at latitude j,
+        longitude k and depth l.
+    """
+    n_latitudes, n_longitudes, n_depths = np.shape(temperatures)
+    n_points = n_latitudes * n_longitudes
+    if len(depths) != n_depths:
+        raise Exception(
+            'The temperature field must have one column per depth')
+
+    if fractions is not None:
+        if not isinstance(rock, Composite):
+            raise Exception(
+                'Fractions can only be given for a Composite')
+        n_phases = len(rock.phases)
+        if np.shape(fractions) != (n_latitudes, n_longitudes, n_depths, n_phases):
+            raise Exception(
+                'The fraction field must have the shape of the temperature field, plus one axis for the phases')
+
+    if seismic_model is None:
+        seismic_model = seismic.PREM()
+    pressures = seismic_model.pressure(depths)
+
+    if output is None:
+        output = np.empty((len(vars_list), n_latitudes, n_longitudes, n_depths))
+
+    def evaluate(pressure, T):
+        # Properties at the temperatures T, with temperature on the
+        # first axis of the (2D) arrays
+        P = pressure * np.ones_like(T)
+        if fractions is None:
+            return rock.evaluate(vars_list, P, T).T
+        return rock.evaluate_phases(vars_list, P, T)
+
+    def interpolate(values, indices, weights):
+        # Properties at the points of a chunk, from those at temperatures
+        # T[indices] (weights is None) or interpolated between
+        # T[indices] and T[indices + 1]
+        if weights is None:
+            take = lambda a: a[indices]
+        else:
+            w = weights[:, np.newaxis]
+            take = lambda a: a[indices] + w * (a[indices + 1] - a[indices])
+        if fractions is None:
+            return take(values)
+        return dict((name, take(a)) for name, a in values.items())
+
+    for k in range(n_depths):
+        shell_temperatures = np.asarray(temperatures[:, :, k],
+                                        dtype=float).reshape(n_points)
+        if fractions is not None:
+            shell_fractions = np.asarray(fractions[:, :, k, :],
+                                         dtype=float).reshape(n_points, n_phases)
+
+        if temperature_step is not None:
+            T_min = np.min(shell_temperatures)
+            T_max = np.max(shell_temperatures)
+            n_grid = max(2, int(np.ceil((T_max - T_min) / temperature_step)) + 1)
+            grid = np.linspace(T_min, T_max, n_grid)
+            grid_values = evaluate(pressures[k], grid)
+
+        shell_output = np.empty((len(vars_list), n_points))
+        for start in range(0, n_points, chunk_size):
+            s = slice(start, start + chunk_size)
+            if temperature_step is None:
+                T, indices = np.unique(shell_temperatures[s],
+                                       return_inverse=True)
+                values = interpolate(evaluate(pressures[k], T), indices, None)
+            else:
+                position = np.interp(shell_temperatures[s], grid,
+                                     np.arange(n_grid, dtype=float))
+                indices = np.minimum(position.astype(int), n_grid - 2)
+                values = interpolate(grid_values, indices, position - indices)
+
+            if fractions is None:
+                shell_output[:, s] = values.T
+            else:
+                shell_output[:, s] = rock.average_phases(
+                    vars_list, values, shell_fractions[s])
+
+        output[:, :, :, k] = shell_output.reshape(
+            (len(vars_list), n_latitudes, n_longitudes))
+
+    return output
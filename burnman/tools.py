@@ -92,6 +92,30 @@ def linear_interpol(x, x1, x2, y1, y2):
 
 
 def read_table(filename):
+    """
+    Reads one of the tables bundled with burnman (in burnman/data/).
+
+    Parameters
+    ----------
+    filename : string
+        Name of the table, relative to the data directory,
+        e.g. 'input_seismic/prem.txt'.
+
+    Returns
+    -------
+    table : 2D numpy array of floats
+        The table, one row per (uncommented) line of the file.
+    """
+    return np.array(_load_table(filename))
+
+
+# Tables which have been loaded by this process, by filename. These arrays
+# are read-only and shared between all their users (e.g. all instances of
+# burnman.seismic.PREM).
+_loaded_tables = {}
+
+
+def _parse_table(filename):
     datastream = pkgutil.get_data('burnman', 'data/' + filename)
     datalines = [line.strip()
                  for line in datastream.decode('ascii').split('\n') if line.strip()]
@@ -104,6 +128,65 @@ def read_table(filename):
     return np.array(table)
 
 
+def _table_cache_directory():
+    """
+    Returns the directory in which compiled (.npy) versions of the bundled
+    tables are stored, given by the environment variable BURNMAN_CACHE_DIR,
+    or None if it is not set (in which case nothing is written to disk).
+    """
+    return os.environ.get('BURNMAN_CACHE_DIR') or None
+
+
+def _load_table(filename):
+    """
+    Returns a bundled table as a read-only array, which is shared between
+    all callers.
+
+    The text file is only parsed once per process. If the environment
+    variable BURNMAN_CACHE_DIR is set, the resulting array is also stored
+    in binary (.npy) form in that directory, and later loaded from there
+    as a memory-mapped array (so that the table is also shared between
+    processes). The compiled file is tagged with the size and modification
+    time of the text file, so that it is rebuilt when the table changes.
+    If the cache can not be used (e.g. because the directory is not
+    writable), the text file is parsed instead.
+    """
+    if filename in _loaded_tables:
+        return _loaded_tables[filename]
+
+    table = None
+    cache_directory = _table_cache_directory()
+    if cache_directory is None:
+        table = _parse_table(filename)
+    else:
+        try:
+            source = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'data', filename)
+            stat = os.stat(source)
+            cache_file = os.path.join(cache_directory, '%s.%d-%d.npy' % (
+                filename.replace('/', '__'), stat.st_size, int(stat.st_mtime)))
+            if os.path.exists(cache_file):
+                table = np.load(cache_file, mmap_mode='r')
+            else:
+                table = _parse_table(filename)
+                if not os.path.isdir(cache_directory):
+                    os.makedirs(cache_directory)
+                # write to a temporary file first, so that processes never
+                # read a partially written table
+                temporary = '%s.%d.tmp' % (cache_file, os.getpid())
+                with open(temporary, 'wb') as f:
+                    np.save(f, table)
+                os.rename(temporary, cache_file)
+        except (IOError, OSError, ValueError):
+            if table is None:
+                table = _parse_table(filename)
+
+    table = np.asarray(table).view()
+    table.flags.writeable = False
+    _loaded_tables[filename] = table
+    return table
+
+
 def array_from_file(filename):
     """
     Generic function to read a file containing floats and commented lines
@@ -298,6 +381,165 @@ def equilibrium_temperature(minerals, stoichiometry, pressure, temperature_initi
     return temperature
 
 
+def _reaction_properties(minerals, stoichiometry, pressure, temperature):
+    """
+    Returns the Gibbs free energy, volume and entropy change
+    of a reaction at the given pressure and temperature.
+    """
+    gibbs = 0.
+    volume = 0.
+    entropy = 0.
+    for mineral, n in zip(minerals, stoichiometry):
+        mineral.set_state(pressure, temperature)
+        gibbs += n * mineral.gibbs
+        volume += n * mineral.V
+        entropy += n * mineral.S
+    return gibbs, volume, entropy
+
+
+def reaction_line(minerals, stoichiometry, temperature_range,
+                  pressure_initial_guess=1.e5, pressure_range=None,
+                  initial_step=0.01, max_step=0.1, min_step=1.e-8,
+                  max_points=10000):
+    r"""
+    Given a list of minerals and their reaction stoichiometries,
+    trace the univariant reaction line in pressure-temperature space,
+    starting at the lowest temperature of interest.
+
+    The line is followed by pseudo-arclength continuation: each step
+    predicts the next point along the tangent given by the
+    Clapeyron slope :math:`dP/dT = \Delta S / \Delta V`, and then
+    corrects it back onto the line with Newton iterations which use
+    the analytic derivatives of the reaction Gibbs free energy
+    (:math:`\Delta V` and :math:`-\Delta S`). The step length is
+    increased when the corrector converges quickly and decreased when
+    it struggles or the tangent turns sharply, so that the tracer does
+    not jump between branches. Because the continuation is in arclength
+    rather than temperature, lines which turn back on themselves
+    (where :math:`\Delta V` changes sign) are followed correctly.
+
+    Parameters
+    ----------
+    minerals : list of minerals
+        List of minerals involved in the reaction.
+
+    stoichiometry : list of floats
+        Reaction stoichiometry for the minerals provided.
+        Reactants and products should have the opposite signs [mol]
+
+    temperature_range : list of two floats
+        The line is traced from the first temperature and until it
+        leaves the temperature range [K]
+
+    pressure_initial_guess : optional float
+        Initial guess for the equilibrium pressure at the first
+        temperature [Pa]
+
+    pressure_range : optional list of two floats
+        If given, tracing also stops when the line leaves this
+        pressure range [Pa]
+
+    initial_step, max_step, min_step : optional floats
+        Initial, maximum and minimum step lengths, relative to the size of
+        the pressure-temperature window.
+
+    max_points : optional integer
+        Maximum number of points on the line.
+
+    Returns
+    -------
+    pressures : numpy array of floats
+        The equilibrium pressures along the line [Pa]
+
+    temperatures : numpy array of floats
+        The equilibrium temperatures along the line [K]
+
+    slopes : numpy array of floats
+        The Clapeyron slopes dP/dT along the line [Pa/K]
+    """
+    T_min, T_max = temperature_range
+    P = equilibrium_pressure(minerals, stoichiometry, T_min,
+                             pressure_initial_guess)
+    gibbs, dV, dS = _reaction_properties(minerals, stoichiometry, P, T_min)
+
+    # Scale pressures and temperatures to the size of the window
+    T_scale = T_max - T_min
+    if pressure_range is not None:
+        P_scale = pressure_range[1] - pressure_range[0]
+    else:
+        P_scale = max(abs(dS / dV) * T_scale, 1.e8)
+    scale = np.array([P_scale, T_scale])
+
+    def tangent(dV, dS, previous=None):
+        t = np.array([dS * T_scale, dV * P_scale])
+        t = t / np.linalg.norm(t)
+        if previous is None:
+            return t if t[1] >= 0. else -t
+        return t if np.dot(t, previous) >= 0. else -t
+
+    x = np.array([P, T_min]) / scale
+    t = tangent(dV, dS)
+    points = [x * scale]
+    slopes = [dS / dV]
+    step = initial_step
+    correction_tolerance = 1.e-10
+
+    while len(points) < max_points:
+        # Land exactly on the temperature range if we would overshoot
+        h = step
+        x_new = x + h * t
+        if x_new[1] * T_scale > T_max and t[1] > 0.:
+            h = (T_max / T_scale - x[1]) / t[1]
+            x_new = x + h * t
+
+        # Newton corrector, perpendicular to the tangent
+        converged = False
+        y = x_new
+        for iteration in range(8):
+            gibbs, dV, dS = _reaction_properties(minerals, stoichiometry,
+                                                 y[0] * P_scale,
+                                                 y[1] * T_scale)
+            gradient = np.array([dV * P_scale, -dS * T_scale])
+            norm = np.dot(gradient, gradient)
+            y = y - gibbs * gradient / norm
+            if abs(gibbs) / np.sqrt(norm) < correction_tolerance:
+                converged = True
+                break
+
+        if converged:
+            gibbs, dV, dS = _reaction_properties(minerals, stoichiometry,
+                                                 y[0] * P_scale,
+                                                 y[1] * T_scale)
+            t_new = tangent(dV, dS, t)
+            # Reject steps where the corrector had to go far from the
+            # prediction or where the line turned sharply
+            if np.linalg.norm(y - x_new) > 0.5 * h or np.dot(t_new, t) < 0.95:
+                converged = False
+
+        if not converged:
+            step = step / 2.
+            if step < min_step:
+                raise Exception('Could not follow the reaction line '
+                                'beyond P = %g Pa, T = %g K' % tuple(x * scale))
+            continue
+
+        x = y
+        t = t_new
+        points.append(x * scale)
+        slopes.append(dS / dV)
+        if iteration < 3:
+            step = min(2. * step, max_step)
+
+        P, T = x * scale
+        if T >= T_max * (1. - 1.e-12) or T < T_min:
+            break
+        if pressure_range is not None and (P < pressure_range[0] or P > pressure_range[1]):
+            break
+
+    points = np.array(points)
+    return points[:, 0], points[:, 1], np.array(slopes)
+
+
 def invariant_point(minerals_r1, stoichiometry_r1,
                     minerals_r2, stoichiometry_r2,
                     pressure_temperature_initial_guess=[1.e9, 1000.]):
@@ -17,7 +17,7 @@ seismic data against PREM. For more extensive comments on this setup, see tutori
 * :class:`burnman.composite.Composite`
 * :class:`burnman.seismic.PREM`
 * :func:`burnman.geotherm.brown_shankland`
-* :func:`burnman.material.Material.evaluate`
+* :func:`burnman.composite.Composite.evaluate_fractions`
 * :func:`burnman.main.compare_l2`
 
 *Demonstrates:*
@@ -61,21 +61,26 @@ if __name__ == "__main__":
     ferropericlase.set_composition(
         [0.8, 0.2])  # Set molar_fraction of MgO and FeO
 
-    def material_error(amount_perovskite):
-        # Define composite using the values
-        rock = burnman.Composite([perovskite, ferropericlase],
-                                 [amount_perovskite, 1.0 - amount_perovskite])
+    # Define the composite. Its fractions are left undefined, as we evaluate
+    # it for many fractions of perovskite at once
+    rock = burnman.Composite([perovskite, ferropericlase])
+    print("Calculations are done for:")
+    rock.debug_print()
 
-        # Compute velocities
-        mat_rho, mat_vp, mat_vs, mat_vphi, mat_K, mat_G = \
-            rock.evaluate(
-                ['density', 'v_p', 'v_s', 'v_phi', 'K_S', 'G'], seis_p, temperature)
+    # Run through fractions of perovskite. Each phase is only evaluated
+    # once along the geotherm, and the averaging is then done for all
+    # fractions together.
+    xx = np.linspace(0.0, 1.0, 40)
+    fractions = np.array([xx, 1.0 - xx]).T
+    mat_rho, mat_vp, mat_vs, mat_vphi, mat_K, mat_G = \
+        rock.evaluate_fractions(
+            ['density', 'v_p', 'v_s', 'v_phi', 'K_S', 'G'], seis_p, temperature,
+            fractions)
 
-        print("Calculations are done for:")
-        rock.debug_print()
+    def material_error(i):
         # Calculate errors
         [vs_err, vphi_err, rho_err, K_err, G_err] = \
-            burnman.compare_l2(depths, [mat_vs, mat_vphi, mat_rho, mat_K, mat_G], [
+            burnman.compare_l2(depths, [mat_vs[i], mat_vphi[i], mat_rho[i], mat_K[i], mat_G[i]], [
                                seis_vs, seis_vphi, seis_rho, seis_K, seis_G])
         # Normalize errors
         vs_err = vs_err / np.mean(seis_vs) ** 2.
@@ -85,9 +90,7 @@ if __name__ == "__main__":
         G_err = G_err / np.mean(seis_G) ** 2.
         return vs_err, vphi_err, rho_err, K_err, G_err
 
-    # Run through fractions of perovskite
-    xx = np.linspace(0.0, 1.0, 40)
-    errs = np.array([material_error(x) for x in xx])
+    errs = np.array([material_error(i) for i in range(len(xx))])
 
     # Plot results
     yy_vs = errs[:, 0]
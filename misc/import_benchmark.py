@@ -0,0 +1,44 @@
+from __future__ import absolute_import
+from __future__ import print_function
+# This file is part of BurnMan - a thermoelastic and thermodynamic toolkit for the Earth and Planetary Sciences
+# Copyright (C) 2012 - 2015 by the BurnMan team, released under the GNU
+# GPL v2 or later.
+
+"""
+Measures the time it takes to import burnman in a fresh interpreter.
+Each import is done in a new process, so that nothing is cached in
+memory. Run 'python import_benchmark.py N' to time N imports (default 10).
+"""
+
+import os
+import sys
+import subprocess
+import timeit
+import numpy as np
+
+# hack to allow scripts to be placed in subdirectories next to burnman:
+burnman_path = os.path.abspath('.')
+if not os.path.exists('burnman') and os.path.exists('../burnman'):
+    burnman_path = os.path.abspath('..')
+
+if __name__ == "__main__":
+
+    n_runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    def time_import(statement):
+        command = [sys.executable, '-c', statement]
+        start = timeit.default_timer()
+        subprocess.check_call(command, cwd=burnman_path)
+        return timeit.default_timer() - start
+
+    # the first import compiles the sources and fills the table cache
+    time_import('import burnman')
+
+    for statement in ['pass',
+                      'import numpy, scipy.optimize',
+                      'import burnman',
+                      'import burnman; burnman.minerals.SLB_2011',
+                      'import burnman; burnman.seismic.PREM()']:
+        times = [time_import(statement) for i in range(n_runs)]
+        print('{0:45s} median {1:7.1f} ms, min {2:7.1f} ms'.format(
+            statement, 1.e3 * np.median(times), 1.e3 * np.min(times)))
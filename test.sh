@@ -120,6 +120,7 @@ do
     [ $test == "gen_doc.py" ] && echo "  *** skipping $test !" && continue
     [ $test == "__init__.py" ] && echo "  *** skipping $test !" && continue
     [ $test == "table.py" ] && echo "  *** skipping $test !" && continue
+    [ $test == "import_benchmark.py" ] && echo "  *** skipping $test !" && continue
     [ $test == "helper_solid_solution.py" ] && echo "  *** skipping $test !" && continue
 
     testit $test $fulldir
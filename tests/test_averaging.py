@@ -3,6 +3,7 @@ import unittest
 import os
 import sys
 import warnings
+import numpy as np
 sys.path.insert(1, os.path.abspath('..'))
 
 import burnman
@@ -389,5 +390,36 @@ class HSAverage(BurnManTest):
         self.assertFloatEqual(278.893, K[0] / 1.e9)
         self.assertFloatEqual(153.461, G[0] / 1.e9)
 
+
+class ArrayAveraging(BurnManTest):
+
+    def test_2d_matches_rows(self):
+        V = np.array([[0.5, 0.5, 0.], [0.2, 0.3, 0.5], [1., 2., 3.]])
+        K = np.array([[250.e9, 160.e9, 100.e9], [130.e9, 260.e9, 180.e9],
+                      [200.e9, 200.e9, 150.e9]])
+        G = np.array([[170.e9, 90.e9, 60.e9], [80.e9, 160.e9, 110.e9],
+                      [120.e9, 120.e9, 70.e9]])
+        for scheme in [avg.VoigtReussHill(), avg.Voigt(), avg.Reuss(),
+                       avg.HashinShtrikmanUpper(), avg.HashinShtrikmanLower(),
+                       avg.HashinShtrikmanAverage()]:
+            K_avg = scheme.average_bulk_moduli(V, K, G)
+            G_avg = scheme.average_shear_moduli(V, K, G)
+            self.assertEqual(K_avg.shape, (3,))
+            for i in range(3):
+                self.assertFloatEqual(
+                    K_avg[i], scheme.average_bulk_moduli(V[i], K[i], G[i]))
+                self.assertFloatEqual(
+                    G_avg[i], scheme.average_shear_moduli(V[i], K[i], G[i]))
+
+    def test_2d_non_rigid_phase(self):
+        V = np.array([[0.5, 0.5], [1., 0.]])
+        G = np.array([[160.e9, 0.], [160.e9, 0.]])
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            G_reuss = avg.reuss_average_function(V, G)
+            self.assertEqual(len(w), 1)
+        self.assertFloatEqual(0., G_reuss[0])
+        self.assertFloatEqual(160.e9, G_reuss[1])
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 import unittest
+import copy
 import os
 import sys
 sys.path.insert(1, os.path.abspath('..'))
@@ -109,6 +110,208 @@ class composite(BurnManTest):
         self.assertArraysAlmostEqual(f, [0.4, 0.6])
         self.assertEqual(mins, ",".join([min1.to_string(), min2.to_string()]))
 
+    def test_unroll_cache(self):
+        min1 = minerals.SLB_2005.periclase()
+        min2 = minerals.SLB_2005.mg_perovskite()
+        ca = burnman.Composite([min1, min2], [0.5, 0.5])
+        c = burnman.Composite([ca, min2], [0.4, 0.6])
+        self.assertTrue(c.unroll() is c.unroll())
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.2, 0.2, 0.6])
+
+        # Changes to the nested composite must be picked up
+        ca.set_fractions([0.25, 0.75])
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.1, 0.3, 0.6])
+        ca.phases = [min1]
+        ca.set_fractions([1.0])
+        (m, f) = c.unroll()
+        self.assertArraysAlmostEqual(f, [0.4, 0.6])
+        self.assertEqual(m, [min1, min2])
+
+    def test_unroll_cache_mutation(self):
+        per = minerals.SLB_2011.periclase()
+        pv = minerals.SLB_2011.mg_perovskite()
+        stv = minerals.SLB_2011.stishovite()
+        r = burnman.Composite([per, pv], [0.5, 0.5])
+        c = burnman.Composite([r, stv], [0.5, 0.5])
+        self.assertArraysAlmostEqual(r.unroll()[1], [0.5, 0.5])
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.25, 0.25, 0.5])
+
+        # The phases and fractions are returned as copies, so changing
+        # them in place does not change the composite
+        fractions = r.molar_fractions
+        fractions[0] = 0.2
+        r.phases.append(stv)
+        self.assertEqual(r.phases + [stv], [per, pv, stv])
+        self.assertArraysAlmostEqual(r.molar_fractions, [0.5, 0.5])
+        self.assertArraysAlmostEqual(r.unroll()[1], [0.5, 0.5])
+
+        r.molar_fractions = [0.2, 0.8]
+        self.assertArraysAlmostEqual(r.unroll()[1], [0.2, 0.8])
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.1, 0.4, 0.5])
+        r.phases = [per, pv, stv]
+        r.set_fractions([0.2, 0.3, 0.5])
+        self.assertEqual(len(r.unroll()[0]), 3)
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.1, 0.15, 0.25, 0.5])
+
+        # Changes to one composite do not invalidate unrelated ones
+        unrolled = c.unroll()
+        other = burnman.Composite([per, stv], [0.5, 0.5])
+        other.set_fractions([0.3, 0.7])
+        self.assertTrue(c.unroll() is unrolled)
+
+        # Copies keep track of their own nested composites
+        c2 = copy.deepcopy(c)
+        c2.phases[0].set_fractions([1.0, 0.0, 0.0])
+        self.assertArraysAlmostEqual(c2.unroll()[1], [0.5, 0.0, 0.0, 0.5])
+        self.assertArraysAlmostEqual(c.unroll()[1], [0.1, 0.15, 0.25, 0.5])
+
+    def test_unroll_spin_transition(self):
+        min1 = minerals.Murakami_etal_2012.fe_periclase()
+        c = burnman.Composite([min1], [1.0])
+        c.set_state(5.e9, 300.)
+        self.assertEqual(c.unroll()[1], [0.0, 1.0])
+        c.set_state(150.e9, 300.)
+        self.assertEqual(c.unroll()[1], [1.0, 0.0])
+
+    def test_duplicate_phases(self):
+        per1 = minerals.SLB_2011.periclase()
+        per2 = minerals.SLB_2011.periclase()
+        fo = minerals.SLB_2011.forsterite()
+        harzburgite = burnman.Composite([fo, per1], [0.8, 0.2])
+        basalt = burnman.Composite([per2, fo], [0.3, 0.7])
+        rock = burnman.Composite([harzburgite, basalt], [0.5, 0.5])
+
+        # fo appears twice, but its state is only set once
+        calls = []
+        set_state = fo.set_state
+
+        def counting_set_state(pressure, temperature):
+            calls.append(pressure)
+            set_state(pressure, temperature)
+        fo.set_state = counting_set_state
+        rock.set_state(30.e9, 2000.)
+        self.assertEqual(len(calls), 1)
+
+        reference = burnman.Composite([minerals.SLB_2011.periclase(),
+                                       minerals.SLB_2011.forsterite()],
+                                      [0.3, 0.7])
+        reference.set_state(30.e9, 2000.)
+        self.assertFloatEqual(basalt.molar_volume, reference.molar_volume)
+
+        # Minerals with identical parameters are distinct phases: changing
+        # the state of one does not affect the composites of the other
+        per1.set_state(100.e9, 300.)
+        basalt.reset()
+        self.assertFloatEqual(basalt.molar_volume, reference.molar_volume)
+
+    def test_evaluate_fractions(self):
+        pv = minerals.SLB_2011.mg_perovskite()
+        fp = minerals.SLB_2011.periclase()
+        rock = burnman.Composite([pv, fp])
+        rock.set_averaging_scheme('HashinShtrikmanAverage')
+        pressures = [30.e9, 60.e9, 90.e9]
+        temperatures = [2000., 2200., 2400.]
+        fractions = [[0., 1.], [0.3, 0.7], [1., 0.]]
+        names = ['rho', 'v_p', 'v_s', 'K_T', 'G', 'alpha', 'C_p', 'gr',
+                 'gibbs']
+        output = rock.evaluate_fractions(
+            names, pressures, temperatures, fractions)
+        self.assertEqual(output.shape, (len(names), 3, 3))
+        for i, f in enumerate(fractions):
+            reference = burnman.Composite([pv, fp], f)
+            reference.set_averaging_scheme('HashinShtrikmanAverage')
+            self.assertArraysAlmostEqual(
+                output[:, i, :].flatten(),
+                reference.evaluate(names, pressures, temperatures).flatten())
+
+    def test_evaluate_phases(self):
+        pv = minerals.SLB_2011.mg_perovskite()
+        fp = minerals.SLB_2011.periclase()
+        rock = burnman.Composite([pv, fp], [0.6, 0.4])
+        pressures = [30.e9, 60.e9]
+        temperatures = [2000., 2200.]
+        names = ['rho', 'v_s', 'C_p']
+        phase_values = rock.evaluate_phases(names, pressures, temperatures)
+        self.assertEqual(phase_values['density'].shape, (2, 2))
+        # one point per row of fractions
+        output = rock.average_phases(names, phase_values,
+                                     [[0.6, 0.4], [0.6, 0.4]])
+        self.assertEqual(output.shape, (3, 2))
+        self.assertArraysAlmostEqual(
+            output.flatten(),
+            rock.evaluate(names, pressures, temperatures).flatten())
+
+    def test_evaluate_jacobian(self):
+        fp = minerals.SLB_2011.ferropericlase()
+        fp.set_composition([0.8, 0.2])
+        pv = minerals.SLB_2011.mg_perovskite()
+        rock = burnman.Composite([pv, fp], [0.7, 0.3])
+        pressures = [40.e9, 80.e9]
+        temperatures = [2000., 2300.]
+        names = ['v_s', 'v_p', 'rho']
+        parameters = [('fraction', 0), ('composition', fp, 1, 0),
+                      ('param', pv, 'K_0')]
+        jacobian = rock.evaluate_jacobian(
+            names, pressures, temperatures, parameters)
+        self.assertEqual(jacobian.shape, (3, 2, 3))
+
+        def derivative(set_value, value, h):
+            set_value(value + h)
+            upper = rock.evaluate(names, pressures, temperatures)
+            set_value(value - h)
+            lower = rock.evaluate(names, pressures, temperatures)
+            set_value(value)
+            return (upper - lower) / (2. * h)
+
+        def set_fraction(x):
+            rock.molar_fractions = [x, 0.3]
+
+        def set_composition(x):
+            fp.set_composition([0.8 - x, 0.2 + x])
+
+        def set_K_0(x):
+            pv.params['K_0'] = x
+
+        expected = [derivative(set_fraction, 0.7, 1.e-5),
+                    derivative(set_composition, 0., 1.e-5),
+                    derivative(set_K_0, pv.params['K_0'], 1.e4)]
+        for k in range(3):
+            self.assertArraysAlmostEqual(jacobian[:, :, k].flatten(),
+                                         expected[k].flatten())
+
+    def test_evaluate_jacobian_fractions(self):
+        pv = minerals.SLB_2011.mg_perovskite()
+        per = minerals.SLB_2011.periclase()
+        stv = minerals.SLB_2011.stishovite()
+        rock = burnman.Composite([pv, per, stv], [0.6, 0.3, 0.1])
+        pressures = [40.e9, 80.e9]
+        temperatures = [2000., 2300.]
+        names = ['V', 'rho', 'K_T', 'K_S', 'G', 'beta_T', 'beta_S', 'v_p',
+                 'v_phi', 'v_s', 'gr', 'alpha', 'C_v', 'C_p', 'gibbs',
+                 'molar_mass']
+        parameters = [('fraction', 0), ('fraction', 2)]
+
+        for scheme in ['Voigt', 'Reuss', 'VoigtReussHill',
+                       'HashinShtrikmanAverage']:
+            rock.set_averaging_scheme(scheme)
+            jacobian = rock.evaluate_jacobian(
+                names, pressures, temperatures, parameters)
+            h = 1.e-6
+            for k, i in enumerate([0, 2]):
+                upper = [0.6, 0.3, 0.1]
+                upper[i] += h
+                lower = [0.6, 0.3, 0.1]
+                lower[i] -= h
+                rock.molar_fractions = upper
+                expected = rock.evaluate(names, pressures, temperatures)
+                rock.molar_fractions = lower
+                expected -= rock.evaluate(names, pressures, temperatures)
+                rock.molar_fractions = [0.6, 0.3, 0.1]
+                expected /= 2. * h
+                for n in range(len(names)):
+                    self.assertArraysAlmostEqual(jacobian[n, :, k],
+                                                 expected[n])
+
     def test_density_composite(self):
         pyrolite = burnman.Composite([minerals.SLB_2005.mg_perovskite(),
                                       minerals.SLB_2005.periclase()],
@@ -0,0 +1,103 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+
+sys.path.insert(1, os.path.abspath('..'))
+
+import warnings
+import numpy as np
+
+import burnman
+from burnman import minerals
+from burnman.fitting import fit_data, _slb_properties, _slb_volumes
+
+from util import BurnManTest
+
+
+class fitting(BurnManTest):
+
+    def test_slb_joint_fit(self):
+        per = minerals.SLB_2011.periclase()
+        pressures = np.linspace(1.e9, 100.e9, 30)
+        temperatures = np.linspace(300., 2500., 30)
+        V, K_S, v_s = per.evaluate(['V', 'K_S', 'v_s'], pressures, temperatures)
+
+        params = ['V_0', 'K_0', 'Kprime_0', 'G_0', 'Gprime_0', 'Debye_0']
+        expected = [per.params[p] for p in params]
+        for p in params:
+            per.params[p] *= 1.02
+        popt, pcov = fit_data(per, params, pressures, temperatures,
+                              {'V': V, 'K_S': K_S, 'v_s': v_s})
+        self.assertArraysAlmostEqual(popt, expected)
+        self.assertArraysAlmostEqual([per.params[p] for p in params], expected)
+        self.assertEqual(pcov.shape, (6, 6))
+
+    def test_slb_properties(self):
+        # the vectorized properties used for fitting agree with the
+        # properties of the mineral, for both SLB2 and SLB3
+        pressures = np.array([1.e5, 10.e9, 40.e9, 100.e9])
+        temperatures = np.array([300., 1000., 2000., 3000.])
+        names = ['V', 'K_S', 'G', 'rho', 'v_p', 'v_s']
+        for m in [minerals.Murakami_etal_2012.mg_perovskite(),
+                  minerals.SLB_2011.periclase()]:
+            expected = m.evaluate(names, pressures, temperatures)
+            volumes = _slb_volumes(m.method, m.params, pressures,
+                                   temperatures, 1.01 * expected[0])
+            properties = _slb_properties(m.method, m.params, volumes,
+                                         temperatures)
+            self.assertArraysAlmostEqual(properties['pressure'], pressures)
+            for name, values in zip(names, expected):
+                name = burnman.material.property_aliases.get(name, name)
+                self.assertArraysAlmostEqual(properties[name], values)
+
+    def test_missing_data(self):
+        per = minerals.SLB_2011.periclase()
+        pressures = np.linspace(1.e9, 50.e9, 10)
+        temperatures = 1000. * np.ones_like(pressures)
+        V, v_p = per.evaluate(['V', 'v_p'], pressures, temperatures)
+        V[::2] = np.nan
+        v_p[1::2] = np.nan
+
+        expected = [per.params['K_0'], per.params['G_0']]
+        per.params['K_0'] *= 0.97
+        per.params['G_0'] *= 1.05
+        popt, pcov = fit_data(per, ['K_0', 'G_0'], pressures, temperatures,
+                              {'V': V, 'v_p': v_p},
+                              {'V': 1.e-8, 'v_p': 10.})
+        self.assertArraysAlmostEqual(popt, expected)
+
+    def test_other_eos(self):
+        fo = minerals.HP_2011_ds62.fo()
+        pressures = np.linspace(1.e9, 10.e9, 10)
+        temperatures = np.linspace(300., 1500., 10)
+        V = fo.evaluate(['V'], pressures, temperatures)[0]
+
+        params = ['V_0', 'K_0', 'Kprime_0']
+        expected = [fo.params[p] for p in params]
+        for p in params:
+            fo.params[p] *= 1.02
+        popt, pcov = fit_data(fo, params, pressures, temperatures, {'V': V})
+        self.assertArraysAlmostEqual(popt, expected)
+
+    def test_not_converged(self):
+        per = minerals.SLB_2011.periclase()
+        pressures = np.linspace(1.e9, 50.e9, 10)
+        temperatures = 1000. * np.ones_like(pressures)
+        V = per.evaluate(['V'], pressures, temperatures)[0]
+
+        K_0 = per.params['K_0']
+        per.params['K_0'] *= 0.9
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            popt, pcov = fit_data(per, ['K_0'], pressures, temperatures,
+                                  {'V': V}, max_iterations=1)
+        self.assertEqual(len(w), 1)
+        # the result of the first iteration is still returned
+        self.assertTrue(abs(popt[0] - K_0) < 0.1 * K_0)
+        self.assertEqual(per.params['K_0'], popt[0])
+        self.assertEqual(pcov.shape, (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
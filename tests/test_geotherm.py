@@ -5,6 +5,7 @@ import sys
 
 sys.path.insert(1, os.path.abspath('..'))
 import warnings
+import numpy as np
 
 import burnman
 from burnman import minerals
@@ -45,6 +46,71 @@ class geotherm(BurnManTest):
         test_K_adiabat = burnman.geotherm.adiabatic(pressure, T0, rock)
         self.assertArraysAlmostEqual(test_K_adiabat, [1500, 1650.22034002])
 
+    def test_seismic_model(self):
+        pressures = np.linspace(30.e9, 120.e9, 5)
+        for geotherm in [burnman.geotherm.brown_shankland,
+                         burnman.geotherm.anderson]:
+            self.assertArraysAlmostEqual(
+                geotherm(pressures),
+                geotherm(pressures, burnman.seismic.PREM()))
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                temperatures = geotherm(pressures, burnman.seismic.AK135())
+            self.assertTrue(np.all(np.abs(temperatures - geotherm(pressures)) < 5.))
+
+    def test_adiabats(self):
+        rock = burnman.Composite([minerals.SLB_2011.mg_perovskite(),
+                                  minerals.SLB_2011.periclase()], [0.8, 0.2])
+        pressures = np.linspace(25.e9, 130.e9, 10)
+        T0s = [1700., 2000.]
+        temperatures = burnman.geotherm.adiabats(pressures, T0s, rock)
+        for T0, T in zip(T0s, temperatures):
+            self.assertArraysAlmostEqual(
+                T, burnman.geotherm.adiabatic(pressures, T0, rock))
+
+        temperatures = burnman.geotherm.adiabats(pressures, T0s, rock,
+                                                 temperature_step=20.)
+        for T0, T in zip(T0s, temperatures):
+            self.assertArraysAlmostEqual(
+                T, burnman.geotherm.adiabatic(pressures, T0, rock))
+
+        fractions = [[0.6, 0.4], [0.9, 0.1]]
+        temperatures = burnman.geotherm.adiabats(pressures, 1900., rock,
+                                                 fractions)
+        for f, T in zip(fractions, temperatures):
+            rock.set_fractions(f)
+            self.assertArraysAlmostEqual(
+                T, burnman.geotherm.adiabatic(pressures, 1900., rock))
+
+    def test_isentrope(self):
+        rock = mypericlase()
+        pressure = [100.e9, 150.e9]
+        rock.set_method('slb3')
+        T0 = 1500.
+        temperatures = burnman.geotherm.adiabatic(pressure, T0, rock,
+                                                  method='isentrope')
+        self.assertArraysAlmostEqual(temperatures, [1500, 1650.22034002])
+
+    def test_adiabatic_profile(self):
+        rock = burnman.Composite([minerals.SLB_2011.mg_perovskite(),
+                                  minerals.SLB_2011.periclase()], [0.8, 0.2])
+        pressures = np.linspace(25.e9, 130.e9, 10)
+        vars_list = ['v_s', 'v_p', 'density']
+        temperatures, output = burnman.geotherm.adiabatic_profile(
+            pressures, 1900., rock, vars_list)
+        self.assertArraysAlmostEqual(
+            temperatures, burnman.geotherm.isentrope(pressures, 1900., rock))
+        for values, expected in zip(output, rock.evaluate(vars_list, pressures,
+                                                          temperatures)):
+            self.assertArraysAlmostEqual(values, expected)
+
+    def test_isentrope_transition(self):
+        rock = minerals.Murakami_etal_2012.fe_periclase()
+        pressures = np.linspace(30.e9, 100.e9, 15)
+        temperatures = burnman.geotherm.isentrope(pressures, 2000., rock)
+        entropies = rock.evaluate(['molar_entropy'], pressures, temperatures)[0]
+        self.assertArraysAlmostEqual(entropies, entropies[0] * np.ones(15))
+
 
 if __name__ == '__main__':
     unittest.main()
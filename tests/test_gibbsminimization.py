@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
+import warnings
+
+import burnman
+from burnman import minerals
+from burnman.processchemistry import dictionarize_formula
+from burnman.gibbsminimization import GibbsMinimizer
+from burnman.tools import equilibrium_pressure
+
+from util import BurnManTest
+
+
+class gibbs_minimization(BurnManTest):
+
+    def test_univariant(self):
+        fo = minerals.SLB_2011.forsterite()
+        wad = minerals.SLB_2011.mg_wadsleyite()
+        T = 1600.
+        P = equilibrium_pressure([fo, wad], [1.0, -1.0], T, 13.e9)
+
+        g = GibbsMinimizer(dictionarize_formula('Mg2SiO4'), [fo, wad])
+        self.assertEqual(g.stable_phases, [])
+        amounts, compositions = g.equilibrate(P - 1.e8, T)
+        self.assertArraysAlmostEqual(amounts, [1., 0.])
+        self.assertEqual(g.stable_phases, [0])
+        amounts, compositions = g.equilibrate(P + 1.e8, T)
+        self.assertArraysAlmostEqual(amounts, [0., 1.])
+        self.assertEqual(g.stable_phases, [1])
+
+    def test_not_converged(self):
+        class Unsettled(GibbsMinimizer):
+            # absent phases always seem to lower the Gibbs free energy
+
+            def _driving_force(self, i, element_potentials, pressure,
+                               temperature, gibbs):
+                return -1., np.ones(1)
+
+        fo = minerals.SLB_2011.forsterite()
+        wad = minerals.SLB_2011.mg_wadsleyite()
+        g = Unsettled(dictionarize_formula('Mg2SiO4'), [fo, wad])
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            g.equilibrate(10.e9, 1600.)
+        self.assertEqual(len(w), 1)
+        self.assertEqual(g.stable_phases, [0])
+
+    def test_single_solution(self):
+        ol = minerals.SLB_2011.mg_fe_olivine()
+        g = GibbsMinimizer(dictionarize_formula('Mg1.8Fe0.2SiO4'), [ol])
+        amounts, compositions = g.equilibrate(1.e9, 1200.)
+        self.assertArraysAlmostEqual(amounts, [1.])
+        self.assertArraysAlmostEqual(compositions[0], [0.9, 0.1])
+        self.assertArraysAlmostEqual(ol.molar_fractions, [0.9, 0.1])
+
+    def test_two_phase_loop(self):
+        ol = minerals.SLB_2011.mg_fe_olivine()
+        wad = minerals.SLB_2011.mg_fe_wadsleyite()
+        composition = dictionarize_formula('Mg1.8Fe0.2SiO4')
+        g = GibbsMinimizer(composition, [ol, wad])
+
+        pressures = np.linspace(12.e9, 14.e9, 11)
+        temperatures = 1600. * np.ones_like(pressures)
+        amounts, compositions = g.equilibrate_along(pressures, temperatures)
+
+        # olivine on the low pressure side, wadsleyite on the high
+        # pressure side, and a loop in between where Fe partitions
+        # into wadsleyite
+        self.assertArraysAlmostEqual(amounts[0], [1., 0.])
+        self.assertArraysAlmostEqual(amounts[-1], [0., 1.])
+        loop = [i for i in range(len(pressures))
+                if amounts[i][0] > 1.e-3 and amounts[i][1] > 1.e-3]
+        self.assertTrue(len(loop) > 0)
+        for i in loop:
+            self.assertTrue(compositions[i][1][1] > compositions[i][0][1])
+
+        # mass balance
+        for i in loop:
+            fe = np.dot(amounts[i], [compositions[i][0][1],
+                                     compositions[i][1][1]])
+            self.assertFloatEqual(fe, 0.1)
+
+        # warm and cold starts agree
+        g2 = GibbsMinimizer(composition, [ol, wad])
+        for i in loop:
+            amounts2, compositions2 = g2.equilibrate(
+                pressures[i], temperatures[i], warm_start=False)
+            self.assertAlmostEqual(amounts2[0], amounts[i][0], places=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
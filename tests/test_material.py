@@ -3,7 +3,10 @@ import unittest
 import inspect
 import os
 import sys
+import shutil
+import tempfile
 sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
 
 import burnman
 from burnman import minerals
@@ -108,5 +111,46 @@ class test_material_name(BurnManTest):
         self.assertEqual(m.name, "bla")
 
 
+class test_evaluate_iter(BurnManTest):
+
+    def setUp(self):
+        self.rock = burnman.Composite([minerals.SLB_2011.mg_perovskite(),
+                                       minerals.SLB_2011.periclase()],
+                                      [0.8, 0.2])
+        self.pressures = np.linspace(25.e9, 125.e9, 23)
+        self.temperatures = np.linspace(2000., 3000., 23)
+        self.vars = ['density', 'v_s', 'gr']
+
+    def test_blocks(self):
+        expected = self.rock.evaluate(self.vars, self.pressures,
+                                      self.temperatures)
+        blocks = list(self.rock.evaluate_iter(self.vars, self.pressures,
+                                              self.temperatures, block_size=10))
+        self.assertEqual([b for b, values in blocks],
+                         [slice(0, 10), slice(10, 20), slice(20, 23)])
+        for block, values in blocks:
+            self.assertArraysAlmostEqual(values.ravel(),
+                                         expected[:, block].ravel())
+
+    def test_npy_output(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'output.npy')
+            for block, values in self.rock.evaluate_iter(
+                    self.vars, self.pressures, self.temperatures,
+                    block_size=10, output=filename):
+                # the file is complete up to the current block
+                written = np.load(filename, mmap_mode='r')
+                self.assertArraysAlmostEqual(written[:, block].ravel(),
+                                             values.ravel())
+                del written
+            expected = self.rock.evaluate(self.vars, self.pressures,
+                                          self.temperatures)
+            self.assertArraysAlmostEqual(np.load(filename).ravel(),
+                                         expected.ravel())
+        finally:
+            shutil.rmtree(directory)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
+
+import burnman
+from burnman import misfit
+
+from util import BurnManTest
+
+
+class test_misfit(BurnManTest):
+
+    def setUp(self):
+        self.depths = np.linspace(1000.e3, 2500.e3, 11)
+        self.obs = 6000. + 0.001 * self.depths
+        self.calc = np.array([self.obs * (1. + 0.01 * i) + 10. * np.sin(self.depths)
+                              for i in range(4)])
+
+    def test_ensemble_matches_single_profiles(self):
+        for i in range(4):
+            self.assertFloatEqual(misfit.l2(self.depths, self.calc, self.obs)[i],
+                                  burnman.l2(self.depths, self.calc[i], self.obs))
+            self.assertFloatEqual(misfit.chi_factor(self.calc, self.obs)[i],
+                                  burnman.chi_factor(self.calc[i], self.obs))
+            diff = self.calc[i] - self.obs
+            self.assertFloatEqual(
+                misfit.nrmse(self.calc, self.obs)[i],
+                np.sqrt(np.mean(diff * diff)) / (np.max(self.calc[i]) - np.min(self.calc[i])))
+
+    def test_weights_and_uncertainties(self):
+        uncertainties = 0.02 * self.obs
+        chi = misfit.chi_factor(self.calc, self.obs, uncertainties)
+        self.assertFloatEqual(
+            chi[2], np.mean(np.power((self.calc[2] - self.obs) / uncertainties, 2.)))
+
+        # only the lower half of the profile
+        weights = (self.depths > 1700.e3).astype(float)
+        lower = self.depths > 1700.e3
+        self.assertArraysAlmostEqual(
+            misfit.chi_factor(self.calc, self.obs, weights=weights),
+            misfit.chi_factor(self.calc[:, lower], self.obs[lower],
+                              0.01 * np.mean(self.obs)))
+        self.assertArraysAlmostEqual(
+            misfit.l2(self.depths, self.calc, self.obs, 2. * np.ones(11)),
+            2. * misfit.l2(self.depths, self.calc, self.obs))
+        self.assertArraysAlmostEqual(
+            misfit.nrmse(self.calc, self.obs, np.ones(11)),
+            misfit.nrmse(self.calc, self.obs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
+
+import burnman
+from burnman import minerals
+from burnman.processchemistry import dictionarize_formula
+from burnman.phasediagram import pseudosection
+from burnman.tools import equilibrium_pressure
+
+from util import BurnManTest
+
+
+class phase_diagram(BurnManTest):
+
+    def setUp(self):
+        self.phases = [minerals.SLB_2011.forsterite(),
+                       minerals.SLB_2011.mg_wadsleyite()]
+        self.composition = dictionarize_formula('Mg2SiO4')
+
+    def check_boundary(self, points, labels, boundaries, resolution):
+        self.assertEqual(set(labels), set([(0,), (1,)]))
+        self.assertEqual(list(boundaries.keys()), [((0,), (1,))])
+        for P, T in boundaries[((0,), (1,))]:
+            P_eqm = equilibrium_pressure(self.phases, [1.0, -1.0], T, P)
+            self.assertTrue(abs(P - P_eqm) < resolution)
+
+    def test_pseudosection(self):
+        points, labels, boundaries = pseudosection(
+            self.composition, self.phases, [10.e9, 16.e9], [1400., 2000.],
+            n_coarse=(3, 3), resolution=(2.e8, 50.))
+        self.assertEqual(len(points), len(labels))
+        self.check_boundary(points, labels, boundaries, 2.e8)
+
+        # far fewer points than a uniform grid at the same resolution
+        self.assertTrue(len(points) < 0.5 * 33 * 33)
+
+    def test_pseudosection_parallel(self):
+        serial = pseudosection(self.composition, self.phases,
+                               [10.e9, 16.e9], [1400., 2000.],
+                               n_coarse=(3, 3), resolution=(1.e9, 200.))
+        parallel = pseudosection(self.composition, self.phases,
+                                 [10.e9, 16.e9], [1400., 2000.],
+                                 n_coarse=(3, 3), resolution=(1.e9, 200.),
+                                 processes=2)
+        self.assertEqual(serial[1], parallel[1])
+        self.check_boundary(*parallel, resolution=1.e9)
+
+
+if __name__ == '__main__':
+    unittest.main()
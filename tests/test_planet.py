@@ -0,0 +1,93 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
+
+import burnman
+from burnman import minerals
+from burnman import constants
+from burnman.planet import Planet, Layer
+
+from util import BurnManTest
+
+
+class constant_density(burnman.Material):
+
+    def __init__(self, density):
+        self._density = density
+        burnman.Material.__init__(self)
+
+    @property
+    def density(self):
+        return self._density
+
+
+class planet(BurnManTest):
+
+    def test_uniform_planet(self):
+        rho = 5000.
+        R = 6.e6
+        p = Planet([Layer('core', constant_density(rho), 3.e6, 300., 201),
+                    Layer('mantle', constant_density(rho), R, 300., 201)])
+        p.generate_profiles()
+        self.assertEqual(len(p.radii), 402)
+        self.assertFloatEqual(p.mass, 4. / 3. * np.pi * rho * R ** 3)
+        self.assertFloatEqual(p.moment_of_inertia_factor, 0.4)
+        self.assertArraysAlmostEqual(
+            p.gravity, 4. / 3. * np.pi * constants.G * rho * p.radii)
+        self.assertFloatEqual(
+            p.pressures[0], 2. / 3. * np.pi * constants.G * rho * rho * R * R)
+
+    def test_two_layers(self):
+        rho_core = 10000.
+        rho_mantle = 4000.
+        r_core = 3.e6
+        R = 6.e6
+        p = Planet([Layer('core', constant_density(rho_core), r_core, 300., 201),
+                    Layer('mantle', constant_density(rho_mantle), R, 300., 201)])
+        p.generate_profiles()
+        self.assertFloatEqual(p.mass, 4. / 3. * np.pi * (
+            rho_core * r_core ** 3 + rho_mantle * (R ** 3 - r_core ** 3)))
+        self.assertArraysAlmostEqual(p.densities[[199, 200, 201, 202]],
+                                     [rho_core, rho_core, rho_mantle, rho_mantle])
+
+    def test_minerals(self):
+        core = minerals.SLB_2011.periclase()
+        mantle = burnman.Composite([minerals.SLB_2011.forsterite(),
+                                    minerals.SLB_2011.enstatite()],
+                                   [0.8, 0.2])
+        layers = [Layer('core', core, 1.e6, 1500., 41),
+                  Layer('mantle', mantle, 2.e6, lambda p: 1000. + p / 1.e8, 41)]
+
+        plain = Planet(layers, n_history=0)
+        plain.generate_profiles()
+        p = Planet(layers)
+        p.generate_profiles()
+        self.assertTrue(p.n_iterations < plain.n_iterations)
+        self.assertArraysAlmostEqual(p.pressures, plain.pressures)
+        self.assertFloatEqual(p.mass, plain.mass)
+        self.assertFloatEqual(p.temperatures[41], 1000. + p.pressures[41] / 1.e8)
+        self.assertFloatEqual(p.temperatures[-1], 1000.)
+        self.assertArraysAlmostEqual(
+            p.evaluate(['density'])[0], p.densities)
+
+        # warm start
+        p.generate_profiles()
+        self.assertEqual(p.n_iterations, 1)
+
+        masses, factors = p.mass_radius_curve([2.e6, 2.2e6])
+        self.assertFloatEqual(masses[0], p.mass)
+        self.assertFloatEqual(factors[0], p.moment_of_inertia_factor)
+        self.assertEqual(p.outer_radius, 2.e6)
+
+        layers[0].outer_radius = 1.1e6
+        layers[1].outer_radius = 2.2e6
+        p.generate_profiles()
+        self.assertFloatEqual(masses[1], p.mass)
+        self.assertFloatEqual(factors[1], p.moment_of_inertia_factor)
+
+
+if __name__ == '__main__':
+    unittest.main()
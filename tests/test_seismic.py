@@ -5,6 +5,7 @@ import sys
 
 sys.path.insert(1, os.path.abspath('..'))
 import warnings
+import numpy as np
 
 import burnman
 from burnman import minerals
@@ -31,6 +32,12 @@ class test_seismic(BurnManTest):
             # print model.__class__.__name__, stats
             self.assertArraysAlmostEqual(stats, ref_depth_lists[name])
 
+    def test_shared_tables(self):
+        prem1 = burnman.seismic.PREM()
+        prem2 = burnman.seismic.PREM()
+        self.assertTrue(prem1.table_vs is prem2.table_vs)
+        self.assertFalse(prem1.table_vs.flags.writeable)
+
     def test_evaluate(self):
         models = [burnman.seismic.PREM(),
                   burnman.seismic.Fast(),
@@ -58,6 +65,86 @@ class test_seismic(BurnManTest):
             # print "'%s': %s," % (name, result)
             self.assertArraysAlmostEqual(result, ref[name])
 
+    def test_depth(self):
+        model = burnman.seismic.PREM()
+        pressures = [0., 1.e9, 24.e9, 135.e9, 363.e9]
+        depths = model.depth(pressures)
+        self.assertEqual(depths.shape, (5,))
+        for pressure, depth in zip(pressures, depths):
+            self.assertFloatEqual(model.depth(pressure), depth)
+        self.assertArraysAlmostEqual(model.pressure(depths[1:-1]),
+                                     pressures[1:-1])
+        self.assertArraysAlmostEqual(model.radius(pressures),
+                                     model.earth_radius - depths)
+        self.assertRaises(ValueError, model.depth, [1.e9, 400.e9])
+        self.assertRaises(ValueError, model.depth, -1.)
+
+    def test_discontinuity_side(self):
+        model = burnman.seismic.PREM()
+        depths = [15000., 1000.e3, 2891.e3]
+        vars = ['pressure', 'density', 'v_s', 'v_p', 'v_phi', 'G', 'K',
+                'QG', 'QK']
+        lower = model.evaluate(vars, depths)
+        upper = model.evaluate(vars, depths, side='upper')
+        for a, var in enumerate(vars):
+            self.assertArraysAlmostEqual(lower[a],
+                                         getattr(model, var)(depths))
+        # the crust above the discontinuity at 15 km, the mantle below
+        self.assertFloatEqual(upper[2][0], 3200.)
+        self.assertFloatEqual(lower[2][0], 3900.)
+        # the core-mantle boundary
+        self.assertFloatEqual(upper[2][2], 7264.66)
+        self.assertFloatEqual(lower[2][2], 0.)
+        self.assertArraysAlmostEqual(upper[:, 1], lower[:, 1])
+
+    def test_anelastic_velocities(self):
+        model = burnman.seismic.PREM()
+        depths = np.linspace(100.e3, 2800.e3, 10)
+        v_p, v_s, QG, QK = model.evaluate(['v_p', 'v_s', 'QG', 'QK'], depths)
+
+        # the same as attenuation_correction at the reference frequency
+        a_p, a_s, a_phi = burnman.seismic.anelastic_velocities(v_p, v_s, QG)
+        v_phi = np.sqrt(v_p * v_p - 4. / 3. * v_s * v_s)
+        b_p, b_s, b_phi = burnman.seismic.attenuation_correction(
+            v_p.copy(), v_s.copy(), v_phi.copy(), QG, QK)
+        self.assertArraysAlmostEqual(a_p, b_p)
+        self.assertArraysAlmostEqual(a_s, b_s)
+        self.assertArraysAlmostEqual(a_phi, v_phi)
+        c_phi = burnman.seismic.anelastic_velocities(v_p, v_s, QG, QK)[2]
+        self.assertArraysAlmostEqual(c_phi, b_phi)
+
+        # several frequencies at once
+        frequencies = [0.01, 1., 10.]
+        d_p, d_s, d_phi = burnman.seismic.anelastic_velocities(
+            v_p, v_s, QG, QK, frequencies=frequencies)
+        self.assertEqual(d_s.shape, (3, 10))
+        self.assertArraysAlmostEqual(d_s[1], a_s)
+        self.assertTrue(np.all(d_s[0] < d_s[1]) and np.all(d_s[1] < d_s[2]))
+        e_s = burnman.seismic.anelastic_velocities(
+            v_p, v_s, QG, QK, frequencies=0.01)[1]
+        self.assertArraysAlmostEqual(d_s[0], e_s)
+
+        # QK with more dimensions than the velocities
+        QKs = np.array([QK, 2. * QK])
+        f_phi = burnman.seismic.anelastic_velocities(
+            v_p[0], v_s[0], QG[0], QKs, frequencies=frequencies)[2]
+        self.assertEqual(f_phi.shape, (3, 2, 10))
+        self.assertArraysAlmostEqual(f_phi[:, 0, 0], d_phi[:, 0])
+
+        # fluid outer core: no shear attenuation
+        v_p, v_s, QG = model.evaluate(['v_p', 'v_s', 'QG'], [3000.e3])
+        self.assertArraysAlmostEqual(
+            burnman.seismic.anelastic_velocities(v_p, v_s, QG)[0], v_p)
+
+    def test_temperature_dependent_Q(self):
+        T = np.array([[1500., 2000.], [2500., 3000.]])
+        P = 50.e9
+        Q = burnman.seismic.temperature_dependent_Q(T, P, 0.1, 5.e5, 1.e-6)
+        self.assertEqual(Q.shape, (2, 2))
+        self.assertFloatEqual(Q[0, 1], 0.1 * np.exp(
+            0.3 * (5.e5 + P * 1.e-6) / burnman.constants.gas_constant / 2000.))
+        self.assertTrue(Q[0, 0] > Q[0, 1] > Q[1, 0] > Q[1, 1])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -37,5 +37,49 @@ class spin_transition(BurnManTest):
         m.set_state(70e9, 300)
         self.assertArraysAlmostEqual(m.molar_fractions, [1.0, 0.0])
 
+    def test_evaluate(self):
+        m = minerals.Murakami_etal_2012.fe_periclase()
+        hs = minerals.Murakami_etal_2012.fe_periclase_HS()
+        ls = minerals.Murakami_etal_2012.fe_periclase_LS()
+        pressures = [5.e9, 70.e9, 10.e9, 100.e9]
+        temperatures = [300., 1000., 2000., 2500.]
+        v_s, rho = m.evaluate(['v_s', 'rho'], pressures, temperatures)
+        for i in range(len(pressures)):
+            ref = hs if pressures[i] < m.transition_pressure else ls
+            ref.set_state(pressures[i], temperatures[i])
+            self.assertFloatEqual(v_s[i], ref.v_s)
+            self.assertFloatEqual(rho[i], ref.rho)
+            m.set_state(pressures[i], temperatures[i])
+            self.assertFloatEqual(v_s[i], m.v_s)
+
+    def test_in_composite(self):
+        m = minerals.Murakami_etal_2012.fe_periclase()
+        pv = minerals.SLB_2011.mg_perovskite()
+        rock = burnman.Composite([pv, m], [0.8, 0.2])
+        rock.set_state(70.e9, 2000.)
+        unrolled = burnman.Composite([pv, m.ls_mat], [0.8, 0.2])
+        unrolled.set_state(70.e9, 2000.)
+        self.assertFloatEqual(rock.v_p, unrolled.v_p)
+        self.assertFloatEqual(rock.gr, unrolled.gr)
+
+    def test_unrolled_state(self):
+        m = minerals.Murakami_etal_2012.fe_periclase()
+        hs = minerals.Murakami_etal_2012.fe_periclase_HS()
+        ls = minerals.Murakami_etal_2012.fe_periclase_LS()
+        m.set_state(5.e9, 300.)
+        self.assertTrue(m.v_s > 0.)
+        for P, T in [(70.e9, 2000.), (10.e9, 1500.)]:
+            m.set_state(P, T)
+            self.assertTrue(m.v_s > 0.)
+            # the other material is only evaluated when it is queried
+            inactive = m.hs_mat if m.molar_fractions[0] == 1. else m.ls_mat
+            self.assertFalse('molar_volume' in inactive._cached)
+            hs.set_state(P, T)
+            ls.set_state(P, T)
+            phases, fractions = m.unroll()
+            self.assertFloatEqual(phases[0].molar_volume, ls.molar_volume)
+            self.assertFloatEqual(phases[1].molar_volume, hs.molar_volume)
+
+
 if __name__ == '__main__':
     unittest.main()
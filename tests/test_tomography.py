@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+import unittest
+import os
+import sys
+import tempfile
+sys.path.insert(1, os.path.abspath('..'))
+import numpy as np
+
+import burnman
+from burnman import minerals
+from burnman.tomography import velocities_from_field
+
+from util import BurnManTest
+
+
+class tomography(BurnManTest):
+
+    def setUp(self):
+        self.depths = np.array([700.e3, 1500.e3, 2500.e3])
+        T = 1500. + 100. * np.arange(12.).reshape(3, 4)
+        self.temperatures = np.dstack([T, T + 300., T + 600.])
+        # repeated temperatures are only evaluated once
+        self.temperatures[2, 3, :] = self.temperatures[0, 0, :]
+        self.pressures = burnman.seismic.PREM().pressure(self.depths)
+        self.rock = burnman.Composite([minerals.SLB_2011.mg_perovskite(),
+                                       minerals.SLB_2011.periclase()],
+                                      [0.8, 0.2])
+
+    def test_uniform_rock(self):
+        vars = ['v_p', 'v_s', 'density']
+        output = velocities_from_field(self.rock, self.depths,
+                                       self.temperatures, chunk_size=5)
+        self.assertEqual(output.shape, (3, 3, 4, 3))
+        for k in range(3):
+            for i, j in [(0, 0), (1, 2), (2, 3)]:
+                T = self.temperatures[i, j, k]
+                self.assertArraysAlmostEqual(
+                    output[:, i, j, k],
+                    self.rock.evaluate(vars, [self.pressures[k]], [T])[:, 0])
+
+    def test_fraction_field(self):
+        fractions = np.empty((3, 4, 3, 2))
+        fractions[:, :, :, 0] = np.linspace(0., 1., 36).reshape(3, 4, 3)
+        fractions[:, :, :, 1] = 1. - fractions[:, :, :, 0]
+        vars = ['v_s', 'density', 'K_S']
+        output = velocities_from_field(self.rock, self.depths,
+                                       self.temperatures, fractions,
+                                       vars_list=vars, chunk_size=7)
+        for i, j, k in [(0, 0, 0), (1, 3, 1), (2, 1, 2)]:
+            rock = burnman.Composite(self.rock.phases, fractions[i, j, k])
+            self.assertArraysAlmostEqual(
+                output[:, i, j, k],
+                rock.evaluate(vars, [self.pressures[k]],
+                              [self.temperatures[i, j, k]])[:, 0])
+
+    def test_memmap_and_temperature_step(self):
+        exact = velocities_from_field(self.rock, self.depths,
+                                      self.temperatures)
+        filename = os.path.join(tempfile.mkdtemp(), 'field.npy')
+        output = np.lib.format.open_memmap(filename, mode='w+',
+                                           shape=exact.shape)
+        result = velocities_from_field(self.rock, self.depths,
+                                       self.temperatures, output=output,
+                                       temperature_step=70.)
+        self.assertTrue(result is output)
+        del output, result
+        interpolated = np.load(filename)
+        self.assertTrue(np.max(np.abs(interpolated / exact - 1.)) < 1.e-4)
+        self.assertFalse(np.all(interpolated == exact))
+        os.remove(filename)
+        os.rmdir(os.path.dirname(filename))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import os
 import sys
+import shutil
+import tempfile
 sys.path.insert(1, os.path.abspath('..'))
 
 import burnman
@@ -42,6 +44,26 @@ class test_tools(BurnManTest):
         P_calc = equilibrium_pressure([fo, fo2], [1.0, -1.0], fo.params['T_0'])
         self.assertArraysAlmostEqual([P], [P_calc])
 
+    def test_reaction_line(self):
+        fo = burnman.minerals.SLB_2011.forsterite()
+        wad = burnman.minerals.SLB_2011.mg_wadsleyite()
+        pressures, temperatures, slopes = reaction_line(
+            [fo, wad], [1.0, -1.0], [1000., 2000.], 13.e9)
+
+        self.assertFloatEqual(temperatures[0], 1000.)
+        self.assertTrue(temperatures[-1] >= 2000. * (1. - 1.e-8))
+        for P, T in zip(pressures, temperatures):
+            P_eqm = equilibrium_pressure([fo, wad], [1.0, -1.0], T, P)
+            self.assertFloatEqual(P, P_eqm)
+
+        # Clapeyron slopes compared with a finite difference
+        i = len(pressures) // 2
+        dT = 1.
+        P_eqm = equilibrium_pressure(
+            [fo, wad], [1.0, -1.0], temperatures[i] + dT, pressures[i])
+        self.assertAlmostEqual(slopes[i], (P_eqm - pressures[i]) / dT,
+                               delta=1.e-3 * abs(slopes[i]))
+
     def test_fit_PVT_data(self):
         fo = burnman.minerals.HP_2011_ds62.fo()
 
@@ -95,6 +117,45 @@ class test_tools(BurnManTest):
         self.assertArraysAlmostEqual(
             [mass_fractions[0] + mass_fractions[1]], [mass_fractions[2]])
 
+    def test_table_cache(self):
+        cache_dir = tempfile.mkdtemp()
+        old_cache_dir = os.environ.get('BURNMAN_CACHE_DIR')
+        os.environ['BURNMAN_CACHE_DIR'] = cache_dir
+        filename = 'input_geotherm/brown_81.txt'
+        loaded = burnman.tools._loaded_tables.pop(filename, None)
+        try:
+            parsed = burnman.tools._parse_table(filename)
+            # the first call compiles the table, the second one reads it
+            for i in range(2):
+                burnman.tools._loaded_tables.pop(filename, None)
+                table = burnman.tools._load_table(filename)
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                self.assertArraysAlmostEqual(table.flatten(), parsed.flatten())
+                self.assertFalse(table.flags.writeable)
+
+            # read_table returns a private, writable copy
+            copy = burnman.tools.read_table(filename)
+            copy[0, 0] = -1.
+            self.assertArraysAlmostEqual(table.flatten(), parsed.flatten())
+
+            # without BURNMAN_CACHE_DIR, nothing is written to disk
+            shutil.rmtree(cache_dir)
+            del os.environ['BURNMAN_CACHE_DIR']
+            burnman.tools._loaded_tables.pop(filename, None)
+            table = burnman.tools._load_table(filename)
+            self.assertArraysAlmostEqual(table.flatten(), parsed.flatten())
+            self.assertFalse(table.flags.writeable)
+            self.assertFalse(os.path.exists(cache_dir))
+            os.mkdir(cache_dir)
+        finally:
+            if old_cache_dir is None:
+                os.environ.pop('BURNMAN_CACHE_DIR', None)
+            else:
+                os.environ['BURNMAN_CACHE_DIR'] = old_cache_dir
+            if loaded is not None:
+                burnman.tools._loaded_tables[filename] = loaded
+            shutil.rmtree(cache_dir)
+
     def test_bracket(self):
         def fn(x):
             return (x - 1.) * (x - 2.)
@@ -11,14 +11,20 @@ from test_decorators import *
 from test_endmembers import *
 from test_eos import *
 from test_geotherm import *
+from test_gibbsminimization import *
 from test_material import *
 from test_minerals import *
+from test_misfit import *
+from test_fitting import *
 from test_model import *
 from test_modifiers import *
 from test_partitioning import *
+from test_phasediagram import *
+from test_planet import *
 from test_seismic import *
 from test_solidsolution import *
 from test_spin import *
+from test_tomography import *
 from test_tools import *
 
 import os